@@ -0,0 +1,46 @@
+"""
+Compare one-symbol-per-call `Share(symbol)` with `Share.bulk(symbols)`
+
+    $ python bench/bench_batch.py --symbols 2000 --latency 0.005
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import StubServer  # noqa: E402
+from yahoo_finance import Share, yql  # noqa: E402
+
+
+def run(label, server, fn, symbols):
+    before = server.requests
+    start = time.time()
+    fn(symbols)
+    elapsed = time.time() - start
+    requests = server.requests - before
+    print('%-12s %6d symbols  %5d requests  %8.3fs  %9.1f req/s  %9.1f symbols/s' % (
+        label, len(symbols), requests, elapsed, requests / elapsed, len(symbols) / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='simulated round-trip in seconds')
+    args = parser.parse_args()
+
+    server = StubServer(latency=args.latency).start()
+    yql.PUBLIC_API_URL = server.url
+    symbols = ['S%05d' % i for i in range(args.symbols)]
+    try:
+        run('single', server, lambda syms: [Share(s) for s in syms], symbols)
+        run('bulk', server, lambda syms: Share.bulk(syms, chunk_size=args.chunk_size), symbols)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
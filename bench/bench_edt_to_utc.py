@@ -0,0 +1,69 @@
+"""
+Time of 100k `edt_to_utc` conversions, uncached against memoized and batch
+
+    $ python bench/bench_edt_to_utc.py --conversions 100000 --distinct 390
+"""
+import argparse
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pytz  # noqa: E402
+from yahoo_finance import _edt_to_utc_cache, edt_to_utc, edt_to_utc_many  # noqa: E402
+
+
+def uncached(date, mask='%m/%d/%Y %I:%M%p'):
+    # `edt_to_utc` before memoization
+    utc = pytz.utc
+    eastern = pytz.timezone('US/Eastern')
+    date_ = datetime.strptime(date.replace(" 0:", " 12:"), mask)
+    date_eastern = eastern.localize(date_, is_dst=None)
+    date_utc = date_eastern.astimezone(utc)
+    return date_utc.strftime('%Y-%m-%d %H:%M:%S %Z%z')
+
+
+def trade_times(count):
+    # minutes of a trading day as Yahoo formats them, e.g. '5/26/2014 4:00pm'
+    start = datetime(2014, 5, 26, 9, 30)
+    times = []
+    for minute in range(count):
+        t = start + timedelta(minutes=minute)
+        times.append('%d/%d/%d %d:%02d%s' % (t.month, t.day, t.year, t.hour % 12, t.minute,
+                                             'pm' if t.hour >= 12 else 'am'))
+    return times
+
+
+def timed(convert, dates):
+    start = time.time()
+    results = convert(dates)
+    return results, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--conversions', type=int, default=100000)
+    parser.add_argument('--distinct', type=int, default=390, help='distinct date strings')
+    args = parser.parse_args()
+
+    random.seed(0)
+    distinct = trade_times(args.distinct)
+    dates = [random.choice(distinct) for _ in range(args.conversions)]
+    print('%d conversions of %d distinct date strings' % (len(dates), len(distinct)))
+
+    expected, baseline = timed(lambda d: [uncached(x) for x in d], dates)
+    _edt_to_utc_cache.clear()
+    memoized, memoized_time = timed(lambda d: [edt_to_utc(x) for x in d], dates)
+    batch, batch_time = timed(edt_to_utc_many, dates)
+    assert expected == memoized == batch
+
+    print('%-16s %8.1fms' % ('uncached', 1000 * baseline))
+    for name, elapsed in (('edt_to_utc', memoized_time), ('edt_to_utc_many', batch_time)):
+        print('%-16s %8.1fms  (%.1fx faster)' % (name, 1000 * elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
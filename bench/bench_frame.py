@@ -0,0 +1,54 @@
+"""
+Memory and parse time of `get_historical` rows against `HistoricalFrame`
+
+    $ python bench/bench_frame.py --years 10
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import history  # noqa: E402
+from yahoo_finance import HistoricalFrame  # noqa: E402
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.time()
+    result = build()
+    elapsed = time.time() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args()
+
+    end = 2014
+    rows, rows_size, _ = measure(
+        lambda: history('YHOO', '%d-01-01' % (end - args.years), '%d-12-31' % (end - 1)))
+    print('%d daily bars' % len(rows))
+    print('%-18s %10.1f KiB' % ('list of dicts', rows_size / 1024.0))
+    frame, frame_size, _ = measure(lambda: HistoricalFrame.from_rows(rows))
+    print('%-18s %10.1f KiB  (%.1fx smaller)' % (
+        'HistoricalFrame', frame.nbytes / 1024.0, rows_size / float(frame.nbytes)))
+
+    start = time.time()
+    [(r['Date'], float(r['Open']), float(r['High']), float(r['Low']), float(r['Close']),
+               float(r['Adj_Close']), int(r['Volume'])) for r in rows]
+    per_row = time.time() - start
+    start = time.time()
+    HistoricalFrame.from_rows(rows)
+    vectorized = time.time() - start
+    print('parse all columns: per row %.2fms, HistoricalFrame.from_rows %.2fms' % (
+        1000 * per_row, 1000 * vectorized))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Decoding and parsing time of a large recorded `historicaldata` response
+
+    $ python bench/bench_json.py --years 1 --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import simplejson  # noqa: E402
+from stub_server import QUOTE_FIELDS, StubServer  # noqa: E402
+from yahoo_finance import Base, Share, yql  # noqa: E402
+from yahoo_finance.transport import RecordingTransport, ReplayTransport  # noqa: E402
+
+DECODERS = [('json', json.loads), ('simplejson', simplejson.loads)]
+for name in ('ujson', 'orjson'):
+    try:
+        DECODERS.append((name, __import__(name).loads))
+    except ImportError:
+        pass
+
+
+def record(path, years):
+    server = StubServer().start()
+    url, yql.PUBLIC_API_URL = yql.PUBLIC_API_URL, server.url
+    try:
+        transport = RecordingTransport(path, yql.ConnectionPool())
+        Share('YHOO', transport=transport).get_historical(
+            '%d-01-01' % (2014 - years), '2013-12-31', max_workers=1)
+        Share.bulk(['S%05d' % i for i in range(100)], transport=transport)
+    finally:
+        yql.PUBLIC_API_URL = url
+        server.stop()
+
+
+def timed(fn, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        fn()
+    return (time.time() - start) / repeat
+
+
+def two_passes(base, response):
+    # `Base._parse` before errors and N/A values were handled in one pass
+    _, results = response['query']['results'].popitem()
+    items = results if isinstance(results, list) else [results]
+    for item in items:
+        if base._is_error_in_results(item):
+            raise ValueError(base._is_error_in_results(item))
+        base._change_incorrect_none(item)
+    return results
+
+
+def one_pass(base, response):
+    _, results = response['query']['results'].popitem()
+    items = results if isinstance(results, list) else [results]
+    for item in items:
+        if base._clean(item):
+            raise ValueError(item)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=int, default=1, help='years in the historical response')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'responses.jsonl')
+    record(path, args.years)
+    replay = ReplayTransport(path)
+    bodies = dict((query, responses[0][1]) for query, responses in replay._responses.items())
+    history = max((b for q, b in bodies.items() if 'historicaldata' in q), key=len)
+    quotes = next(b for q, b in bodies.items() if 'yahoo.finance.quotes' in q and ' in (' in q)
+    rows = len(json.loads(history)['query']['results']['quote'])
+    print('historical response: %d rows, %.1f KiB; quotes response: 100 x %d fields, %.1f KiB' % (
+        rows, len(history) / 1024.0, len(QUOTE_FIELDS), len(quotes) / 1024.0))
+
+    print('%-12s %12s %12s' % ('decoder', 'historical', 'quotes'))
+    baseline = None
+    for name, loads in DECODERS:
+        times = timed(lambda: loads(history), args.repeat), timed(lambda: loads(quotes), args.repeat)
+        baseline = baseline or times
+        print('%-12s %10.2fms %10.2fms  (%.1fx, %.1fx of json)' % (
+            name, 1000 * times[0], 1000 * times[1], baseline[0] / times[0], baseline[1] / times[1]))
+    print('yql uses %s.loads' % yql.loads.__module__)
+
+    base = Base(None)
+    for label, parse in (('two passes', two_passes), ('one pass', one_pass)):
+        elapsed = timed(lambda: parse(base, yql.loads(quotes)), args.repeat)
+        print('decode and clean 100 quotes, %-10s %8.2fms' % (label, 1000 * elapsed))
+    elapsed = timed(lambda: Base._parse(base, yql.YQLQuery(replay).execute(
+        'select * from yahoo.finance.historicaldata where symbol = "YHOO" '
+        'and startDate="2013-01-01" and endDate="2013-12-31"')), args.repeat)
+    print('execute and parse the historical response %8.2fms' % (1000 * elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Overhead of metrics on Share.refresh, disabled and enabled, with an in-memory transport
+
+    $ python bench/bench_metrics.py --refreshes 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import response  # noqa: E402
+from yahoo_finance import Base, Share  # noqa: E402
+from yahoo_finance.metrics import Metrics  # noqa: E402
+
+
+class MemoryTransport(object):
+    """Answers every request with the same body"""
+
+    def __init__(self, body):
+        self.body = body
+
+    def request(self, url):
+        return self.body
+
+
+def run(share, refreshes):
+    start = time.time()
+    for _ in range(refreshes):
+        share.refresh()
+    return (time.time() - start) / refreshes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--refreshes', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    body = json.dumps(response('select * from yahoo.finance.quotes where symbol = "YHOO"'))
+    share = Share('YHOO', transport=MemoryTransport(body.encode('utf-8')))
+    Base.cache = Base.flight = None
+    for label, metrics in (('disabled', None), ('enabled', Metrics())):
+        Base.metrics = metrics
+        best = min(run(share, args.refreshes) for _ in range(args.repeat))
+        print('%-10s %8.2f us/refresh' % (label, best * 1e6))
+    quotes = Base.metrics.stats()['quotes']
+    for stage in ('build', 'transfer', 'decode', 'validate', 'process', 'request'):
+        print('%-10s p50 %8.2f us  p99 %8.2f us' % (
+            stage, quotes[stage]['p50'] * 1e6, quotes[stage]['p99'] * 1e6))
+
+
+if __name__ == '__main__':
+    main()
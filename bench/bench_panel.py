@@ -0,0 +1,66 @@
+"""
+Historical prices of many symbols: one Share per symbol aligned by hand vs. get_historical_panel
+
+Runs against a local stub server, with simulated network latency per request:
+
+    $ python bench/bench_panel.py --symbols 100 --days 30 --latency 0.02
+"""
+import argparse
+from datetime import date, timedelta
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import StubServer  # noqa: E402
+from yahoo_finance import Base, Share, yql  # noqa: E402
+from yahoo_finance.frame import numpy  # noqa: E402
+from yahoo_finance.panel import get_historical_panel  # noqa: E402
+
+
+def per_share(symbols, start, end):
+    """What a cross-sectional dataset took before: a Share per symbol, then aligning dates"""
+    frames = [Share(s).get_historical(start, end, as_arrays=True) for s in symbols]
+    dates = numpy.unique(numpy.concatenate([f.date for f in frames]))
+    close = numpy.full((len(dates), len(symbols)), numpy.nan)
+    for i, frame in enumerate(frames):
+        close[numpy.searchsorted(dates, frame.date), i] = frame.close
+    return close
+
+
+def timed(label, fn):
+    start = time.time()
+    result = fn()
+    elapsed = time.time() - start
+    print('%-24s %8.3fs' % (label, elapsed))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    symbols = ['S%05d' % i for i in range(args.symbols)]
+    end = date(2014, 5, 30)
+    start = (end - timedelta(days=args.days - 1)).isoformat()
+    end = end.isoformat()
+
+    server = StubServer(latency=args.latency).start()
+    yql.PUBLIC_API_URL = server.url
+    Base.cache = Base.flight = None
+    try:
+        print('%d symbols, %d days, %.0f ms latency' % (args.symbols, args.days, 1000 * args.latency))
+        expected = timed('Share per symbol', lambda: per_share(symbols, start, end))
+        panel = timed('get_historical_panel',
+                      lambda: get_historical_panel(symbols, start, end))
+        assert numpy.array_equal(panel['close'], expected, equal_nan=True)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Latency per request with and without connection reuse
+
+    $ python bench/bench_pool.py --requests 500 --https
+
+`urlopen` is the pre-pool code path, `no reuse` is `ConnectionPool(maxsize=0)`
+which opens a new connection for every request.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import StubServer, self_signed_contexts  # noqa: E402
+from yahoo_finance import yql  # noqa: E402
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+
+class UrlopenTransport(object):
+
+    def __init__(self, ssl_context=None):
+        self.ssl_context = ssl_context
+
+    def request(self, url):
+        return urlopen(url, context=self.ssl_context).read()
+
+
+def run(label, transport, requests):
+    query = yql.YQLQuery(transport)
+    query.execute('select * from yahoo.finance.quotes where symbol = "YHOO"')  # warm up
+    timings = []
+    for _ in range(requests):
+        start = time.time()
+        query.execute('select * from yahoo.finance.quotes where symbol = "YHOO"')
+        timings.append(time.time() - start)
+    timings.sort()
+    print('%-10s mean %7.3fms  p50 %7.3fms  p99 %7.3fms' % (
+        label, 1000 * sum(timings) / len(timings), 1000 * timings[len(timings) // 2],
+        1000 * timings[int(len(timings) * 0.99)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--https', action='store_true', help='serve the stub over TLS')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    server_context = client_context = None
+    if args.https:
+        server_context, client_context = self_signed_contexts(directory)
+    server = StubServer(ssl_context=server_context).start()
+    yql.PUBLIC_API_URL = server.url
+    print('%s, %d requests' % (server.url, args.requests))
+    try:
+        run('urlopen', UrlopenTransport(client_context), args.requests)
+        run('no reuse', yql.ConnectionPool(maxsize=0, ssl_context=client_context), args.requests)
+        run('pool', yql.ConnectionPool(ssl_context=client_context), args.requests)
+    finally:
+        server.stop()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Bytes and parse time of full vs. projected quotes, replayed from recorded responses
+
+Responses for `select *` and `select LastTradePriceOnly, Volume` are recorded
+once from the local stub server, then replayed:
+
+    $ python bench/bench_projection.py --symbols 100 --polls 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import StubServer  # noqa: E402
+from yahoo_finance import Base, Share, yql  # noqa: E402
+from yahoo_finance.transport import RecordingTransport, ReplayTransport  # noqa: E402
+
+FIELDS = ['LastTradePriceOnly', 'Volume']
+
+
+def record(path, symbols):
+    server = StubServer().start()
+    url, yql.PUBLIC_API_URL = yql.PUBLIC_API_URL, server.url
+    try:
+        transport = RecordingTransport(path, yql.ConnectionPool())
+        Share.bulk(symbols, transport=transport)
+        Share.bulk(symbols, transport=transport, fields=FIELDS)
+    finally:
+        yql.PUBLIC_API_URL = url
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--polls', type=int, default=200)
+    args = parser.parse_args()
+
+    symbols = ['S%05d' % i for i in range(args.symbols)]
+    path = os.path.join(tempfile.mkdtemp(), 'projection.jsonl')
+    record(path, symbols)
+    replay = ReplayTransport(path)
+    Base.cache = Base.flight = None
+    print('%d symbols, %d polls' % (args.symbols, args.polls))
+    for label, fields in (('select *', None), ('projected', FIELDS)):
+        batch = Share.bulk(symbols, transport=replay, fields=fields)
+        query = batch._prepare_query(symbols=symbols, columns=batch._columns())
+        body = replay._responses[query][0][1]
+        start = time.time()
+        for _ in range(args.polls):
+            batch.refresh()
+        elapsed = (time.time() - start) / args.polls
+        print('%-10s %8d bytes %8d gzipped %8.2f ms/poll' % (
+            label, len(body), len(zlib.compress(body, 6)), elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
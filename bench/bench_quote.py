@@ -0,0 +1,72 @@
+"""
+Memory and time of 10k quotes as `Quote` records against plain dicts
+
+    $ python bench/bench_quote.py --quotes 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import quote  # noqa: E402
+from yahoo_finance import Base, Quote  # noqa: E402
+
+
+def decoded(count):
+    # decode from JSON so every quote owns its strings, as after a real response
+    return json.loads(json.dumps([quote('S%05d' % i) for i in range(count)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quotes', type=int, default=10000)
+    args = parser.parse_args()
+
+    for data in decoded(args.quotes)[:1]:
+        print('%d fields per quote' % len(data))
+
+    tracemalloc.start()
+    dicts = decoded(args.quotes)
+    for data in dicts:
+        Base._change_incorrect_none(data)
+    dict_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    quotes = []
+    for data in decoded(args.quotes):
+        Base._change_incorrect_none(data)
+        quotes.append(Quote(data))
+    quote_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.time()
+    for data in dicts:
+        Quote(data)
+    build = time.time() - start
+
+    print('%-8s %10.1f KiB' % ('dict', dict_size / 1024.0))
+    print('%-8s %10.1f KiB  (%.1fx smaller), %.1fms to build' % (
+        'Quote', quote_size / 1024.0, dict_size / float(quote_size), 1000 * build))
+
+    fields = ('LastTradePriceOnly', 'Open', 'PreviousClose', 'Volume', 'DaysHigh', 'DaysLow')
+    start = time.time()
+    for _ in range(10):
+        for data in dicts:
+            [float(data[f]) for f in fields]
+    parse = time.time() - start
+    start = time.time()
+    for _ in range(10):
+        for q in quotes:
+            [q.numeric(f) for f in fields]
+    parsed = time.time() - start
+    print('10 passes reading %d numbers per quote: float(dict[...]) %.1fms, Quote.numeric %.1fms' % (
+        len(fields), 1000 * parse, 1000 * parsed))
+
+
+if __name__ == '__main__':
+    main()
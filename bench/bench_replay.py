@@ -0,0 +1,91 @@
+"""
+End-to-end throughput replayed from recorded responses, without the network
+
+Responses are recorded once from the local stub server, later runs replay
+the same file so results can be compared between commits:
+
+    $ python bench/bench_replay.py --cassette /tmp/replay.jsonl --symbols 500 --years 20
+    $ python bench/bench_replay.py --cassette /tmp/replay.jsonl --latency 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import StubServer  # noqa: E402
+from yahoo_finance import Base, Share, get_date_range, yql  # noqa: E402
+from yahoo_finance.transport import RecordingTransport, ReplayTransport  # noqa: E402
+
+END = 2014
+
+
+def workload(symbols, years, transport):
+    """Queries of the benchmark, the same when recording and replaying"""
+    shares = [Share(s, transport=transport) for s in symbols]
+    Share.bulk(symbols, transport=transport)
+    history = shares[0].get_historical('%d-01-01' % (END - years), '%d-12-31' % (END - 1))
+    return shares, history
+
+
+def record(path, symbols, years):
+    server = StubServer().start()
+    url, yql.PUBLIC_API_URL = yql.PUBLIC_API_URL, server.url
+    try:
+        workload(symbols, years, RecordingTransport(path, yql.ConnectionPool()))
+    finally:
+        yql.PUBLIC_API_URL = url
+        server.stop()
+
+
+def timed(label, count, unit, fn):
+    start = time.time()
+    result = fn()
+    elapsed = time.time() - start
+    print('%-22s %7d %-8s %8.3fs  %10.1f %s/s' % (label, count, unit, elapsed, count / elapsed, unit))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cassette', default='replay.jsonl', help='recorded responses')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated seconds per replayed request')
+    parser.add_argument('--rerecord', action='store_true')
+    args = parser.parse_args()
+
+    symbols = ['S%05d' % i for i in range(args.symbols)]
+    if args.rerecord and os.path.exists(args.cassette):
+        os.remove(args.cassette)
+    if not os.path.exists(args.cassette):
+        print('recording %s' % args.cassette)
+        record(args.cassette, symbols, args.years)
+
+    replay = ReplayTransport(args.cassette, latency=args.latency)
+    # every request must reach the replay transport
+    Base.cache = Base.flight = None
+    print('%d recorded queries, %.1f ms simulated latency' % (len(replay), 1000 * args.latency))
+
+    timed('Share(symbol)', len(symbols), 'shares',
+          lambda: [Share(s, transport=replay) for s in symbols])
+    timed('Share.bulk', len(symbols), 'shares',
+          lambda: Share.bulk(symbols, transport=replay))
+    share = Share(symbols[0], transport=replay)
+    start, end = '%d-01-01' % (END - args.years), '%d-12-31' % (END - 1)
+    rows = len(share.get_historical(start, end))
+    timed('get_historical', rows, 'rows', lambda: share.get_historical(start, end))
+    timed('get_historical serial', rows, 'rows',
+          lambda: share.get_historical(start, end, max_workers=1))
+
+    # decoding and parsing alone, from the recorded bodies of the historical windows
+    query = yql.YQLQuery(ReplayTransport(args.cassette))
+    windows = [share._historical_query(s, e) for s, e in get_date_range(start, end)]
+    timed('decode and parse', rows * 10, 'rows',
+          lambda: [share._parse(query.execute(q)) for _ in range(10) for q in windows])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Scaling of fetch_universe from 1 to N worker processes against a local stub server
+
+The stub server runs in a process of its own so it does not share the GIL
+with the client:
+
+    $ python bench/bench_universe.py --symbols 10000 --max-workers 8 --latency 0.01
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import StubServer  # noqa: E402
+from yahoo_finance import Base, yql  # noqa: E402
+from yahoo_finance.universe import fetch_universe  # noqa: E402
+
+
+def serve(latency, urls, stop):
+    server = StubServer(latency=latency).start()
+    urls.put(server.url)
+    stop.wait()
+    server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=10000)
+    parser.add_argument('--max-workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.latency, urls, stop))
+    server.start()
+    yql.PUBLIC_API_URL = urls.get()
+    Base.cache = None
+    symbols = ['S%05d' % i for i in range(args.symbols)]
+    print('%d symbols, %d CPUs, %.0f ms latency' % (
+        args.symbols, multiprocessing.cpu_count(), 1000 * args.latency))
+    try:
+        baseline = None
+        for mode, workers in [('thread', args.max_workers)] + [
+                ('process', n) for n in range(1, args.max_workers + 1)]:
+            start = time.time()
+            shares, errors = fetch_universe(symbols, workers=workers, mode=mode,
+                                            shard_size=args.shard_size)
+            elapsed = time.time() - start
+            assert len(shares) == args.symbols and not errors
+            if mode == 'process' and baseline is None:
+                baseline = elapsed
+            print('%-8s %2d workers %8.3fs %10.1f quotes/s %s' % (
+                mode, workers, elapsed, args.symbols / elapsed,
+                '%5.2fx' % (baseline / elapsed) if mode == 'process' else ''))
+    finally:
+        stop.set()
+        server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Local YQL stub server used by the benchmarks
+
+Serves synthetic but well-formed `yahoo.finance.*` responses, so benchmarks
+measure the client rather than the public endpoint:
+
+    server = StubServer(latency=0.002).start()
+    yahoo_finance.yql.PUBLIC_API_URL = server.url
+"""
+from datetime import datetime, timedelta
+import json
+import re
+import threading
+import time
+import zlib
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+
+QUOTE_FIELDS = (
+    'symbol', 'Ask', 'AverageDailyVolume', 'Bid', 'AskRealtime', 'BidRealtime', 'BookValue',
+    'Change_PercentChange', 'Change', 'Commission', 'Currency', 'ChangeRealtime',
+    'AfterHoursChangeRealtime', 'DividendShare', 'LastTradeDate', 'TradeDate', 'EarningsShare',
+    'ErrorIndicationreturnedforsymbolchangedinvalid', 'EPSEstimateCurrentYear',
+    'EPSEstimateNextYear', 'EPSEstimateNextQuarter', 'DaysLow', 'DaysHigh', 'YearLow', 'YearHigh',
+    'HoldingsGainPercent', 'AnnualizedGain', 'HoldingsGain', 'HoldingsGainPercentRealtime',
+    'HoldingsGainRealtime', 'MoreInfo', 'OrderBookRealtime', 'MarketCapitalization',
+    'MarketCapRealtime', 'EBITDA', 'ChangeFromYearLow', 'PercentChangeFromYearLow',
+    'LastTradeRealtimeWithTime', 'ChangePercentRealtime', 'ChangeFromYearHigh',
+    'PercebtChangeFromYearHigh', 'LastTradeWithTime', 'LastTradePriceOnly', 'HighLimit',
+    'LowLimit', 'DaysRange', 'DaysRangeRealtime', 'FiftydayMovingAverage',
+    'TwoHundreddayMovingAverage', 'ChangeFromTwoHundreddayMovingAverage',
+    'PercentChangeFromTwoHundreddayMovingAverage', 'ChangeFromFiftydayMovingAverage',
+    'PercentChangeFromFiftydayMovingAverage', 'Name', 'Notes', 'Open', 'PreviousClose',
+    'PricePaid', 'ChangeinPercent', 'PriceSales', 'PriceBook', 'ExDividendDate', 'PERatio',
+    'DividendPayDate', 'PERatioRealtime', 'PEGRatio', 'PriceEPSEstimateCurrentYear',
+    'PriceEPSEstimateNextYear', 'Symbol', 'SharesOwned', 'ShortRatio', 'LastTradeTime',
+    'TickerTrend', 'OneyrTargetPrice', 'Volume', 'HoldingsValue', 'HoldingsValueRealtime',
+    'YearRange', 'DaysValueChange', 'DaysValueChangeRealtime', 'StockExchange', 'DividendYield',
+    'PercentChange',
+)
+
+_SELECT_RE = re.compile(r'select (.+?) from yahoo\.finance\.(\w+) where (\w+)', re.I)
+_SYMBOLS_RE = re.compile(r'"([^"]*)"')
+_DATE_RE = re.compile(r'(startDate|endDate)\s*=\s*"([\d-]+)"')
+
+
+def _price(symbol):
+    return 10 + sum(ord(c) for c in symbol) % 500 + 0.25
+
+
+def quote(symbol):
+    """Synthetic `yahoo.finance.quotes` entry, unknown for symbols starting with `BAD`"""
+    data = dict.fromkeys(QUOTE_FIELDS)
+    data['symbol'] = data['Symbol'] = symbol
+    if symbol.startswith('BAD'):
+        data['ErrorIndicationreturnedforsymbolchangedinvalid'] = \
+            'No such ticker symbol. <a href="/l">Try Symbol Lookup</a> (Error Code: E1)'
+        return data
+    price = _price(symbol)
+    for field in QUOTE_FIELDS[1:]:
+        if data[field] is None and not field.startswith('Error'):
+            data[field] = 'N/A'
+    data.update({
+        'Name': '%s Inc.' % symbol, 'Currency': 'USD', 'StockExchange': 'NMS',
+        'LastTradePriceOnly': '%.2f' % price, 'Open': '%.2f' % (price - 0.5),
+        'PreviousClose': '%.2f' % (price - 0.3), 'Change': '+0.30', 'PercentChange': '+0.85%',
+        'Change_PercentChange': '+0.30 - +0.85%', 'ChangeinPercent': '+0.85%',
+        'DaysLow': '%.2f' % (price - 1), 'DaysHigh': '%.2f' % (price + 1),
+        'DaysRange': '%.2f - %.2f' % (price - 1, price + 1),
+        'YearLow': '%.2f' % (price * 0.7), 'YearHigh': '%.2f' % (price * 1.2),
+        'Volume': str(int(price * 10000)), 'AverageDailyVolume': str(int(price * 12000)),
+        'MarketCapitalization': '%.2fB' % (price / 3), 'BookValue': '12.49',
+        'EBITDA': '1.20B', 'EarningsShare': '1.32', 'PERatio': '25.12', 'PEGRatio': '1.80',
+        'FiftydayMovingAverage': '%.2f' % (price * 0.98),
+        'TwoHundreddayMovingAverage': '%.2f' % (price * 0.95),
+        'LastTradeDate': '5/26/2014', 'LastTradeTime': '4:00pm',
+        'LastTradeWithTime': '4:00pm - <b>%.2f</b>' % price,
+    })
+    return data
+
+
+def rate(pair):
+    """Synthetic `yahoo.finance.xchange` entry"""
+    value = 0.5 + sum(ord(c) for c in pair) % 300 / 100.0
+    return {'id': pair, 'Name': '%s/%s' % (pair[:3], pair[3:]), 'Rate': '%.4f' % value,
+            'Date': '5/26/2014', 'Time': '4:00pm',
+            'Ask': '%.4f' % (value * 1.0005), 'Bid': '%.4f' % (value * 0.9995)}
+
+
+def history(symbol, start, end):
+    """Synthetic `yahoo.finance.historicaldata` rows for week days, newest first"""
+    start = datetime.strptime(start, '%Y-%m-%d')
+    day = datetime.strptime(end, '%Y-%m-%d')
+    base = _price(symbol)
+    rows = []
+    while day >= start:
+        if day.weekday() < 5:
+            close = base + day.toordinal() % 97 / 10.0
+            rows.append({
+                'Symbol': symbol, 'Date': day.strftime('%Y-%m-%d'),
+                'Open': '%.6f' % (close - 0.2), 'High': '%.6f' % (close + 0.5),
+                'Low': '%.6f' % (close - 0.6), 'Close': '%.6f' % close,
+                'Volume': str(1000000 + day.toordinal() % 5000), 'Adj_Close': '%.6f' % close,
+            })
+        day -= timedelta(days=1)
+    return rows
+
+
+def response(query):
+    """Build a YQL JSON response (as a dict) for `query`"""
+    match = _SELECT_RE.search(query)
+    if match is None:
+        return {'error': {'lang': 'en-US', 'description': 'Query syntax error(s)'}}
+    columns, table, key = match.groups()
+    where = query[match.end():]
+    dates = dict(_DATE_RE.findall(where))
+    symbols = [s for s in _SYMBOLS_RE.findall(where) if s not in dates.values()]
+    if table == 'xchange':
+        name, items = 'rate', [rate(s) for s in symbols]
+    elif table == 'historicaldata':
+        name, items = 'quote', []
+        for s in symbols:
+            items.extend(history(s, dates['startDate'], dates['endDate']))
+    else:
+        name, items = 'quote', [quote(s) for s in symbols]
+    if columns.strip() != '*':
+        fields = [c.strip() for c in columns.split(',')]
+        items = [dict((f, item.get(f)) for f in fields) for item in items]
+    results = None
+    if items:
+        results = {name: items[0] if len(items) == 1 else items}
+    return {'query': {'count': len(items), 'created': '2014-05-26T20:00:00Z',
+                      'lang': 'en-US', 'results': results}}
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, avoid Nagle delays on keep-alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server.stub
+        if server.latency:
+            time.sleep(server.latency)
+        params = parse_qs(urlparse(self.path).query)
+        body = json.dumps(response(params.get('q', [''])[0])).encode('utf-8')
+        with server.lock:
+            server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(object):
+    """
+    Threaded YQL stub listening on localhost
+
+    :param latency: seconds slept before every response, simulates network round-trip
+    :param ssl_context: server side `ssl.SSLContext`, serves https when given
+    """
+
+    def __init__(self, latency=0.0, ssl_context=None):
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._httpd = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.stub = self
+        self._scheme = 'http'
+        if ssl_context is not None:
+            self._httpd.socket = ssl_context.wrap_socket(self._httpd.socket, server_side=True)
+            self._scheme = 'https'
+
+    @property
+    def url(self):
+        return '%s://127.0.0.1:%d/v1/public/yql' % (self._scheme, self._httpd.server_address[1])
+
+    def start(self):
+        thread = threading.Thread(target=self._httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def self_signed_contexts(directory):
+    """
+    Create a self-signed certificate for 127.0.0.1 with the `openssl` command
+
+    :param directory: where the key and certificate are written
+    :return: tuple (server ssl context, client ssl context trusting the certificate)
+    """
+    import os
+    import ssl
+    import subprocess
+    key, cert = os.path.join(directory, 'key.pem'), os.path.join(directory, 'cert.pem')
+    subprocess.check_call(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', key, '-out', cert, '-subj', '/CN=127.0.0.1',
+         '-addext', 'subjectAltName=IP:127.0.0.1'],
+        stdout=open(os.devnull, 'w'), stderr=subprocess.STDOUT)
+    server = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server.load_cert_chain(cert, key)
+    client = ssl.create_default_context(cafile=cert)
+    return server, client
@@ -86,6 +86,16 @@ setup(
     # project is installed.
     install_requires=['pytz', 'simplejson'],
 
+    # List additional groups of dependencies here (e.g. development
+    # dependencies). You can install these using the following syntax,
+    # for example:
+    # $ pip install -e .[numpy]
+    extras_require={
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+        'parquet': ['pyarrow'],
+    },
+
     # If there are data files included in your packages that need to be
     # installed, specify them here. If using Python 2.6 or less, then these
     # have to be included in MANIFEST.in as well.
@@ -104,7 +114,7 @@ setup(
     # pip to create the appropriate form of executable for the target platform.
     entry_points={
         'console_scripts': [
-            'yahoo-finance=yahoo_finance:main',
+            'yahoo-finance=yahoo_finance.cli:main',
         ],
     },
 )
@@ -0,0 +1,98 @@
+"""
+Offline stand-ins for the YQL endpoint
+
+`StubTransport` replaces `yql.YQLQuery.transport`; it hands the decoded YQL
+query to a handler and returns its response encoded as JSON.
+"""
+from datetime import datetime, timedelta
+import json
+import re
+import threading
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from urlparse import parse_qs, urlsplit
+
+_SYMBOLS_RE = re.compile(r'(?:symbol|pair) (?:= |in \()([^)]+?)\)?(?: and|$)')
+_DATE_RE = re.compile(r'(startDate|endDate)="([\d-]+)"')
+
+
+def symbols(query):
+    """Symbols named in the `where` clause of `query`"""
+    match = _SYMBOLS_RE.search(query)
+    return [s.strip().strip('"') for s in match.group(1).split(',')] if match else []
+
+
+def dates(query):
+    """`startDate` and `endDate` of a historicaldata query"""
+    found = dict(_DATE_RE.findall(query))
+    return found.get('startDate'), found.get('endDate')
+
+
+def results(name, items):
+    """Wrap result items in a YQL response envelope"""
+    if not items:
+        return {'query': {'count': 0, 'results': None}}
+    return {'query': {'count': len(items),
+                      'results': {name: items[0] if len(items) == 1 else items}}}
+
+
+def quote(symbol):
+    if symbol.startswith('BAD'):
+        return {'symbol': symbol, 'LastTradePriceOnly': None,
+                'ErrorIndicationreturnedforsymbolchangedinvalid': 'No such ticker symbol.'}
+    return {'symbol': symbol, 'LastTradePriceOnly': '1.00', 'Open': 'N/A', 'Volume': '100',
+            'ErrorIndicationreturnedforsymbolchangedinvalid': None,
+            'LastTradeDate': '5/26/2014', 'LastTradeTime': '4:00pm'}
+
+
+def rate(pair):
+    return {'id': pair, 'Name': '%s/%s' % (pair[:3], pair[3:]), 'Rate': '2.0000',
+            'Ask': '2.0010', 'Bid': '1.9990', 'Date': '5/26/2014', 'Time': '4:00pm'}
+
+
+def history(symbol, start, end):
+    """One row per calendar day between `start` and `end`, newest first"""
+    day = datetime.strptime(end, '%Y-%m-%d')
+    start = datetime.strptime(start, '%Y-%m-%d')
+    rows = []
+    while day >= start:
+        close = '%.2f' % (day.toordinal() % 100)
+        rows.append({'Symbol': symbol, 'Date': day.strftime('%Y-%m-%d'), 'Open': close,
+                     'High': close, 'Low': close, 'Close': close, 'Volume': '1000',
+                     'Adj_Close': close})
+        day -= timedelta(days=1)
+    return rows
+
+
+def respond(query):
+    """Default handler answering quotes, xchange and historicaldata queries"""
+    if 'yahoo.finance.xchange' in query:
+        return results('rate', [rate(p) for p in symbols(query)])
+    if 'yahoo.finance.historicaldata' in query:
+        start, end = dates(query)
+        rows = []
+        for symbol in symbols(query):
+            rows.extend(history(symbol, start, end))
+        return results('quote', rows)
+    return results('quote', [quote(s) for s in symbols(query)])
+
+
+class StubTransport(object):
+    """
+    Transport answering from `handler(query)` instead of the network
+
+    :param handler: callable returning a response dict, or raising an exception
+    """
+
+    def __init__(self, handler=respond):
+        self.handler = handler
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def request(self, url):
+        query = parse_qs(urlsplit(url).query)['q'][0]
+        with self._lock:
+            self.queries.append(query)
+        return json.dumps(self.handler(query)).encode('utf-8')
@@ -0,0 +1,131 @@
+import sys
+import threading
+import time
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, SkipTest, TestCase
+else:
+    from unittest import main as test_main, SkipTest, TestCase
+
+from stubs import StubTransport, respond
+from yahoo_finance import Base, YQLQueryError, yql
+from yahoo_finance.cache import ResponseCache
+from yahoo_finance.metrics import Metrics
+
+try:
+    import asyncio
+    from yahoo_finance.aio import AsyncCurrency, AsyncShare, AsyncYQLQuery, RequestLimiter
+except (ImportError, SyntaxError):
+    asyncio = None
+
+
+class TestAsync(TestCase):
+
+    def setUp(self):
+        if asyncio is None:
+            raise SkipTest('asyncio client requires Python 3.5+')
+        self._transport = AsyncYQLQuery.transport
+        self.transport = AsyncYQLQuery.transport = StubTransport()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        AsyncYQLQuery.transport = self._transport
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def run_loop(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_create_and_refresh(self):
+        share = self.run_loop(AsyncShare.create('YHOO'))
+        self.assertEqual(share.get_price(), '1.00')
+        self.assertEqual(share.get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+        self.run_loop(share.refresh())
+        self.assertEqual(len(self.transport.queries), 2)
+
+    def test_currency(self):
+        currency = self.run_loop(AsyncCurrency.create('EURPLN'))
+        self.assertEqual(currency.get_rate(), '2.0000')
+
+    def test_error_is_reused(self):
+        with self.assertRaises(YQLQueryError):
+            self.run_loop(AsyncShare.create('BADX'))
+
+    def test_get_historical_order(self):
+        share = AsyncShare('YHOO')
+        history = self.run_loop(share.get_historical('2012-04-25', '2014-04-29'))
+        self.assertEqual(len(self.transport.queries), 3)
+        self.assertEqual(history[0]['Date'], '2014-04-29')
+        self.assertEqual(history[-1]['Date'], '2012-04-25')
+        dates = [row['Date'] for row in history]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_iter_historical(self):
+        share = AsyncShare('YHOO')
+
+        async def collect(**kwargs):
+            return [item async for item in share.iter_historical('2012-04-25', '2014-04-29',
+                                                                  **kwargs)]
+
+        history = self.run_loop(share.get_historical('2012-04-25', '2014-04-29'))
+        for prefetch in (0, 2):
+            self.assertEqual(self.run_loop(collect(prefetch=prefetch)), history)
+        blocks = self.run_loop(collect(blocks=True))
+        self.assertEqual([len(b) for b in blocks], [366, 366, 3])
+
+    def test_extend_historical(self):
+        share = AsyncShare('YHOO')
+        rows = self.run_loop(share.extend_historical('2014-01-01', '2014-04-25'))
+        self.assertEqual(share.history, rows)
+        added = self.run_loop(share.extend_historical(end_date='2014-04-29'))
+        self.assertEqual([r['Date'] for r in added], ['2014-04-26', '2014-04-27', '2014-04-28',
+                                                      '2014-04-29'])
+        self.assertEqual(share.history[-1]['Date'], '2014-04-29')
+        self.assertIsNone(share.history_revised)
+
+    def test_limiter_bounds_concurrency(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def handler(query):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return respond(query)
+
+        AsyncYQLQuery.transport = StubTransport(handler)
+        limiter = RequestLimiter(3)
+        query = AsyncYQLQuery(limiter=limiter)
+        self.run_loop(asyncio.gather(*[
+            query.execute('select * from yahoo.finance.quotes where symbol = "S%d"' % i)
+            for i in range(20)]))
+        self.assertEqual(state['peak'], 3)
+
+    def test_request_path_reused(self):
+        # cache, single-flight and metrics of `Base._request`
+        Base.metrics = metrics = Metrics()
+        try:
+            cache = ResponseCache()
+            shares = self.run_loop(asyncio.gather(*[
+                AsyncShare.create('YHOO', cache=cache) for _ in range(5)]))
+        finally:
+            Base.metrics = None
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertTrue(all(s.get_price() == '1.00' for s in shares))
+        quotes = metrics.stats()['quotes']
+        self.assertEqual(quotes['cache_misses'] + quotes['cache_hits'], 5)
+        self.assertEqual(quotes['requests'], 5)
+
+    def test_transport(self):
+        self.assertIs(AsyncShare('YHOO').transport, self.transport)
+        other = StubTransport()
+        self.assertIs(AsyncShare('YHOO', transport=other).transport, other)
+        self.assertGreaterEqual(self._transport.maxsize_per_host, AsyncYQLQuery.limiter.limit)
+
+
+if __name__ == "__main__":
+    test_main()
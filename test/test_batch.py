@@ -0,0 +1,48 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Share, ShareBatch, YQLQueryError, yql
+
+
+class TestShareBatch(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport()
+        self.queries = self.transport.queries
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def test_chunks(self):
+        batch = Share.bulk(['A', 'B', 'C', 'D', 'E'], chunk_size=2)
+        self.assertEqual(len(self.queries), 3)
+        self.assertEqual(self.queries[0],
+                         'select * from yahoo.finance.quotes where symbol in ("A", "B")')
+        self.assertEqual([s.symbol for s in batch], ['A', 'B', 'C', 'D', 'E'])
+        self.assertEqual(batch['E'].get_price(), '1.00')
+        self.assertIsNone(batch['E'].get_open())
+        self.assertEqual(batch['E'].get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+
+    def test_errors_per_symbol(self):
+        batch = ShareBatch(['A', 'BADX', 'B', 'BADY'], chunk_size=3)
+        self.assertEqual(sorted(batch.shares), ['A', 'B'])
+        self.assertEqual(sorted(batch.errors), ['BADX', 'BADY'])
+        self.assertIsInstance(batch.errors['BADY'], YQLQueryError)
+        self.assertNotIn('BADX', batch)
+
+    def test_refresh_updates_shares_in_place(self):
+        batch = ShareBatch(['A', 'B'])
+        share = batch['A']
+        batch.refresh()
+        self.assertIs(batch['A'], share)
+        self.assertEqual(len(self.queries), 2)
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,115 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Base, Currency, Share, yql
+from yahoo_finance.cache import ResponseCache, normalize_query
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_normalize_query(self):
+        self.assertEqual(
+            normalize_query('select *  from t where symbol = "A" and endDate="2" and startDate="1"'),
+            normalize_query('select * from t where symbol = "A" and startDate="1" and endDate="2"'))
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl={'quotes': 10}, clock=self.clock)
+        query = 'select * from yahoo.finance.quotes where symbol = "A"'
+        cache.set(query, {'Ask': '1'})
+        self.clock.now += 9
+        self.assertEqual(cache.get(query), {'Ask': '1'})
+        self.clock.now += 2
+        self.assertIsNone(cache.get(query))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_closed_historical_range_never_expires(self):
+        cache = ResponseCache(clock=self.clock)
+        closed = ('select * from yahoo.finance.historicaldata where symbol = "A" '
+                  'and startDate="2014-01-01" and endDate="2014-12-31"')
+        open_ = closed.replace('2014-12-31', '9999-12-31')
+        cache.set(closed, [{'Date': '2014-12-31'}])
+        cache.set(open_, [{'Date': '2014-12-31'}])
+        self.clock.now += 10 ** 9
+        self.assertEqual(cache.get(closed), [{'Date': '2014-12-31'}])
+        self.assertIsNone(cache.get(open_))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2, clock=self.clock)
+        cache.set('select * from yahoo.finance.quotes where symbol = "A"', {'A': '1'})
+        cache.set('select * from yahoo.finance.quotes where symbol = "B"', {'B': '1'})
+        cache.get('select * from yahoo.finance.quotes where symbol = "A"')
+        cache.set('select * from yahoo.finance.quotes where symbol = "C"', {'C': '1'})
+        self.assertIsNone(cache.get('select * from yahoo.finance.quotes where symbol = "B"'))
+        self.assertIsNotNone(cache.get('select * from yahoo.finance.quotes where symbol = "A"'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_maxbytes(self):
+        cache = ResponseCache(maxbytes=10, clock=self.clock)
+        cache.set('select * from yahoo.finance.quotes where symbol = "A"', {'Ask': '12345'})
+        cache.set('select * from yahoo.finance.quotes where symbol = "B"', {'Ask': '12345'})
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.bytes, 8)
+
+    def test_results_are_copied(self):
+        cache = ResponseCache(clock=self.clock)
+        query = 'select * from yahoo.finance.quotes where symbol = "A"'
+        results = {'Ask': '1'}
+        cache.set(query, results)
+        results['Ask'] = '2'
+        cache.get(query)['Ask'] = '3'
+        self.assertEqual(cache.get(query), {'Ask': '1'})
+
+
+class TestBaseCache(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport()
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        Base.cache = None
+
+    def test_share_cache(self):
+        cache = ResponseCache()
+        first = Share('YHOO', cache=cache)
+        second = Share('YHOO', cache=cache)
+        second.refresh()
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertEqual(first.get_trade_datetime(), second.get_trade_datetime())
+        self.assertEqual(cache.stats()['hits'], 2)
+
+    def test_default_cache_and_bypass(self):
+        Base.cache = ResponseCache()
+        Currency('EURPLN')
+        Currency('EURPLN')
+        self.assertEqual(len(self.transport.queries), 1)
+        Currency('EURPLN', cache=False)
+        self.assertEqual(len(self.transport.queries), 2)
+
+    def test_no_cache_by_default(self):
+        Share('YHOO')
+        Share('YHOO')
+        self.assertEqual(len(self.transport.queries), 2)
+
+
+if __name__ == "__main__":
+    test_main()
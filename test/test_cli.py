@@ -0,0 +1,208 @@
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, skipIf, TestCase
+else:
+    from unittest import main as test_main, skipIf, TestCase
+
+from stubs import StubTransport, dates, respond, symbols
+from yahoo_finance import Share, cli, yql
+
+SYMBOLS = ['A%03d' % i for i in range(25)]
+
+
+class TestExport(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+        self.failing = set()
+        # symbols quoted without a last trade date
+        self.untraded = set()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'out.csv')
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        shutil.rmtree(self.directory)
+
+    def handler(self, query):
+        if self.failing & set(symbols(query)):
+            return {'error': {'description': 'Temporary failure'}}
+        response = respond(query)
+        if 'yahoo.finance.quotes' in query:
+            for row in response['query']['results']['quote']:
+                if row['symbol'] in self.untraded:
+                    row['LastTradeDate'] = row['LastTradeTime'] = None
+        return response
+
+    def read_csv(self, path=None):
+        with open(path or self.path) as f:
+            return list(csv.DictReader(f))
+
+    def test_quotes_csv(self):
+        summary = cli.export('quotes', SYMBOLS + ['BAD1'], self.path, chunk_size=10, workers=2)
+        self.assertEqual((summary['symbols'], summary['rows'], summary['errors']), (25, 25, 1))
+        rows = self.read_csv()
+        self.assertEqual([r['symbol'] for r in rows], SYMBOLS)
+        self.assertEqual(rows[0]['LastTradePriceOnly'], '1.00')
+        self.assertEqual(len(self.transport.queries), 3)
+
+    def test_derived_columns(self):
+        # the first quote has no `LastTradeDateTimeUTC`, the next ones do
+        self.untraded = set(['A000'])
+        cli.export('quotes', SYMBOLS[:3], self.path)
+        rows = self.read_csv()
+        self.assertEqual(rows[0]['LastTradeDateTimeUTC'], '')
+        self.assertEqual(rows[1]['LastTradeDateTimeUTC'], '2014-05-26 20:00:00 UTC+0000')
+        cli.export('quotes', SYMBOLS[:3], self.path, fields=['LastTradeDateTimeUTC'])
+        self.assertEqual([r['LastTradeDateTimeUTC'] for r in self.read_csv()],
+                         ['', '2014-05-26 20:00:00 UTC+0000', '2014-05-26 20:00:00 UTC+0000'])
+
+    def test_unknown_column(self):
+        writer = cli.CsvWriter(self.path)
+        writer.write({'symbol': 'A'})
+        self.assertRaises(ValueError, writer.write, {'symbol': 'B', 'Volume': '100'})
+        writer.close()
+
+    def test_fields_jsonl(self):
+        path = os.path.join(self.directory, 'out.jsonl')
+        cli.export('quotes', SYMBOLS, path, format='jsonl', fields=['Volume'])
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(sorted(rows[0]), [
+            'ErrorIndicationreturnedforsymbolchangedinvalid', 'Volume', 'symbol'])
+        self.assertIn('Volume from', self.transport.queries[0])
+
+    def test_currency(self):
+        cli.export('currency', ['EURPLN', 'USDPLN'], self.path)
+        self.assertEqual([r['id'] for r in self.read_csv()], ['EURPLN', 'USDPLN'])
+
+    def test_historical(self):
+        summary = cli.export('historical', ['YHOO', 'GOOG'], self.path, start_date='2013-01-01',
+                             end_date='2014-12-31')
+        rows = self.read_csv()
+        self.assertEqual(summary['rows'], len(rows))
+        self.assertEqual(list(rows[0]), ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close',
+                                         'Volume', 'Adj_Close'])
+        self.assertEqual([rows[0]['Symbol'], rows[-1]['Symbol']], ['YHOO', 'GOOG'])
+        self.assertEqual(len(self.transport.queries), 4)
+        self.assertRaises(ValueError, cli.export, 'historical', ['YHOO'], self.path)
+
+    def test_resume_after_errors(self):
+        self.failing = set(['A012'])
+        summary = cli.export('quotes', SYMBOLS, self.path, chunk_size=5)
+        self.assertEqual((summary['symbols'], summary['errors']), (20, 5))
+        self.assertTrue(os.path.exists(self.path + '.checkpoint'))
+        self.failing = set()
+        del self.transport.queries[:]
+        summary = cli.export('quotes', SYMBOLS, self.path, chunk_size=5)
+        self.assertEqual((summary['symbols'], summary['skipped']), (5, 20))
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertEqual(sorted(r['symbol'] for r in self.read_csv()), SYMBOLS)
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    def test_resume_truncates(self):
+        # an export interrupted after the first chunk was recorded, while writing the second
+        checkpoint = cli.Checkpoint(self.path + '.checkpoint', {
+            'kind': 'quotes', 'format': 'csv', 'fields': None, 'start_date': None,
+            'end_date': None})
+        _, fetched, _ = cli._fetch_quotes(Share, SYMBOLS[:6], None, None)
+        del self.transport.queries[:]
+        writer = cli.CsvWriter(self.path)
+        for row in fetched[:5]:
+            writer.write(row)
+        checkpoint.record(SYMBOLS[:5], writer.sync())
+        writer.write(fetched[5])
+        writer.stream.write('A0')
+        writer.close()
+        checkpoint.stream.write('{"symbols": ["A0')
+        checkpoint.close()
+
+        summary = cli.export('quotes', SYMBOLS, self.path, chunk_size=5)
+        self.assertEqual((summary['symbols'], summary['skipped']), (20, 5))
+        rows = self.read_csv()
+        self.assertEqual([r['symbol'] for r in rows], SYMBOLS)
+        self.assertEqual(list(rows[0]), list(fetched[0]))
+        self.assertEqual(len(self.transport.queries), 4)
+
+    def test_resume_next_day(self):
+        # an export without an end date, interrupted on an earlier day
+        self.failing = set(['GOOG'])
+        checkpoint = cli.Checkpoint(self.path + '.checkpoint', {
+            'kind': 'historical', 'format': 'csv', 'fields': None, 'start_date': '2014-01-01',
+            'end_date': '2014-04-25'})
+        checkpoint.close()
+        cli.export('historical', ['YHOO', 'GOOG'], self.path, start_date='2014-01-01')
+        self.assertEqual(set(dates(q) for q in self.transport.queries),
+                         set([('2014-01-01', '2014-04-25')]))
+        self.assertEqual(self.read_csv()[0]['Date'], '2014-04-25')
+        self.assertRaises(ValueError, cli.export, 'historical', ['GOOG'], self.path,
+                          start_date='2014-01-01', end_date='2014-04-29')
+
+    def test_other_job(self):
+        self.failing = set(['A000'])
+        cli.export('quotes', SYMBOLS, self.path)
+        self.assertRaises(ValueError, cli.export, 'quotes', SYMBOLS, self.path, format='jsonl')
+
+    def test_no_checkpoint(self):
+        self.failing = set(['A000'])
+        cli.export('quotes', SYMBOLS, self.path, checkpoint=False)
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    @skipIf(cli.pyarrow is None, 'requires PyArrow')
+    def test_parquet(self):
+        path = os.path.join(self.directory, 'out')
+        cli.export('quotes', SYMBOLS, path, format='parquet', chunk_size=5, file_rows=10)
+        names = sorted(os.listdir(path))
+        self.assertEqual(names, ['part-00000.parquet', 'part-00001.parquet',
+                                 'part-00002.parquet'])
+        table = cli.pyarrow.parquet.read_table(path)
+        self.assertEqual(sorted(table.column('symbol').to_pylist()), SYMBOLS)
+
+
+class TestMain(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        yql.YQLQuery.transport = StubTransport()
+        self.directory = tempfile.mkdtemp()
+        self.symbols = os.path.join(self.directory, 'symbols.txt')
+        with open(self.symbols, 'w') as f:
+            f.write('# watch list\nYHOO\n\nGOOG  # search\nYHOO\nBAD1\n')
+        self._stderr = sys.stderr
+        sys.stderr = tempfile.TemporaryFile('w+')
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        sys.stderr.close()
+        sys.stderr = self._stderr
+        shutil.rmtree(self.directory)
+
+    def test_read_symbols(self):
+        self.assertEqual(cli.read_symbols(self.symbols), ['YHOO', 'GOOG', 'BAD1'])
+
+    def test_main(self):
+        path = os.path.join(self.directory, 'quotes.jsonl')
+        status = cli.main(['quotes', self.symbols, '-o', path, '--fields', 'Volume,Open'])
+        self.assertEqual(status, 1)
+        with open(path) as f:
+            self.assertEqual([json.loads(line)['symbol'] for line in f], ['YHOO', 'GOOG'])
+        sys.stderr.seek(0)
+        report = sys.stderr.read()
+        self.assertIn('BAD1: ', report)
+        self.assertIn('No such ticker symbol.', report)
+        self.assertIn('2 symbols, 2 rows, 1 errors, 0 skipped', report)
+
+    def test_historical_needs_start(self):
+        self.assertRaises(SystemExit, cli.main, ['historical', self.symbols])
+
+
+if __name__ == "__main__":
+    test_main()
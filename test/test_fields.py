@@ -0,0 +1,104 @@
+import pickle
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Currency, Quote, Share, YQLFieldNotRequestedError, yql
+from yahoo_finance.stream import QuoteStream
+
+FIELDS = ['LastTradePriceOnly', 'Volume']
+
+
+class TestFields(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport()
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def test_query(self):
+        Share('YHOO', fields=FIELDS)
+        self.assertEqual(self.transport.queries, [
+            'select symbol, ErrorIndicationreturnedforsymbolchangedinvalid, LastTradePriceOnly, '
+            'Volume from yahoo.finance.quotes where symbol = "YHOO"'])
+
+    def test_not_requested(self):
+        # the stub ignores the projection, fields not requested are dropped anyway
+        share = Share('YHOO', fields=FIELDS)
+        self.assertEqual(share.get_price(), '1.00')
+        self.assertEqual(share.get_volume(), '100')
+        self.assertEqual(sorted(share.data_set), sorted(
+            FIELDS + ['symbol', 'ErrorIndicationreturnedforsymbolchangedinvalid']))
+        with self.assertRaises(YQLFieldNotRequestedError) as cm:
+            share.get_open()
+        self.assertIn('"Open" was not requested', str(cm.exception))
+        self.assertRaises(KeyError, share.get_open)
+        self.assertRaises(YQLFieldNotRequestedError, share.data_set.numeric, 'Open')
+        self.assertEqual(share.data_set.numeric('Volume'), 100.0)
+        self.assertIsNone(share.data_set.get('Open'))
+
+    def test_all_fields(self):
+        share = Share('YHOO')
+        self.assertTrue(self.transport.queries[0].startswith('select * from'))
+        self.assertIsNone(share.get_open())
+        with self.assertRaises(KeyError) as cm:
+            share.data_set['Bid']
+        self.assertNotIsInstance(cm.exception, YQLFieldNotRequestedError)
+
+    def test_derived(self):
+        share = Share('YHOO', fields=['LastTradeDateTimeUTC'])
+        self.assertIn('LastTradeDate, LastTradeTime from', self.transport.queries[0])
+        self.assertEqual(share.get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+        self.assertRaises(YQLFieldNotRequestedError, lambda: share.data_set['LastTradeDate'])
+
+    def test_bulk(self):
+        batch = Share.bulk(['YHOO', 'GOOG', 'BAD1'], fields=FIELDS)
+        self.assertTrue(self.transport.queries[0].startswith(
+            'select symbol, ErrorIndicationreturnedforsymbolchangedinvalid, LastTradePriceOnly'))
+        self.assertEqual(sorted(batch.errors), ['BAD1'])
+        self.assertEqual(batch['GOOG'].fields, tuple(FIELDS))
+        self.assertRaises(YQLFieldNotRequestedError, batch['GOOG'].get_open)
+        batch.refresh()
+        self.assertRaises(YQLFieldNotRequestedError, batch['GOOG'].get_open)
+
+    def test_lazy(self):
+        projected = [Share(s, lazy=True, fields=FIELDS) for s in ('A', 'B')]
+        full = Share('C', lazy=True)
+        projected[0].get_price()
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertIn('symbol in ("A", "B")', self.transport.queries[0])
+        full.get_open()
+        self.assertTrue(self.transport.queries[1].startswith('select * from'))
+
+    def test_stream(self):
+        stream = QuoteStream(['YHOO'], fields=FIELDS)
+        events = stream.poll()
+        self.assertEqual(sorted(events[0].changes), sorted(
+            FIELDS + ['symbol', 'ErrorIndicationreturnedforsymbolchangedinvalid']))
+        self.assertIn('LastTradePriceOnly, Volume from', self.transport.queries[0])
+
+    def test_currency(self):
+        Currency.fields = ('Rate',)
+        try:
+            currency = Currency('EURPLN')
+        finally:
+            Currency.fields = None
+        self.assertEqual(self.transport.queries, [
+            'select id, Rate from yahoo.finance.xchange where pair = "EURPLN"'])
+        self.assertEqual(currency.get_rate(), '2.0000')
+
+    def test_pickle(self):
+        quote = Quote({'symbol': 'YHOO', 'Volume': '100'}, projected=True)
+        copy = pickle.loads(pickle.dumps(quote, 2))
+        self.assertEqual(copy, quote)
+        self.assertRaises(YQLFieldNotRequestedError, lambda: copy['Open'])
+
+
+if __name__ == "__main__":
+    test_main()
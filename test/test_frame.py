@@ -0,0 +1,58 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, SkipTest, TestCase
+else:
+    from unittest import main as test_main, SkipTest, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import HistoricalFrame, Share, yql
+from yahoo_finance.frame import numpy
+
+
+class TestHistoricalFrame(TestCase):
+
+    def setUp(self):
+        if numpy is None:
+            raise SkipTest('HistoricalFrame requires NumPy')
+        self.rows = [
+            {'Symbol': 'YHOO', 'Date': '2014-04-29', 'Open': '34.369999', 'High': '35.889999',
+             'Low': '34.119999', 'Close': '35.830002', 'Volume': '28736000',
+             'Adj_Close': '35.830002'},
+            {'Symbol': 'YHOO', 'Date': '2014-04-28', 'Open': 'N/A', 'High': None,
+             'Low': '33.650002', 'Close': '33.990002', 'Volume': 'N/A', 'Adj_Close': '33.990002'},
+        ]
+
+    def test_from_rows(self):
+        frame = HistoricalFrame.from_rows(self.rows)
+        self.assertEqual(frame.symbol, 'YHOO')
+        self.assertEqual(len(frame), 2)
+        self.assertEqual(frame.date.dtype, numpy.dtype('datetime64[D]'))
+        self.assertEqual(str(frame.date[0]), '2014-04-28')
+        self.assertEqual(frame.close.dtype, numpy.float64)
+        self.assertEqual(frame.close.tolist(), [33.990002, 35.830002])
+        self.assertTrue(numpy.isnan(frame.open[0]))
+        self.assertTrue(numpy.isnan(frame.high[0]))
+        self.assertEqual(frame.volume.dtype, numpy.int64)
+        self.assertEqual(frame.volume.tolist(), [0, 28736000])
+        self.assertTrue(frame.adj_close.flags['C_CONTIGUOUS'])
+
+    def test_empty(self):
+        frame = HistoricalFrame.from_rows([], symbol='YHOO')
+        self.assertEqual(len(frame), 0)
+
+    def test_get_historical_as_arrays(self):
+        transport, yql.YQLQuery.transport = yql.YQLQuery.transport, StubTransport()
+        try:
+            share = Share('YHOO')
+            rows = share.get_historical('2012-04-25', '2014-04-29')
+            frame = share.get_historical('2012-04-25', '2014-04-29', as_arrays=True)
+        finally:
+            yql.YQLQuery.transport = transport
+        self.assertEqual(len(frame), len(rows))
+        self.assertEqual(str(frame.date[-1]), rows[0]['Date'])
+        self.assertEqual(frame.adj_close[0], float(rows[-1]['Adj_Close']))
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,253 @@
+import sys
+import threading
+import time
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+try:
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import HTTPError
+
+from stubs import StubTransport, dates, respond, results
+from yahoo_finance import (Share, YQLCircuitOpenError, YQLHistoricalWindowError, get_date_range,
+                           yql)
+
+
+class TestGetHistorical(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.failures = {}
+        self.lock = threading.Lock()
+        yql.YQLQuery.transport = StubTransport()
+        self.share = Share('YHOO')
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def handler(self, query):
+        start, end = dates(query)
+        # newer windows answer later so they complete out of order
+        time.sleep((int(end[:4]) - 2000) * 0.002)
+        with self.lock:
+            if self.failures.get(start):
+                self.failures[start] -= 1
+                return {'error': {'description': 'Temporary failure'}}
+        if start == '2005-01-01':
+            return results('quote', [])
+        return respond(query)
+
+    def test_order(self):
+        history = self.share.get_historical('2001-01-01', '2010-12-31', max_workers=8)
+        self.assertEqual(len(self.transport.queries), 10)
+        dates_ = [row['Date'] for row in history]
+        self.assertEqual(dates_, sorted(dates_, reverse=True))
+        self.assertEqual(dates_[0], '2010-12-31')
+        self.assertEqual(dates_[-1], '2001-01-01')
+
+    def test_same_as_serial(self):
+        parallel = self.share.get_historical('2001-01-01', '2010-12-31', max_workers=8)
+        serial = self.share.get_historical('2001-01-01', '2010-12-31', max_workers=1)
+        self.assertEqual(parallel, serial)
+
+    def test_failed_window_retried(self):
+        windows = list(get_date_range('2001-01-01', '2010-12-31'))
+        self.failures[windows[3][0]] = 2
+        history = self.share.get_historical('2001-01-01', '2010-12-31', retries=2)
+        self.assertEqual(len(self.transport.queries), 12)
+        self.assertIn(windows[3][1], [row['Date'] for row in history])
+
+    def test_failed_window_reported(self):
+        windows = list(get_date_range('2001-01-01', '2010-12-31'))
+        self.failures[windows[3][0]] = 3
+        with self.assertRaises(YQLHistoricalWindowError) as cm:
+            self.share.get_historical('2001-01-01', '2010-12-31', retries=2)
+        self.assertEqual((cm.exception.start_date, cm.exception.end_date), windows[3])
+        self.assertIn('Temporary failure', str(cm.exception))
+
+    def test_empty_window(self):
+        history = self.share.get_historical('2005-01-01', '2005-01-02')
+        self.assertEqual(history, [])
+
+    def test_transport_error_not_retried_per_window(self):
+        def handler(query):
+            raise HTTPError('http://yql', 503, 'Service Unavailable', {}, None)
+
+        self.transport.handler = handler
+        _retry, yql.YQLQuery.retry = yql.YQLQuery.retry, yql.Retry(retries=1, backoff=0)
+        _breaker, yql.YQLQuery.breaker = yql.YQLQuery.breaker, yql.CircuitBreaker(failures=2)
+        try:
+            # retried once by the transport only
+            self.assertRaises(HTTPError, self.share.get_historical, '2014-01-01', '2014-01-31',
+                              retries=2)
+            self.assertEqual(len(self.transport.queries), 2)
+            # the second failure opens the circuit, further windows fail fast
+            yql.YQLQuery.breaker.failure()
+            self.assertRaises(YQLCircuitOpenError, self.share.get_historical, '2014-01-01',
+                              '2014-01-31', retries=2)
+            self.assertEqual(len(self.transport.queries), 2)
+        finally:
+            yql.YQLQuery.retry = _retry
+            yql.YQLQuery.breaker = _breaker
+
+
+class TestIterHistorical(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        yql.YQLQuery.transport = StubTransport()
+        self.share = Share('YHOO')
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+        self.failing = None
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def handler(self, query):
+        if dates(query)[0] == self.failing:
+            return {'error': {'description': 'Temporary failure'}}
+        return respond(query)
+
+    def test_same_as_get_historical(self):
+        history = self.share.get_historical('2001-01-01', '2010-12-31')
+        for prefetch in (0, 1, 3):
+            rows = list(self.share.iter_historical('2001-01-01', '2010-12-31', prefetch=prefetch))
+            self.assertEqual(rows, history)
+
+    def test_blocks(self):
+        blocks = list(self.share.iter_historical('2001-01-01', '2010-12-31', blocks=True))
+        windows = list(get_date_range('2001-01-01', '2010-12-31'))
+        self.assertEqual(len(blocks), len(windows))
+        self.assertEqual([(b[-1]['Date'], b[0]['Date']) for b in blocks], windows)
+
+    def test_prefetch_bounded(self):
+        for prefetch in (0, 2):
+            del self.transport.queries[:]
+            blocks = self.share.iter_historical('2001-01-01', '2010-12-31', prefetch=prefetch,
+                                                blocks=True)
+            next(blocks)
+            time.sleep(0.05)
+            self.assertEqual(len(self.transport.queries), prefetch + 1)
+            blocks.close()
+
+    def test_failed_window(self):
+        windows = list(get_date_range('2001-01-01', '2010-12-31'))
+        self.failing = windows[3][0]
+        blocks = self.share.iter_historical('2001-01-01', '2010-12-31', retries=0, blocks=True)
+        self.assertEqual(len([next(blocks) for _ in range(3)]), 3)
+        with self.assertRaises(YQLHistoricalWindowError) as cm:
+            next(blocks)
+        self.assertEqual((cm.exception.start_date, cm.exception.end_date), windows[3])
+
+
+class TestExtendHistorical(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        yql.YQLQuery.transport = StubTransport()
+        self.share = Share('YHOO')
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+        # days before `ex_date` have their Adj_Close halved
+        self.ex_date = None
+        self.failing = None
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def handler(self, query):
+        if dates(query) == self.failing:
+            return {'error': {'description': 'Temporary failure'}}
+        response = respond(query)
+        rows = response['query']['results']['quote']
+        for row in rows if isinstance(rows, list) else [rows]:
+            if self.ex_date and row['Date'] < self.ex_date:
+                row['Adj_Close'] = '%.3f' % (float(row['Adj_Close']) / 2)
+        return response
+
+    def test_first_call(self):
+        self.assertRaises(ValueError, self.share.extend_historical)
+        rows = self.share.extend_historical('2013-01-01', '2014-04-25')
+        self.assertEqual(rows, self.share.get_historical('2013-01-01', '2014-04-25')[::-1])
+        self.assertEqual(self.share.history, rows)
+        self.assertEqual(self.share.history[0]['Date'], '2013-01-01')
+
+    def test_delta(self):
+        self.share.extend_historical('2013-01-01', '2014-04-25')
+        history = self.share.history
+        del self.transport.queries[:]
+        rows = self.share.extend_historical(end_date='2014-04-29', overlap=3)
+        self.assertEqual([r['Date'] for r in rows], ['2014-04-26', '2014-04-27', '2014-04-28',
+                                                     '2014-04-29'])
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertEqual(dates(self.transport.queries[0]), ('2014-04-23', '2014-04-29'))
+        self.assertIs(self.share.history, history)
+        self.assertEqual(history, self.share.get_historical('2013-01-01', '2014-04-29')[::-1])
+        self.assertIsNone(self.share.history_revised)
+
+    def test_no_overlap(self):
+        self.share.extend_historical('2014-01-01', '2014-01-10')
+        del self.transport.queries[:]
+        self.ex_date = '2014-01-11'
+        rows = self.share.extend_historical(end_date='2014-01-12', overlap=0)
+        self.assertEqual([r['Date'] for r in rows], ['2014-01-11', '2014-01-12'])
+        self.assertEqual([dates(q) for q in self.transport.queries],
+                         [('2014-01-11', '2014-01-12')])
+        self.assertEqual(len(self.share.history), 12)
+        self.assertIsNone(self.share.history_revised)
+        self.assertRaises(ValueError, self.share.extend_historical, overlap=-1)
+
+    def test_up_to_date(self):
+        self.share.extend_historical('2014-01-01', '2014-04-25')
+        del self.transport.queries[:]
+        self.assertEqual(self.share.extend_historical(end_date='2014-04-25'), [])
+        self.assertEqual(self.transport.queries, [])
+
+    def test_revision(self):
+        self.share.extend_historical('2013-01-01', '2014-04-25')
+        del self.transport.queries[:]
+        self.ex_date = '2014-04-25'
+        rows = self.share.extend_historical(end_date='2014-04-27', overlap=3)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(self.share.history_revised, '2014-04-24')
+        # the delta, then the stored days before the overlap
+        self.assertEqual([dates(q) for q in self.transport.queries],
+                         [('2014-04-23', '2014-04-27'), ('2013-04-22', '2014-04-22'),
+                          ('2013-01-01', '2013-04-21')])
+        self.assertEqual(self.share.history,
+                         self.share.get_historical('2013-01-01', '2014-04-27')[::-1])
+        self.assertEqual(self.share.history[-3]['Adj_Close'],
+                         self.share.history[-3]['Close'])
+        self.assertNotEqual(self.share.history[-4]['Adj_Close'],
+                            self.share.history[-4]['Close'])
+
+    def test_revision_failed(self):
+        self.share.extend_historical('2013-01-01', '2014-04-25')
+        self.ex_date = '2014-04-25'
+        self.share.extend_historical(end_date='2014-04-27', overlap=3)
+        history = self.share.history[:]
+        # the stored days before the overlap cannot be fetched again
+        self.ex_date = '2014-04-27'
+        self.failing = ('2013-01-01', '2013-04-23')
+        self.assertRaises(YQLHistoricalWindowError, self.share.extend_historical,
+                          end_date='2014-04-29', overlap=3, retries=0)
+        self.assertEqual(self.share.history, history)
+        self.assertEqual(self.share.history_revised, '2014-04-24')
+
+    def test_revision_within_overlap(self):
+        self.share.extend_historical('2014-04-20', '2014-04-22')
+        del self.transport.queries[:]
+        self.ex_date = '2014-04-22'
+        self.share.extend_historical(end_date='2014-04-23')
+        self.assertEqual(self.share.history_revised, '2014-04-21')
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertEqual(self.share.history,
+                         self.share.get_historical('2014-04-20', '2014-04-23')[::-1])
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,185 @@
+import sys
+import time
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, SkipTest, TestCase
+else:
+    from unittest import main as test_main, SkipTest, TestCase
+
+from yahoo_finance import indicators
+from yahoo_finance.frame import numpy
+
+
+def naive_sma(values, window):
+    return [float('nan') if i + 1 < window else sum(values[i + 1 - window:i + 1]) / window
+            for i in range(len(values))]
+
+
+def naive_std(values, window):
+    result = []
+    for i in range(len(values)):
+        if i + 1 < window:
+            result.append(float('nan'))
+            continue
+        chunk = values[i + 1 - window:i + 1]
+        mean = sum(chunk) / window
+        result.append((sum((v - mean) ** 2 for v in chunk) / (window - 1)) ** 0.5)
+    return result
+
+
+def naive_ema(values, alpha):
+    result, state = [], float('nan')
+    for value in values:
+        if state != state:
+            state = value
+        elif value == value:
+            state += alpha * (value - state)
+        result.append(state)
+    return result
+
+
+class IndicatorsTestCase(TestCase):
+
+    def setUp(self):
+        if numpy is None:
+            raise SkipTest('Indicators require NumPy')
+        random = numpy.random.RandomState(7)
+        # three symbols, prices far from 0 to exercise the precision of rolling sums
+        self.close = 1000 * numpy.exp(numpy.cumsum(random.normal(0, 0.02, (300, 3)), axis=0))
+        self.high = self.close * (1 + random.uniform(0, 0.03, self.close.shape))
+        self.low = self.close * (1 - random.uniform(0, 0.03, self.close.shape))
+
+    def assertClose(self, actual, expected):
+        numpy.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+
+class TestIndicators(IndicatorsTestCase):
+
+    def test_sma(self):
+        column = self.close[:, 0].tolist()
+        self.assertClose(indicators.sma(column, 20), naive_sma(column, 20))
+        self.assertClose(indicators.sma(self.close, 20)[:, 1], naive_sma(self.close[:, 1].tolist(), 20))
+        self.assertClose(indicators.sma(column, 1), column)
+
+    def test_sma_nan(self):
+        values = numpy.array([1.0, 2.0, numpy.nan, 4.0, 5.0, 6.0, 7.0])
+        self.assertClose(indicators.sma(values, 2), [numpy.nan, 1.5, numpy.nan, numpy.nan, 4.5, 5.5, 6.5])
+
+    def test_window(self):
+        self.assertRaises(ValueError, indicators.sma, [1.0], 0)
+        self.assertRaises(ValueError, indicators.rolling_std, [1.0], 1)
+        self.assertTrue(numpy.isnan(indicators.sma([1.0, 2.0], 5)).all())
+
+    def test_rolling_std(self):
+        column = self.close[:, 2].tolist()
+        self.assertClose(indicators.rolling_std(self.close, 10)[:, 2], naive_std(column, 10))
+        expected = numpy.array([numpy.std(self.close[i - 9:i + 1], axis=0) for i in range(9, 300)])
+        self.assertClose(indicators.rolling_std(self.close, 10, ddof=0)[9:], expected)
+
+    def test_ema(self):
+        values = [1.0, 2.0, numpy.nan, 4.0]
+        # alpha = 2 / (3 + 1), NaN values keep the average
+        self.assertClose(indicators.ema(values, 3), [1.0, 1.5, 1.5, 2.75])
+        self.assertClose(indicators.ema([numpy.nan, 2.0], alpha=0.5), [numpy.nan, 2.0])
+        self.assertEqual(indicators.ema(self.close, 5).shape, self.close.shape)
+        self.assertRaises(ValueError, indicators.ema, values, alpha=0)
+
+    def test_ema_long(self):
+        # longer than a block of `_ema`, with NaN gaps and a column starting late
+        random = numpy.random.RandomState(3)
+        values = 1000 + numpy.cumsum(random.normal(0, 1, (20000, 2)), axis=0)
+        values[random.uniform(size=values.shape) < 0.1] = numpy.nan
+        values[:5000, 1] = numpy.nan
+        for alpha in (1.0, 0.9, 2.0 / 51, 0.001):
+            expected = numpy.array([naive_ema(values[:, i].tolist(), alpha) for i in (0, 1)]).T
+            self.assertClose(indicators.ema(values, alpha=alpha), expected)
+            self.assertClose(indicators.ema(values[:, 1], alpha=alpha), expected[:, 1])
+
+    def test_ema_speed(self):
+        values = 1000 + numpy.cumsum(numpy.random.RandomState(5).normal(0, 1, 100000))
+        start = time.time()
+        indicators.ema(values, 50)
+        indicators.atr(values + 1, values - 1, values, 14)
+        # a loop over days takes about a second
+        self.assertLess(time.time() - start, 0.25)
+
+    def test_log_returns(self):
+        returns = indicators.log_returns(self.close)
+        self.assertTrue(numpy.isnan(returns[0]).all())
+        self.assertClose(returns[1:], numpy.log(self.close[1:] / self.close[:-1]))
+
+    def test_atr(self):
+        high, low, close = [11.0, 12.0, 10.0], [9.0, 10.5, 8.0], [10.0, 11.0, 9.0]
+        self.assertClose(indicators.true_range(high, low, close), [2.0, 2.0, 3.0])
+        self.assertClose(indicators.atr(high, low, close, 2), [2.0, 2.0, 2.5])
+
+    def test_drawdown(self):
+        prices = [10.0, 12.0, 6.0, numpy.nan, 9.0, 15.0, 12.0]
+        self.assertClose(indicators.drawdown(prices), [0, 0, -0.5, numpy.nan, -0.25, 0, -0.2])
+        self.assertEqual(indicators.max_drawdown(prices), -0.5)
+        self.assertEqual(indicators.max_drawdown(self.close).shape, (3,))
+
+    def test_adjust(self):
+        open, high, low, close = indicators.adjust([20.0], [22.0], [18.0], [20.0], [10.0])
+        self.assertClose(numpy.concatenate([open, high, low, close]), [10.0, 11.0, 9.0, 10.0])
+
+    def test_rebase(self):
+        prices = numpy.array([[numpy.nan, 4.0], [2.0, 8.0], [3.0, 2.0]])
+        self.assertClose(indicators.rebase(prices, 100), [[numpy.nan, 100], [100, 200], [150, 50]])
+        self.assertClose(indicators.rebase([2.0, 3.0]), [1.0, 1.5])
+
+
+class TestIncremental(IndicatorsTestCase):
+
+    def check(self, indicator, expected, values, split=200):
+        # history at once, then one bar at a time
+        self.assertClose(indicator.extend(values[:split]), expected[:split])
+        for i in range(split, len(values)):
+            self.assertClose(indicator.update(values[i]), expected[i])
+
+    def test_rolling_mean(self):
+        self.check(indicators.RollingMean(20), indicators.sma(self.close, 20), self.close)
+        self.check(indicators.RollingMean(20), indicators.sma(self.close, 20), self.close, split=5)
+
+    def test_rolling_mean_nan(self):
+        values = numpy.array([1.0, 2.0, numpy.nan, 4.0, 5.0, 6.0, 7.0])
+        mean = indicators.RollingMean(2)
+        self.assertClose([mean.update(v) for v in values], indicators.sma(values, 2))
+        self.assertClose(mean.extend(values), indicators.sma(numpy.concatenate([values, values]), 2)[7:])
+
+    def test_rolling_std(self):
+        self.check(indicators.RollingStd(10), indicators.rolling_std(self.close, 10), self.close)
+
+    def test_exponential_mean(self):
+        self.check(indicators.ExponentialMean(12), indicators.ema(self.close, 12), self.close)
+
+    def test_exponential_mean_extended(self):
+        mean = indicators.ExponentialMean(12)
+        expected = indicators.ema(self.close, 12)
+        self.assertClose(mean.extend(self.close[:100]), expected[:100])
+        self.assertClose(mean.extend(self.close[100:]), expected[100:])
+
+    def test_average_true_range(self):
+        expected = indicators.atr(self.high, self.low, self.close, 14)
+        atr = indicators.AverageTrueRange(14)
+        self.assertClose(atr.extend(self.high[:100], self.low[:100], self.close[:100]), expected[:100])
+        self.assertClose(atr.extend(self.high[100:200], self.low[100:200], self.close[100:200]),
+                         expected[100:200])
+        for i in range(200, 300):
+            self.assertClose(atr.update(self.high[i], self.low[i], self.close[i]), expected[i])
+
+    def test_drawdown(self):
+        drawdown = indicators.Drawdown()
+        self.check(drawdown, indicators.drawdown(self.close), self.close)
+        self.assertClose(drawdown.max_drawdown, indicators.max_drawdown(self.close))
+        self.assertClose(drawdown.peak, self.close.max(axis=0))
+
+    def test_scalar(self):
+        mean = indicators.RollingMean(2)
+        self.assertTrue(numpy.isnan(mean.update(1.0)))
+        self.assertEqual(mean.update(2.0), 1.5)
+        self.assertIsInstance(mean.update(3.0), float)
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,89 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Currency, Share, YQLQueryError, yql
+
+
+class TestLazy(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport()
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        Share.lazy = False
+
+    def test_not_lazy(self):
+        Share('YHOO')
+        self.assertEqual(len(self.transport.queries), 1)
+
+    def test_construction_is_free(self):
+        shares = [Share(s, lazy=True) for s in ('YHOO', 'GOOG', 'MSFT')]
+        self.assertEqual(self.transport.queries, [])
+        self.assertEqual([s.symbol for s in shares], ['YHOO', 'GOOG', 'MSFT'])
+
+    def test_from_data_set(self):
+        quote = Share('YHOO').data_set
+        del self.transport.queries[:]
+        share = Share.from_data_set('YHOO', quote)
+        self.assertIs(share.data_set, quote)
+        self.assertEqual(share.get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+        fetcher = Currency.from_data_set('EURPLN')
+        self.assertEqual(self.transport.queries, [])
+        self.assertEqual(fetcher.get_rate(), '2.0000')
+        self.assertEqual(len(self.transport.queries), 1)
+
+    def test_coalesced(self):
+        shares = [Share(s, lazy=True) for s in ('YHOO', 'GOOG', 'MSFT', 'YHOO')]
+        self.assertEqual(shares[1].get_price(), '1.00')
+        self.assertEqual(self.transport.queries, [
+            'select * from yahoo.finance.quotes where symbol in ("GOOG", "MSFT", "YHOO")'])
+        for share in shares:
+            self.assertEqual(share.get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+        self.assertEqual(len(self.transport.queries), 1)
+
+    def test_class_default(self):
+        Share.lazy = True
+        yahoo = Share('YHOO')
+        self.assertEqual(self.transport.queries, [])
+        self.assertEqual(yahoo.get_price(), '1.00')
+        self.assertEqual(len(self.transport.queries), 1)
+
+    def test_currency(self):
+        pairs = [Currency(p, lazy=True) for p in ('EURPLN', 'USDPLN')]
+        shares = [Share(s, lazy=True) for s in ('YHOO', 'GOOG')]
+        self.assertEqual(pairs[0].get_rate(), '2.0000')
+        self.assertEqual(pairs[1].get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertIn('yahoo.finance.xchange', self.transport.queries[0])
+        self.assertEqual(shares[0].get_price(), '1.00')
+        self.assertEqual(len(self.transport.queries), 2)
+
+    def test_invalid_symbol(self):
+        good, bad = Share('YHOO', lazy=True), Share('BADONE', lazy=True)
+        self.assertRaises(YQLQueryError, bad.get_price)
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertEqual(good.get_price(), '1.00')
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertRaises(YQLQueryError, bad.get_price)
+        self.assertEqual(len(self.transport.queries), 2)
+
+    def test_max_age(self):
+        yahoo = Share('YHOO', max_age=60)
+        yahoo.get_price()
+        self.assertEqual(len(self.transport.queries), 1)
+        yahoo.fetched_at -= 61
+        yahoo.get_price()
+        self.assertEqual(len(self.transport.queries), 2)
+        yahoo.get_price()
+        self.assertEqual(len(self.transport.queries), 2)
+
+
+if __name__ == "__main__":
+    test_main()
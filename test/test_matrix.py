@@ -0,0 +1,91 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, SkipTest, TestCase
+else:
+    from unittest import main as test_main, SkipTest, TestCase
+
+from stubs import StubTransport, rate, results, symbols
+from yahoo_finance import yql
+from yahoo_finance.frame import numpy
+
+RATES = {'EUR': ('0.5000', '0.4990', '0.5010'), 'PLN': ('2.0000', '1.9900', '2.0100'),
+         'JPY': ('100.00', '99.00', '101.00')}
+
+
+class TestCurrencyMatrix(TestCase):
+
+    def setUp(self):
+        if numpy is None:
+            raise SkipTest('CurrencyMatrix requires NumPy')
+        from yahoo_finance.matrix import CurrencyMatrix
+        self.CurrencyMatrix = CurrencyMatrix
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def handler(self, query):
+        items = []
+        for pair in symbols(query):
+            if pair[3:] in RATES:
+                item = rate(pair)
+                item['Rate'], item['Bid'], item['Ask'] = RATES[pair[3:]]
+                if pair[3:] == 'JPY':
+                    item['Time'] = '3:00pm'
+                items.append(item)
+        return results('rate', items)
+
+    def test_one_query(self):
+        matrix = self.CurrencyMatrix(['EUR', 'PLN', 'JPY'])
+        self.assertEqual(self.transport.queries, [
+            'select * from yahoo.finance.xchange where pair in ("USDEUR", "USDPLN", "USDJPY")'])
+        self.assertEqual(matrix.currencies, ['USD', 'EUR', 'PLN', 'JPY'])
+        self.assertEqual(matrix.rates.shape, (4, 4))
+
+    def test_no_data_set(self):
+        matrix = self.CurrencyMatrix(['EUR'])
+        self.assertFalse(hasattr(matrix, 'data_set'))
+        matrix.refresh()
+        self.assertEqual(len(self.transport.queries), 2)
+
+    def test_rates(self):
+        matrix = self.CurrencyMatrix(['EUR', 'PLN', 'JPY'])
+        self.assertEqual(matrix.rate('USD', 'PLN'), 2.0)
+        self.assertEqual(matrix.rate('PLN', 'USD'), 0.5)
+        self.assertEqual(matrix.rate('EUR', 'PLN'), 4.0)
+        self.assertAlmostEqual(matrix.rate('JPY', 'EUR'), 0.005)
+        self.assertTrue(numpy.allclose(numpy.diag(matrix.rates), 1))
+        self.assertTrue(numpy.allclose(matrix.rates * matrix.rates.T, 1))
+
+    def test_bid_ask(self):
+        matrix = self.CurrencyMatrix(['EUR', 'PLN'])
+        eur, pln = matrix.index['EUR'], matrix.index['PLN']
+        self.assertAlmostEqual(matrix.bids[eur, pln], 1.99 / 0.501)
+        self.assertAlmostEqual(matrix.asks[eur, pln], 2.01 / 0.499)
+        self.assertAlmostEqual(matrix.bids[0, pln], 1.99)
+        self.assertTrue((matrix.spreads >= 0).all())
+        self.assertTrue((matrix.bids <= matrix.rates).all())
+        self.assertTrue((matrix.asks >= matrix.rates).all())
+
+    def test_staleness(self):
+        matrix = self.CurrencyMatrix(['EUR', 'PLN', 'JPY'])
+        now = 1401134400 + 60  # 2014-05-26 20:01:00 UTC
+        age = matrix.age(now)
+        eur, jpy = matrix.index['EUR'], matrix.index['JPY']
+        self.assertEqual(age[0, eur], 60)
+        # JPY was last traded an hour earlier, so are all its crosses
+        self.assertEqual(age[eur, jpy], 3660)
+        self.assertEqual(age[jpy, jpy], 0)
+
+    def test_missing_pair(self):
+        matrix = self.CurrencyMatrix(['EUR', 'XXX'])
+        self.assertIn('USDXXX', matrix.errors)
+        self.assertTrue(numpy.isnan(matrix.rate('EUR', 'XXX')))
+        self.assertEqual(matrix.rate('XXX', 'XXX'), 1.0)
+        self.assertEqual(matrix.rate('USD', 'EUR'), 0.5)
+
+
+if __name__ == "__main__":
+    test_main()
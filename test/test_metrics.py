@@ -0,0 +1,131 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport, respond
+from test_yql import LocalServerTestCase
+from yahoo_finance import Base, Currency, Share, YQLQueryError, yql
+from yahoo_finance.cache import ResponseCache
+from yahoo_finance.metrics import Metrics, current, table_of
+
+STAGES = ['build', 'decode', 'process', 'request', 'transfer', 'validate']
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+        self.metrics = Base.metrics = Metrics()
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        Base.metrics = None
+
+    def handler(self, query):
+        if 'BROKEN' in query:
+            return {'error': {'description': 'Invalid symbol'}}
+        return respond(query)
+
+    def test_stages(self):
+        Share('YHOO')
+        stats = self.metrics.stats()
+        self.assertEqual(list(stats), ['quotes'])
+        quotes = stats['quotes']
+        self.assertEqual(sorted(k for k, v in quotes.items() if isinstance(v, dict)), STAGES)
+        for stage in STAGES:
+            self.assertEqual(quotes[stage]['count'], 1)
+            self.assertGreaterEqual(quotes[stage]['p99'], quotes[stage]['p50'])
+        self.assertEqual(quotes['requests'], 1)
+        self.assertEqual(quotes['errors'], 0)
+        self.assertGreater(quotes['bytes'], 100)
+        self.assertLessEqual(quotes['decode']['total'], quotes['request']['total'])
+        self.assertIsNone(current())
+
+    def test_per_table(self):
+        share = Share('YHOO')
+        Currency('EURPLN')
+        share.get_historical('2013-01-01', '2014-12-31', max_workers=2)
+        stats = self.metrics.stats()
+        self.assertEqual(sorted(stats), ['historicaldata', 'quotes', 'xchange'])
+        self.assertEqual(stats['historicaldata']['requests'], 2)
+        self.assertEqual(stats['historicaldata']['request']['count'], 2)
+
+    def test_errors(self):
+        self.assertRaises(YQLQueryError, Share, 'BROKEN')
+        self.assertEqual(self.metrics.stats()['quotes']['errors'], 1)
+
+    def test_cache(self):
+        Share('YHOO', cache=ResponseCache())
+        cache = ResponseCache()
+        Share('YHOO', cache=cache).refresh()
+        stats = self.metrics.stats()['quotes']
+        self.assertEqual((stats['cache_hits'], stats['cache_misses']), (1, 2))
+        self.assertEqual(stats['transfer']['count'], 2)
+
+    def test_hooks(self):
+        events = []
+        self.metrics.subscribe(lambda *event: events.append(event))
+        self.metrics.subscribe(lambda *event: 1 / 0)
+        Share('YHOO')
+        names = [name for table, name, value in events]
+        self.assertEqual(sorted(set(names)), sorted(STAGES + ['bytes', 'requests']))
+        self.assertTrue(all(table == 'quotes' for table, name, value in events))
+
+    def test_disabled(self):
+        Base.metrics = None
+        Share('YHOO')
+        self.assertEqual(self.metrics.stats(), {})
+
+    def test_percentiles(self):
+        metrics = Metrics(samples=100)
+        for i in range(200, 0, -1):
+            metrics.observe('quotes', 'decode', float(i))
+        decode = metrics.stats()['quotes']['decode']
+        # percentiles of the latest 100 samples, count, total and max of all
+        self.assertEqual((decode['p50'], decode['p99']), (50.0, 99.0))
+        self.assertEqual((decode['count'], decode['max']), (200, 200.0))
+        metrics.reset()
+        self.assertEqual(metrics.stats(), {})
+
+    def test_table_of(self):
+        self.assertEqual(table_of('select * from yahoo.finance.quotes where symbol = "A"'),
+                         'quotes')
+        self.assertEqual(table_of('select * from yahoo.finance.xchange'), 'xchange')
+        self.assertEqual(table_of('show tables'), 'other')
+
+
+class TestConnectionPoolMetrics(LocalServerTestCase):
+
+    def setUp(self):
+        super(TestConnectionPoolMetrics, self).setUp()
+        self.pool = yql.ConnectionPool()
+        self.query = yql.YQLQuery(self.pool)
+        self.query.retry = yql.Retry(retries=3, backoff=0.01)
+        self._url, yql.PUBLIC_API_URL = yql.PUBLIC_API_URL, self.url
+
+    def tearDown(self):
+        yql.PUBLIC_API_URL = self._url
+        self.pool.clear()
+        super(TestConnectionPoolMetrics, self).tearDown()
+
+    def test_connect_and_retries(self):
+        metrics = Metrics()
+        query = 'select * from yahoo.finance.quotes'
+        self.httpd.schedule = [503]
+        for _ in range(2):
+            metrics.measure(query, self.query.execute, query)
+        quotes = metrics.stats()['quotes']
+        # one connection reused by the retry and the second query
+        self.assertEqual(quotes['connect']['count'], 1)
+        self.assertEqual(quotes['transfer']['count'], 3)
+        self.assertEqual(quotes['retries'], 1)
+        self.assertEqual(quotes['requests'], 2)
+        self.assertGreater(quotes['bytes'], quotes['wire_bytes'] / 3)
+
+
+if __name__ == "__main__":
+    test_main()
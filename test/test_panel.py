@@ -0,0 +1,102 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, SkipTest, TestCase
+else:
+    from unittest import main as test_main, SkipTest, TestCase
+
+from stubs import StubTransport, dates, history, respond, results, symbols
+from yahoo_finance import Share, YQLHistoricalWindowError, yql
+from yahoo_finance.frame import numpy
+
+
+class TestHistoricalPanel(TestCase):
+
+    def setUp(self):
+        if numpy is None:
+            raise SkipTest('HistoricalPanel requires NumPy')
+        from yahoo_finance import panel
+        self.panel = panel
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def handler(self, query):
+        names = symbols(query)
+        if any(s.startswith('BAD') for s in names):
+            return {'error': {'description': 'No such ticker symbol'}}
+        start, end = dates(query)
+        rows = []
+        for symbol in names:
+            # NEW has no rows before 2014-01-10, OFF none on the 2014-01-05
+            rows.extend(r for r in history(symbol, start, end)
+                        if not (symbol == 'NEW' and r['Date'] < '2014-01-10' or
+                                symbol == 'OFF' and r['Date'] == '2014-01-05'))
+        return results('quote', rows)
+
+    def test_batched(self):
+        panel = self.panel.get_historical_panel(['YHOO', 'GOOG', 'MSFT'], '2014-01-01', '2014-01-31')
+        self.assertEqual(self.transport.queries, [
+            'select * from yahoo.finance.historicaldata where symbol in ("YHOO", "GOOG", "MSFT") '
+            'and startDate="2014-01-01" and endDate="2014-01-31"'])
+        self.assertEqual(panel.values.shape, (31, 3, 6))
+        self.assertEqual(str(panel.dates[0]), '2014-01-01')
+        self.assertFalse(panel.mask.any())
+        self.assertEqual(panel.errors, {})
+
+    def test_long_range(self):
+        panel = self.panel.get_historical_panel(['YHOO', 'GOOG'], '2012-01-01', '2013-12-31',
+                                                max_workers=3)
+        # one query per symbol and date window
+        self.assertEqual(len(self.transport.queries), 4)
+        self.assertEqual(len(panel), 731)
+
+    def test_chunk_size(self):
+        self.panel.get_historical_panel(['A', 'B', 'C'], '2014-01-01', '2014-01-05', chunk_size=2)
+        self.assertEqual(sorted(len(symbols(q)) for q in self.transport.queries), [1, 2])
+
+    def test_aligned(self):
+        panel = self.panel.get_historical_panel(['YHOO', 'NEW', 'OFF'], '2014-01-01', '2014-01-31')
+        self.assertEqual(len(panel), 31)
+        new, off = panel.index['NEW'], panel.index['OFF']
+        self.assertEqual(panel.mask[:, new].sum(), 9)
+        self.assertTrue(numpy.isnan(panel['close'][:9, new]).all())
+        self.assertEqual(panel.mask[:, off].nonzero()[0].tolist(), [4])
+        self.assertFalse(panel.mask[:, 0].any())
+
+    def test_values_match_share(self):
+        panel = self.panel.get_historical_panel(['YHOO', 'GOOG'], '2014-01-01', '2014-01-31')
+        yql.YQLQuery.transport = StubTransport()
+        frame = Share('GOOG').get_historical('2014-01-01', '2014-01-31', as_arrays=True)
+        from_panel = panel.frame('GOOG')
+        self.assertEqual(from_panel.date.tolist(), frame.date.tolist())
+        self.assertEqual(from_panel.adj_close.tolist(), frame.adj_close.tolist())
+        self.assertEqual(from_panel.volume.tolist(), frame.volume.tolist())
+        self.assertEqual(panel['volume'][:, 1].tolist(), frame.volume.tolist())
+        self.assertRaises(KeyError, panel.__getitem__, 'price')
+
+    def test_bad_symbol(self):
+        panel = self.panel.get_historical_panel(['YHOO', 'BAD', 'GOOG'], '2014-01-01', '2014-01-31',
+                                                retries=0)
+        self.assertEqual(list(panel.errors), ['BAD'])
+        self.assertIsInstance(panel.errors['BAD'], YQLHistoricalWindowError)
+        self.assertTrue(panel.mask[:, panel.index['BAD']].all())
+        self.assertFalse(panel.mask[:, panel.index['GOOG']].any())
+
+    def test_empty(self):
+        yql.YQLQuery.transport = StubTransport(lambda query: results('quote', []))
+        panel = self.panel.get_historical_panel(['YHOO'], '2014-01-01', '2014-01-31')
+        self.assertEqual(panel.values.shape, (0, 1, 6))
+        self.assertEqual(repr(panel), '<HistoricalPanel: 1 symbols, empty>')
+
+    def test_no_quotes(self):
+        yql.YQLQuery.transport = StubTransport(respond)
+        self.panel.get_historical_panel(['YHOO'], '2014-01-01', '2014-01-02')
+        self.assertEqual(len(yql.YQLQuery.transport.queries), 1)
+        self.assertIn('historicaldata', yql.YQLQuery.transport.queries[0])
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,60 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from yahoo_finance import (Base, YQLNoResultsError, YQLQueryError, YQLResponseMalformedError,
+                           yql)
+
+
+def envelope(results):
+    return {'query': {'count': 1, 'results': {'quote': results}}}
+
+
+class TestParse(TestCase):
+
+    def setUp(self):
+        self.base = Base('YHOO')
+
+    def test_normalizes_na(self):
+        results = self.base._parse(envelope({
+            'symbol': 'YHOO', 'DaysRange': 'N/A - N/A', 'Open': 'N/A', 'Name': 'Yahoo',
+            'Notes': None, 'ErrorIndicationreturnedforsymbolchangedinvalid': None}))
+        self.assertEqual(results, {'symbol': 'YHOO', 'DaysRange': None, 'Open': None,
+                                   'Name': 'Yahoo', 'Notes': None,
+                                   'ErrorIndicationreturnedforsymbolchangedinvalid': None})
+
+    def test_error_key(self):
+        with self.assertRaises(YQLQueryError) as cm:
+            self.base._parse(envelope({'symbol': 'BAD', 'Open': 'N/A',
+                                       'ErrorIndicationreturnedforsymbolchangedinvalid':
+                                           'No such ticker symbol. N/A'}))
+        self.assertEqual(cm.exception.value, 'No such ticker symbol. N/A')
+
+    def test_list_untouched(self):
+        rows = [{'Date': '2014-04-29', 'Open': 'N/A'}, {'Date': '2014-04-28', 'Open': '1'}]
+        self.assertEqual(self.base._parse(envelope([dict(r) for r in rows])), rows)
+
+    def test_same_as_two_passes(self):
+        data = {'a': 'N/A', 'b': '1', 'Error1': None, 'Error2': 'x', 'c': ''}
+        expected = dict(data)
+        error = Base._is_error_in_results(expected)
+        Base._change_incorrect_none(expected)
+        self.assertEqual(Base._clean(data), error)
+        self.assertEqual(data, expected)
+
+    def test_envelope_errors(self):
+        self.assertRaises(YQLQueryError, self.base._parse, {'error': {'description': 'x'}})
+        self.assertRaises(YQLNoResultsError, self.base._parse,
+                          {'query': {'count': 0, 'results': None}})
+        self.assertRaises(YQLResponseMalformedError, self.base._parse, {'query': {}})
+
+    def test_loads_bytes(self):
+        self.assertEqual(yql.loads(b'{"query": {"count": 1, "s": "\\u00e9"}}'),
+                         {'query': {'count': 1, 's': u'\xe9'}})
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,113 @@
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Share, get_date_range, yql
+from yahoo_finance.planner import (HistoricalQuery, build_query, date_windows, plan_historical,
+                                   quote_value)
+
+
+class TestBuildQuery(TestCase):
+
+    def test_shapes(self):
+        self.assertEqual(build_query('quotes', 'symbol', 'YHOO'),
+                         'select * from yahoo.finance.quotes where symbol = "YHOO"')
+        self.assertEqual(build_query('quotes', 'symbol', ['YHOO', 'GOOG'], ['Volume', 'Open']),
+                         'select Volume, Open from yahoo.finance.quotes '
+                         'where symbol in ("YHOO", "GOOG")')
+        self.assertEqual(build_query('historicaldata', 'symbol', 'YHOO', conditions=[
+            ('startDate', '2014-01-01'), ('endDate', '2014-12-31')]),
+            'select * from yahoo.finance.historicaldata where symbol = "YHOO" '
+            'and startDate="2014-01-01" and endDate="2014-12-31"')
+
+    def test_escaping(self):
+        self.assertEqual(quote_value('A"B\\'), 'A\\"B\\\\')
+        self.assertEqual(build_query('quotes', 'symbol', ['A") or ("1', '%s']),
+                         'select * from yahoo.finance.quotes where symbol in '
+                         '("A\\") or (\\"1", "%s")')
+        self.assertEqual(build_query('quotes', 'symbol', 'YHOO', ['Change%']),
+                         'select Change% from yahoo.finance.quotes where symbol = "YHOO"')
+
+    def test_share(self):
+        _transport = yql.YQLQuery.transport
+        transport = yql.YQLQuery.transport = StubTransport()
+        try:
+            Share('YHOO"')
+        finally:
+            yql.YQLQuery.transport = _transport
+        self.assertEqual(transport.queries,
+                         ['select * from yahoo.finance.quotes where symbol = "YHOO\\""'])
+
+
+class TestDateWindows(TestCase):
+
+    def test_get_date_range(self):
+        for start, end in (('2012-04-25', '2014-04-29'), ('1970-01-01', '2016-04-12'),
+                           ('2014-01-01', '2014-01-01'), ('2013-04-29', '2014-04-29')):
+            self.assertEqual(date_windows(start, end), list(get_date_range(start, end)))
+        self.assertEqual(date_windows('2014-01-01', '2014-01-10', 4), [
+            ('2014-01-07', '2014-01-10'), ('2014-01-03', '2014-01-06'),
+            ('2014-01-01', '2014-01-02')])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, date_windows, '2014-01-02', '2014-01-01')
+        self.assertRaises(ValueError, date_windows, '2014-01-01', '2014-01-02', 0)
+
+
+class TestPlanHistorical(TestCase):
+
+    def test_batched(self):
+        plan = plan_historical([(s, '2014-01-01', '2014-01-31') for s in ('A', 'B', 'C')])
+        self.assertEqual(plan.queries, [HistoricalQuery(('A', 'B', 'C'), '2014-01-01',
+                                                        '2014-01-31')])
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(plan.rows, 93)
+
+    def test_row_limit(self):
+        plan = plan_historical([(s, '2014-01-01', '2014-01-31') for s in 'ABCDEFG'], row_limit=100)
+        self.assertEqual([q.symbols for q in plan], [('A', 'B', 'C'), ('D', 'E', 'F'), ('G',)])
+        self.assertTrue(all(q.rows <= 100 for q in plan))
+        plan = plan_historical([(s, '2014-01-01', '2014-01-31') for s in 'ABCDEFG'], chunk_size=2)
+        self.assertEqual(len(plan), 4)
+
+    def test_long_range(self):
+        plan = plan_historical([('A', '2012-04-25', '2014-04-29'),
+                                ('B', '2014-01-01', '2014-01-05')])
+        self.assertEqual([(q.start_date, q.end_date) for q in plan.queries[:3]],
+                         list(get_date_range('2012-04-25', '2014-04-29')))
+        self.assertEqual(plan.queries[3], HistoricalQuery(('B',), '2014-01-01', '2014-01-05'))
+
+    def test_merge(self):
+        plan = plan_historical([('A', '2014-01-10', '2014-01-20'),
+                                ('A', '2014-01-01', '2014-01-12'),
+                                ('A', '2014-01-21', '2014-01-25'),
+                                ('A', '2014-03-01', '2014-03-02')])
+        self.assertEqual(plan.ranges['A'], [('2014-01-01', '2014-01-25'),
+                                            ('2014-03-01', '2014-03-02')])
+        # both ranges fit in one query of their union
+        self.assertEqual(plan.queries, [HistoricalQuery(('A',), '2014-01-01', '2014-03-02')])
+
+    def test_across_symbols(self):
+        plan = plan_historical([('A', '2014-01-01', '2014-01-31'),
+                                ('B', '2014-01-10', '2014-02-15'),
+                                ('C', '2014-06-01', '2014-06-30')], row_limit=120)
+        self.assertEqual(plan.queries, [
+            HistoricalQuery(('A', 'B'), '2014-01-01', '2014-02-15'),
+            HistoricalQuery(('C',), '2014-06-01', '2014-06-30')])
+        rows = [{'Symbol': s, 'Date': d} for s in 'AB' for d in ('2014-01-05', '2014-02-10')]
+        self.assertEqual(plan.clip(rows), [{'Symbol': 'A', 'Date': '2014-01-05'},
+                                           {'Symbol': 'B', 'Date': '2014-02-10'}])
+        self.assertFalse(plan.wanted('Z', '2014-01-05'))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, plan_historical, [('A', '2014-01-02', '2014-01-01')])
+        self.assertRaises(ValueError, plan_historical, [], row_limit=0)
+        self.assertEqual(len(plan_historical([])), 0)
+
+
+if __name__ == "__main__":
+    test_main()
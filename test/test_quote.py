@@ -0,0 +1,95 @@
+import math
+import pickle
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Quote, Share, yql
+from yahoo_finance.quote import parse_number
+
+
+class TestQuote(TestCase):
+
+    def setUp(self):
+        self.data = {'symbol': 'YHOO', 'LastTradePriceOnly': '36.84', 'Open': None,
+                     'MarketCapitalization': '34.87B', 'PercentChange': '-0.35%',
+                     'Change': '+0.30', 'Name': 'Yahoo! Inc.', 'NewUpstreamField': 'x'}
+        self.quote = Quote(self.data)
+
+    def test_mapping(self):
+        self.assertEqual(self.quote['LastTradePriceOnly'], '36.84')
+        self.assertIsNone(self.quote['Open'])
+        self.assertEqual(self.quote['NewUpstreamField'], 'x')
+        self.assertRaises(KeyError, lambda: self.quote['Bid'])
+        self.assertNotIn('Bid', self.quote)
+        self.assertEqual(self.quote.get('Bid', '-'), '-')
+        self.assertEqual(len(self.quote), len(self.data))
+        self.assertEqual(self.quote.to_dict(), self.data)
+        self.assertEqual(self.quote, self.data)
+        self.assertEqual(self.quote, Quote(self.data))
+
+    def test_numeric(self):
+        self.assertEqual(self.quote.numeric('LastTradePriceOnly'), 36.84)
+        self.assertEqual(self.quote.numeric('MarketCapitalization'), 34.87e9)
+        self.assertEqual(self.quote.numeric('PercentChange'), -0.35)
+        self.assertEqual(self.quote.numeric('Change'), 0.3)
+        self.assertTrue(math.isnan(self.quote.numeric('Open')))
+        self.assertTrue(math.isnan(self.quote.numeric('Bid')))
+        self.assertRaises(KeyError, self.quote.numeric, 'Name')
+
+    def test_setitem(self):
+        self.quote['LastTradePriceOnly'] = '37.00'
+        self.quote['Other'] = 'y'
+        self.assertEqual(self.quote['LastTradePriceOnly'], '37.00')
+        self.assertEqual(self.quote.numeric('LastTradePriceOnly'), 37.0)
+        self.assertEqual(self.quote['Other'], 'y')
+
+    def test_dict_methods(self):
+        copy = self.quote.copy()
+        self.assertIsInstance(copy, dict)
+        self.assertEqual(copy, self.data)
+        self.quote.update({'Open': '36.50', 'Bid': '36.80'})
+        self.assertEqual(self.quote.numeric('Open'), 36.5)
+        self.assertEqual(self.quote.pop('Name'), 'Yahoo! Inc.')
+        del self.quote['Bid']
+        self.assertNotIn('Name', self.quote)
+        self.assertNotIn('Bid', self.quote)
+        self.assertEqual(self.quote.numeric('LastTradePriceOnly'), 36.84)
+        self.assertRaises(KeyError, self.quote.__delitem__, 'Name')
+        expected = dict(self.data, Open='36.50')
+        del expected['Name']
+        self.assertEqual(self.quote.to_dict(), expected)
+
+    def test_non_string_values(self):
+        quote = Quote({'symbol': 'YHOO', 'Count': 3, 'Name': u'Caf\xe9'})
+        self.assertEqual(quote['Count'], 3)
+        self.assertEqual(quote['Name'], u'Caf\xe9')
+        self.assertEqual(quote.to_dict(), {'symbol': 'YHOO', 'Count': 3, 'Name': u'Caf\xe9'})
+
+    def test_pickle(self):
+        self.assertEqual(pickle.loads(pickle.dumps(self.quote, 2)), self.quote)
+
+    def test_parse_number(self):
+        self.assertEqual(parse_number('1,234.5'), 1234.5)
+        self.assertEqual(parse_number('200.5K'), 200500.0)
+        self.assertTrue(math.isnan(parse_number('N/A')))
+        self.assertTrue(math.isnan(parse_number('')))
+
+    def test_share_data_set(self):
+        transport, yql.YQLQuery.transport = yql.YQLQuery.transport, StubTransport()
+        try:
+            share = Share('YHOO')
+        finally:
+            yql.YQLQuery.transport = transport
+        self.assertIsInstance(share.data_set, Quote)
+        self.assertEqual(share.get_price(), '1.00')
+        self.assertEqual(share.data_set.numeric('LastTradePriceOnly'), 1.0)
+        self.assertEqual(share.get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,111 @@
+from collections import Counter
+import subprocess
+import sys
+import threading
+import time
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport, respond
+from yahoo_finance import Base, Share, YQLQueryError, yql
+from yahoo_finance.singleflight import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self._flight = Base.flight
+        Base.flight = SingleFlight()
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+        self.error = False
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        Base.flight = self._flight
+
+    def handler(self, query):
+        # long enough for every thread to join the call in flight
+        time.sleep(0.2)
+        if self.error:
+            return {'error': {'description': 'Temporary failure'}}
+        return respond(query)
+
+    def run_threads(self, target, count):
+        start = threading.Event()
+        results, errors = [], []
+
+        def run(i):
+            start.wait()
+            try:
+                results.append(target(i))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_one_request_per_query(self):
+        symbols = ['MSFT', 'YHOO', 'GOOG', 'AAPL']
+
+        def target(i):
+            share = Share(symbols[i % len(symbols)])
+            history = share.get_historical('2014-01-01', '2014-01-31')
+            return share, history
+
+        results, errors = self.run_threads(target, 64)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 64)
+        counts = Counter(self.transport.queries)
+        self.assertEqual(len(counts), 2 * len(symbols))
+        self.assertEqual(set(counts.values()), set([1]))
+        for share, history in results:
+            self.assertEqual(share.get_price(), '1.00')
+            self.assertEqual(len(history), 31)
+            self.assertEqual(history[0]['Symbol'], share.symbol)
+        self.assertEqual(Base.flight.stats(), {'in_flight': 0, 'calls': 8, 'shared': 120})
+
+    def test_results_copied(self):
+        results, errors = self.run_threads(
+            lambda i: Share('YHOO').get_historical('2014-01-01', '2014-01-02'), 8)
+        self.assertEqual(errors, [])
+        results[0][0]['Close'] = 'changed'
+        self.assertEqual(len(set(id(rows[0]) for rows in results)), 8)
+        self.assertEqual([rows[0]['Close'] for rows in results[1:]], [results[1][0]['Close']] * 7)
+        self.assertNotEqual(results[1][0]['Close'], 'changed')
+
+    def test_same_exception(self):
+        self.error = True
+        results, errors = self.run_threads(lambda i: Share('MSFT'), 16)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 16)
+        self.assertTrue(all(isinstance(e, YQLQueryError) for e in errors))
+        self.assertEqual(len(set(id(e) for e in errors)), 1)
+        self.assertEqual(len(self.transport.queries), 1)
+
+    def test_sequential_calls_not_shared(self):
+        Share('MSFT')
+        Share('MSFT')
+        self.assertEqual(len(self.transport.queries), 2)
+
+    def test_cache_not_imported(self):
+        # `cache` needs `OrderedDict`, missing on Python 2.6
+        code = 'import sys, yahoo_finance; sys.exit("yahoo_finance.cache" in sys.modules)'
+        self.assertEqual(subprocess.call([sys.executable, '-c', code]), 0)
+
+    def test_disabled(self):
+        Base.flight = None
+        self.run_threads(lambda i: Share('MSFT'), 4)
+        self.assertEqual(len(self.transport.queries), 4)
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport
+from yahoo_finance import Share, yql
+from yahoo_finance.store import HistoricalStore
+
+
+class TestHistoricalStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'history.db')
+        self.store = HistoricalStore(self.path)
+        self._transport = yql.YQLQuery.transport
+        self.transport = yql.YQLQuery.transport = StubTransport()
+        self.share = Share('YHOO')
+        del self.transport.queries[:]
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_same_rows_as_network(self):
+        stored = self.share.get_historical('2012-04-25', '2014-04-29', store=self.store)
+        self.assertEqual(stored, self.share.get_historical('2012-04-25', '2014-04-29'))
+
+    def test_repeat_call_is_offline(self):
+        self.share.get_historical('2012-04-25', '2014-04-29', store=self.store)
+        self.assertEqual(len(self.transport.queries), 3)
+        history = HistoricalStore(self.path).read('YHOO', '2012-04-25', '2014-04-29')
+        again = self.share.get_historical('2012-04-25', '2014-04-29',
+                                          store=HistoricalStore(self.path))
+        self.assertEqual(len(self.transport.queries), 3)
+        self.assertEqual(again, history)
+
+    def test_only_gaps_are_fetched(self):
+        self.share.get_historical('2013-01-10', '2013-01-20', store=self.store)
+        self.share.get_historical('2013-02-01', '2013-02-10', store=self.store)
+        del self.transport.queries[:]
+        history = self.share.get_historical('2013-01-01', '2013-02-28', store=self.store)
+        self.assertEqual(len(self.transport.queries), 3)
+        self.assertIn('startDate="2013-02-11" and endDate="2013-02-28"', self.transport.queries[0])
+        self.assertEqual(len(history), 59)
+        self.assertEqual(self.store.coverage('YHOO'), [('2013-01-01', '2013-02-28')])
+        self.assertEqual(self.store.missing('YHOO', '2012-12-30', '2013-03-01'),
+                         [('2013-03-01', '2013-03-01'), ('2012-12-30', '2012-12-31')])
+
+    def test_today_is_fetched_again(self):
+        today = date.today()
+        start = (today - timedelta(days=30)).strftime('%Y-%m-%d')
+        self.share.get_historical(start, today.strftime('%Y-%m-%d'), store=self.store)
+        del self.transport.queries[:]
+        history = self.share.get_historical(start, today.strftime('%Y-%m-%d'), store=self.store)
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertEqual(len(history), 31)
+
+    def test_future_is_not_fetched(self):
+        today = date.today()
+        start = (today - timedelta(days=30)).strftime('%Y-%m-%d')
+        end = (today + timedelta(days=30)).strftime('%Y-%m-%d')
+        self.share.get_historical(start, end, store=self.store)
+        del self.transport.queries[:]
+        self.share.get_historical(start, end, store=self.store)
+        self.assertEqual(len(self.transport.queries), 1)
+        self.assertIn('startDate="{0}" and endDate="{0}"'.format(today.strftime('%Y-%m-%d')),
+                      self.transport.queries[0])
+        self.assertEqual(self.store.missing('YHOO', end, end), [])
+
+    def test_concurrent_readers(self):
+        self.share.get_historical('2013-01-01', '2013-12-31', store=self.store)
+        results = []
+
+        def read():
+            results.append(len(self.store.read('YHOO', '2013-01-01', '2013-12-31')))
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [365] * 8)
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,143 @@
+import sys
+import threading
+import time
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+from stubs import StubTransport, quote, results, symbols
+from yahoo_finance import yql
+from yahoo_finance.stream import QuoteStream, diff
+
+
+class TestQuoteStream(TestCase):
+
+    def setUp(self):
+        self._transport = yql.YQLQuery.transport
+        self.prices = {}
+        self.down = False
+        self.transport = yql.YQLQuery.transport = StubTransport(self.handler)
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+
+    def handler(self, query):
+        if self.down:
+            return {'error': {'description': 'Temporary failure'}}
+        quotes = []
+        for symbol in symbols(query):
+            item = quote(symbol)
+            if symbol in self.prices:
+                item['LastTradePriceOnly'] = self.prices[symbol]
+            quotes.append(item)
+        return results('quote', quotes)
+
+    def test_first_poll_reports_all(self):
+        stream = QuoteStream(['YHOO', 'GOOG'])
+        events = stream.poll()
+        self.assertEqual(sorted(e.symbol for e in events), ['GOOG', 'YHOO'])
+        self.assertEqual(events[0].changes['LastTradePriceOnly'], (None, '1.00'))
+        self.assertEqual(stream.shares['YHOO'].get_price(), '1.00')
+
+    def test_no_data_set(self):
+        stream = QuoteStream(['YHOO'], fields=['Volume'])
+        self.assertFalse(hasattr(stream, 'refresh'))
+        self.assertFalse(hasattr(stream, 'data_set'))
+        self.assertFalse(hasattr(stream._fetcher, 'data_set'))
+        self.assertRaises(TypeError, stream._fetcher.refresh)
+        stream.poll()
+        self.assertEqual(self.transport.queries, [
+            'select symbol, ErrorIndicationreturnedforsymbolchangedinvalid, Volume '
+            'from yahoo.finance.quotes where symbol in ("YHOO")'])
+
+    def test_changes_only(self):
+        stream = QuoteStream(['YHOO', 'GOOG', 'MSFT'], chunk_size=2)
+        stream.poll()
+        self.assertEqual(stream.poll(), [])
+        share = stream.shares['GOOG']
+        self.prices['GOOG'] = '2.00'
+        events = stream.poll()
+        self.assertEqual([(e.symbol, e.changes) for e in events],
+                         [('GOOG', {'LastTradePriceOnly': ('1.00', '2.00')})])
+        self.assertIs(events[0].share, share)
+        self.assertEqual(share.get_price(), '2.00')
+        self.assertEqual(len(self.transport.queries), 6)
+
+    def test_subscribers(self):
+        stream = QuoteStream(['YHOO'])
+        received = []
+        stream.subscribe(received.append)
+        stream.subscribe(lambda event: 1 / 0)
+        stream.poll()
+        stream.poll()
+        self.assertEqual([e.symbol for e in received], ['YHOO'])
+        self.assertEqual(stream.stats()['callback_errors'], 1)
+        stream.unsubscribe(received.append)
+        self.prices['YHOO'] = '2.00'
+        stream.poll()
+        self.assertEqual(len(received), 1)
+
+    def test_add_remove(self):
+        stream = QuoteStream(['YHOO'])
+        stream.poll()
+        stream.add('GOOG', 'YHOO')
+        self.assertEqual(stream.symbols, ['YHOO', 'GOOG'])
+        self.assertEqual([e.symbol for e in stream.poll()], ['GOOG'])
+        stream.remove('YHOO')
+        self.assertNotIn('YHOO', stream.shares)
+        stream.poll()
+        self.assertEqual(symbols(self.transport.queries[-1]), ['GOOG'])
+
+    def test_errors(self):
+        stream = QuoteStream(['YHOO', 'BADONE'])
+        self.assertEqual([e.symbol for e in stream.poll()], ['YHOO'])
+        self.assertIn('BADONE', stream.errors)
+        self.down = True
+        self.assertEqual(stream.poll(), [])
+        self.assertEqual(stream.stats()['failed_chunks'], 1)
+
+    def test_background(self):
+        stream = QuoteStream(['YHOO'], interval=0.02)
+        received = []
+        done = threading.Event()
+
+        def callback(event):
+            received.append(event)
+            if len(received) == 2:
+                done.set()
+
+        stream.subscribe(callback)
+        stream.start()
+        try:
+            time.sleep(0.1)
+            self.prices['YHOO'] = '2.00'
+            self.assertTrue(done.wait(2))
+        finally:
+            stream.stop()
+        stats = stream.stats()
+        self.assertGreater(stats['polls'], 2)
+        self.assertEqual(stats['events'], 2)
+        self.assertIsNotNone(stats['avg_latency'])
+        self.assertGreaterEqual(stats['max_lag'], 0)
+        self.assertEqual(stats['symbols'], 1)
+
+    def test_iterate(self):
+        stream = QuoteStream(['YHOO', 'GOOG'], interval=0.01)
+        events = []
+        for event in stream:
+            events.append(event)
+            if len(events) == 2:
+                self.prices['YHOO'] = '3.00'
+            if len(events) == 3:
+                break
+        self.assertEqual(events[2].changes, {'LastTradePriceOnly': ('1.00', '3.00')})
+
+    def test_diff(self):
+        self.assertEqual(diff({'a': '1', 'b': '2'}, {'a': '1', 'c': '3'}),
+                         {'b': ('2', None), 'c': (None, '3')})
+
+
+if __name__ == "__main__":
+    test_main()
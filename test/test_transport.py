@@ -0,0 +1,109 @@
+from io import BytesIO
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+try:
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import HTTPError
+
+from stubs import StubTransport
+from yahoo_finance import Base, Share, ShareBatch, yql
+from yahoo_finance.transport import RecordingTransport, ReplayTransport
+
+
+class FailingOnce(StubTransport):
+
+    def request(self, url):
+        if not self.queries:
+            self.queries.append(None)
+            raise HTTPError(url, 503, 'Unavailable', {}, BytesIO(b'busy'))
+        return super(FailingOnce, self).request(url)
+
+
+class TestRecordReplay(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'responses.jsonl')
+        self._transport = yql.YQLQuery.transport
+        # any request reaching the default transport fails the test
+        yql.YQLQuery.transport = None
+
+    def tearDown(self):
+        yql.YQLQuery.transport = self._transport
+        shutil.rmtree(self.dir)
+
+    def record(self, transport=None):
+        recorder = RecordingTransport(self.path, transport or StubTransport())
+        share = Share('YHOO', transport=recorder)
+        history = share.get_historical('2012-04-25', '2014-04-29')
+        return share, history
+
+    def test_replay(self):
+        share, history = self.record()
+        replay = ReplayTransport(self.path)
+        self.assertEqual(len(replay), 4)
+        replayed = Share('YHOO', transport=replay)
+        self.assertEqual(replayed.data_set, share.data_set)
+        self.assertEqual(replayed.get_historical('2012-04-25', '2014-04-29'), history)
+        self.assertEqual(replay.requests, 4)
+
+    def test_query_normalized(self):
+        self.record()
+        replay = ReplayTransport(self.path)
+        query = 'select * from yahoo.finance.historicaldata where symbol = "YHOO" and ' \
+                'endDate="2014-04-29"   and startDate="2013-04-29"'
+        response = yql.YQLQuery(replay).execute(query)
+        self.assertEqual(response['query']['count'], 366)
+
+    def test_errors_replayed_in_order(self):
+        Share('YHOO', transport=RecordingTransport(self.path, FailingOnce()))
+        query = yql.YQLQuery(ReplayTransport(self.path))
+        query.retry = None
+        yql_query = 'select * from yahoo.finance.quotes where symbol = "YHOO"'
+        self.assertRaises(HTTPError, query.execute, yql_query)
+        for _ in range(2):
+            response = query.execute(yql_query)
+            self.assertEqual(response['query']['results']['quote']['symbol'], 'YHOO')
+
+    def test_missing(self):
+        self.record()
+        replay = ReplayTransport(self.path)
+        self.assertRaises(KeyError, Share, 'GOOG', transport=replay)
+
+    def test_latency(self):
+        self.record()
+        replay = ReplayTransport(self.path, latency=0.05)
+        start = time.time()
+        Share('YHOO', transport=replay)
+        self.assertGreaterEqual(time.time() - start, 0.05)
+
+    def test_default_transport(self):
+        self.record()
+        replay = ReplayTransport(self.path)
+        Base.transport = replay
+        try:
+            share = Share('YHOO')
+        finally:
+            Base.transport = None
+        self.assertEqual(share.get_price(), '1.00')
+        self.assertEqual(replay.requests, 1)
+
+    def test_batch(self):
+        ShareBatch(['YHOO', 'GOOG'], transport=RecordingTransport(self.path, StubTransport()))
+        batch = Share.bulk(['YHOO', 'GOOG'], transport=ReplayTransport(self.path))
+        self.assertEqual(batch['GOOG'].get_price(), '1.00')
+        self.assertIs(batch['GOOG'].transport, batch.transport)
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,104 @@
+import multiprocessing
+import sys
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, SkipTest, TestCase
+else:
+    from unittest import main as test_main, SkipTest, TestCase
+
+from stubs import StubTransport, respond, symbols
+from yahoo_finance import Quote, Share, YQLQueryError, yql
+from yahoo_finance.universe import fetch_universe, iter_universe
+
+
+def handler(query):
+    if 'FAIL' in symbols(query):
+        return {'error': {'description': 'Temporary failure'}}
+    if 'CRASH' in symbols(query):
+        raise ValueError('Unexpected')
+    return respond(query)
+
+
+class TestFetchUniverse(TestCase):
+
+    mode = 'thread'
+
+    def setUp(self):
+        self.transport = StubTransport(handler)
+        self.symbols = ['S%03d' % i for i in range(50)]
+
+    def fetch(self, symbols, **kwargs):
+        kwargs.setdefault('workers', 3)
+        kwargs.setdefault('shard_size', 10)
+        kwargs.setdefault('chunk_size', 5)
+        kwargs.setdefault('mode', self.mode)
+        return fetch_universe(symbols, transport=self.transport, **kwargs)
+
+    def test_shares(self):
+        shares, errors = self.fetch(self.symbols + ['S000'])
+        self.assertEqual(sorted(shares), self.symbols)
+        self.assertEqual(errors, {})
+        share = shares['S007']
+        self.assertIsInstance(share, Share)
+        self.assertIsInstance(share.data_set, Quote)
+        self.assertEqual(share.get_price(), '1.00')
+        self.assertEqual(share.get_trade_datetime(), '2014-05-26 20:00:00 UTC+0000')
+        self.assertIs(share.transport, self.transport)
+
+    def test_errors_isolated(self):
+        symbols = (self.symbols[:6] + ['FAIL'] + self.symbols[6:13] + ['CRASH'] +
+                   self.symbols[13:20] + ['BAD1'])
+        shares, errors = self.fetch(symbols, shard_size=8, chunk_size=4)
+        # the unknown symbol alone, the chunks of the failing queries whole
+        self.assertEqual(len(errors), 1 + 4 + 4)
+        self.assertEqual(sorted(shares), sorted(set(symbols) - set(errors)))
+        self.assertIsInstance(errors['BAD1'], YQLQueryError)
+        self.assertIn('Temporary failure', str(errors['FAIL']))
+        self.assertIn('ValueError', str(errors['CRASH']))
+
+    def test_progress(self):
+        calls = []
+        self.fetch(self.symbols, progress=lambda done, total: calls.append((done, total)))
+        self.assertEqual(calls, [(10, 50), (20, 50), (30, 50), (40, 50), (50, 50)])
+
+    def test_iter_universe(self):
+        shards = list(iter_universe(self.symbols, workers=2, mode=self.mode, shard_size=20,
+                                    transport=self.transport))
+        self.assertEqual(sorted(len(shard) for shard, _, _ in shards), [10, 20, 20])
+        for shard, shares, errors in shards:
+            self.assertEqual(sorted(shares), sorted(shard))
+
+    def test_empty(self):
+        self.assertEqual(self.fetch([]), ({}, {}))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.fetch, self.symbols, mode='fiber')
+        self.assertRaises(ValueError, self.fetch, self.symbols, shard_size=0)
+
+
+class TestFetchUniverseProcesses(TestFetchUniverse):
+
+    mode = 'process'
+
+    def setUp(self):
+        # the stub transport reaches the workers only when they are forked
+        if multiprocessing.get_start_method() != 'fork':
+            raise SkipTest('Needs processes started with fork')
+        super(TestFetchUniverseProcesses, self).setUp()
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.fetch, self.symbols, mode='fiber')
+
+
+class TestConnectionPoolFork(TestCase):
+
+    def test_reset_after_fork(self):
+        pool = yql.ConnectionPool()
+        pool._idle[('http', 'localhost', 80)] = ['parent connection']
+        pool._pid = -1
+        pool.clear()
+        self.assertEqual(pool._idle, {})
+
+
+if __name__ == "__main__":
+    test_main()
@@ -1,4 +1,5 @@
 import datetime
+import os
 import sys
 
 if sys.version_info < (2, 7):
@@ -6,7 +7,26 @@ if sys.version_info < (2, 7):
 else:
     from unittest import main as test_main, SkipTest, TestCase
 
-from yahoo_finance import Currency, Share, edt_to_utc, get_date_range
+from yahoo_finance import Currency, Share, edt_to_utc, edt_to_utc_many, get_date_range, yql
+from yahoo_finance.transport import RecordingTransport, ReplayTransport
+
+# these tests need the network, unless they run from responses recorded by an earlier run:
+#   $ YAHOO_FINANCE_RECORD=test/yahoo.jsonl python -m pytest test/test_yahoo.py
+#   $ YAHOO_FINANCE_REPLAY=test/yahoo.jsonl python -m pytest test/test_yahoo.py
+_transport = None
+
+
+def setUpModule():
+    global _transport
+    _transport = yql.YQLQuery.transport
+    if os.environ.get('YAHOO_FINANCE_REPLAY'):
+        yql.YQLQuery.transport = ReplayTransport(os.environ['YAHOO_FINANCE_REPLAY'])
+    elif os.environ.get('YAHOO_FINANCE_RECORD'):
+        yql.YQLQuery.transport = RecordingTransport(os.environ['YAHOO_FINANCE_RECORD'])
+
+
+def tearDownModule():
+    yql.YQLQuery.transport = _transport
 
 
 class TestShare(TestCase):
@@ -79,6 +99,21 @@ class TestShare(TestCase):
         self.assertEqual(result, expected)
 
 
+class TestEdtToUtc(TestCase):
+
+    def test_edt_to_utc_memoized(self):
+        edt = '1/6/2015 9:30am'
+        utc = '2015-01-06 14:30:00 UTC+0000'
+        self.assertEqual(edt_to_utc(edt), utc)
+        self.assertEqual(edt_to_utc(edt), utc)
+        self.assertEqual(edt_to_utc('2015-01-06 09:30', mask='%Y-%m-%d %H:%M'), utc)
+
+    def test_edt_to_utc_many(self):
+        edt = ['5/26/2014 4:00pm', '4/21/2015 0:13am', '5/26/2014 4:00pm', '1/6/2015 9:30am']
+        self.assertEqual(edt_to_utc_many(edt), [edt_to_utc(e) for e in edt])
+        self.assertEqual(edt_to_utc_many([]), [])
+
+
 class TestCurrency(TestCase):
 
     def setUp(self):
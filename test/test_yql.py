@@ -0,0 +1,259 @@
+import sys
+import threading
+import time
+import zlib
+
+if sys.version_info < (2, 7):
+    from unittest2 import main as test_main, TestCase
+else:
+    from unittest import main as test_main, TestCase
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from urllib.error import HTTPError
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from urllib2 import HTTPError
+
+from yahoo_finance import yql
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        body = b'{"query": {"results": {"quote": {"symbol": "YHOO"}}}}'
+        status = 500 if self.path.startswith('/error') else 200
+        if self.server.schedule:
+            status = self.server.schedule.pop(0)
+        self.server.requests += 1
+        self.send_response(status)
+        if status == 429 and self.server.retry_after is not None:
+            self.send_header('Retry-After', str(self.server.retry_after))
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServerTestCase(TestCase):
+
+    def setUp(self):
+        # failures of other tests must not leave the shared circuit open
+        self._breaker, yql.YQLQuery.breaker = yql.YQLQuery.breaker, yql.CircuitBreaker()
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.schedule = []
+        self.httpd.retry_after = None
+        self.url = 'http://127.0.0.1:%d/' % self.httpd.server_address[1]
+        thread = threading.Thread(target=self.httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        yql.YQLQuery.breaker = self._breaker
+
+
+class TestConnectionPool(LocalServerTestCase):
+
+    def test_reuses_connection(self):
+        pool = yql.ConnectionPool()
+        for _ in range(3):
+            self.assertIn(b'YHOO', pool.request(self.url))
+        self.assertEqual(self.httpd.connections, 1)
+        pool.clear()
+
+    def test_no_reuse(self):
+        pool = yql.ConnectionPool(maxsize=0, gzip=False)
+        for _ in range(2):
+            self.assertIn(b'YHOO', pool.request(self.url))
+        self.assertEqual(self.httpd.connections, 2)
+
+    def test_http_error(self):
+        pool = yql.ConnectionPool()
+        with self.assertRaises(HTTPError) as cm:
+            pool.request(self.url + 'error')
+        self.assertEqual(cm.exception.code, 500)
+        pool.clear()
+
+    def test_query_uses_transport(self):
+        pool = yql.ConnectionPool()
+        url, yql.PUBLIC_API_URL = yql.PUBLIC_API_URL, self.url
+        try:
+            response = yql.YQLQuery(pool).execute('select * from yahoo.finance.quotes')
+        finally:
+            yql.PUBLIC_API_URL = url
+            pool.clear()
+        self.assertEqual(response['query']['results']['quote']['symbol'], 'YHOO')
+
+
+class TestResilience(LocalServerTestCase):
+
+    def setUp(self):
+        super(TestResilience, self).setUp()
+        self.pool = yql.ConnectionPool()
+        self.query = yql.YQLQuery(self.pool)
+        self.query.retry = yql.Retry(retries=3, backoff=0.01)
+        self.query.breaker = yql.CircuitBreaker(failures=2, reset_timeout=60)
+        self._url, yql.PUBLIC_API_URL = yql.PUBLIC_API_URL, self.url
+
+    def tearDown(self):
+        yql.PUBLIC_API_URL = self._url
+        self.pool.clear()
+        super(TestResilience, self).tearDown()
+
+    def execute(self):
+        return self.query.execute('select * from yahoo.finance.quotes')
+
+    def test_retried(self):
+        self.httpd.schedule = [503, 502, 429]
+        self.assertIn('query', self.execute())
+        self.assertEqual(self.httpd.requests, 4)
+        self.assertEqual(self.query.breaker.state, 'closed')
+
+    def test_retries_exhausted(self):
+        self.httpd.schedule = [500] * 5
+        with self.assertRaises(HTTPError) as cm:
+            self.execute()
+        self.assertEqual(cm.exception.code, 500)
+        self.assertEqual(self.httpd.requests, 4)
+
+    def test_not_retried(self):
+        self.httpd.schedule = [404]
+        self.assertRaises(HTTPError, self.execute)
+        self.assertEqual(self.httpd.requests, 1)
+        self.assertEqual(self.query.breaker.consecutive_failures, 0)
+
+    def test_retry_after(self):
+        self.httpd.schedule = [429]
+        self.httpd.retry_after = 0.3
+        start = time.time()
+        self.execute()
+        self.assertGreaterEqual(time.time() - start, 0.3)
+
+    def test_retry_after_pauses_limiter(self):
+        self.query.limiter = yql.TokenBucket(rate=1000, burst=10)
+        self.httpd.schedule = [429]
+        self.httpd.retry_after = 0.3
+        start = time.time()
+        self.execute()
+        self.execute()
+        self.assertGreaterEqual(time.time() - start, 0.3)
+        self.assertEqual(self.httpd.requests, 3)
+
+    def test_circuit_breaker(self):
+        self.query.retry = None
+        self.httpd.schedule = [500, 503]
+        self.assertRaises(HTTPError, self.execute)
+        self.assertRaises(HTTPError, self.execute)
+        self.assertEqual(self.query.breaker.state, 'open')
+        with self.assertRaises(yql.YQLCircuitOpenError) as cm:
+            self.execute()
+        self.assertIsInstance(cm.exception, EnvironmentError)
+        self.assertEqual(self.httpd.requests, 2)
+
+    def test_circuit_breaker_half_open(self):
+        now = [0]
+        breaker = self.query.breaker = yql.CircuitBreaker(failures=1, reset_timeout=10,
+                                                          clock=lambda: now[0])
+        self.query.retry = None
+        self.httpd.schedule = [500, 500]
+        self.assertRaises(HTTPError, self.execute)
+        now[0] = 11
+        self.assertEqual(breaker.state, 'half-open')
+        # the trial request fails, the circuit opens again
+        self.assertRaises(HTTPError, self.execute)
+        self.assertRaises(yql.YQLCircuitOpenError, self.execute)
+        now[0] = 22
+        self.assertIn('query', self.execute())
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(self.httpd.requests, 3)
+
+    def test_circuit_breaker_trial_interrupted(self):
+        now = [0]
+        breaker = self.query.breaker = yql.CircuitBreaker(failures=1, reset_timeout=10,
+                                                          clock=lambda: now[0])
+        self.httpd.schedule = [500]
+        self.query.retry = None
+        self.assertRaises(HTTPError, self.execute)
+        now[0] = 11
+
+        class Interrupted(object):
+            def request(self, url):
+                raise KeyboardInterrupt
+
+        self.query.transport = Interrupted()
+        self.assertRaises(KeyboardInterrupt, self.execute)
+        # counted as a failed trial, the next one is let through after the timeout
+        self.assertEqual(breaker.state, 'open')
+        self.query.transport = self.pool
+        now[0] = 22
+        self.assertIn('query', self.execute())
+        self.assertEqual(breaker.state, 'closed')
+
+
+class TestTokenBucket(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.waits = []
+        self.bucket = yql.TokenBucket(rate=10, burst=2, clock=lambda: self.now,
+                                      sleep=self.waits.append)
+
+    def test_rate(self):
+        for _ in range(4):
+            self.bucket.acquire()
+        self.assertEqual(self.waits, [0.1, 0.2])
+
+    def test_refill(self):
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.now = 10
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.assertEqual(self.waits, [])
+
+    def test_pause(self):
+        self.bucket.pause(5)
+        self.bucket.acquire()
+        self.assertEqual(self.waits, [5])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, yql.TokenBucket, rate=0)
+
+
+class TestRetry(TestCase):
+
+    def test_delay(self):
+        retry = yql.Retry(retries=4, backoff=1, max_backoff=3, jitter=False)
+        error = HTTPError('url', 503, 'Unavailable', {}, None)
+        self.assertEqual([retry.delay(i, error) for i in range(5)], [1, 2, 3, 3, None])
+        self.assertIsNone(retry.delay(0, HTTPError('url', 400, 'Bad', {}, None)))
+        self.assertIsNone(retry.delay(0, ValueError()))
+        self.assertEqual(retry.delay(0, yql.URLError('down')), 1)
+
+    def test_jitter(self):
+        retry = yql.Retry(backoff=1)
+        error = HTTPError('url', 503, 'Unavailable', {'Retry-After': '2'}, None)
+        delays = [retry.delay(1, yql.URLError('down')) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= 2 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertGreaterEqual(retry.delay(0, error), 2)
+
+
+if __name__ == "__main__":
+    test_main()
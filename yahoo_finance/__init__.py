@@ -1,29 +1,109 @@
 import yahoo_finance.yql
-
+from yahoo_finance.yql import YQLCircuitOpenError
+from yahoo_finance.frame import HistoricalFrame
+from yahoo_finance.metrics import clock, current
+from yahoo_finance.planner import build_query, date_windows
+from yahoo_finance.quote import Quote, YQLFieldNotRequestedError, parse_number
+from yahoo_finance.singleflight import SingleFlight
+
+from collections import deque
 from datetime import datetime, timedelta
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+import weakref
+
 import pytz
 
 __author__ = 'Lukasz Banasiak'
 __version__ = '1.4.0'
-__all__ = ['Currency', 'Share']
+__all__ = ['Currency', 'HistoricalFrame', 'Quote', 'Share', 'ShareBatch', 'YQLCircuitOpenError',
+           'YQLFieldNotRequestedError']
+
+# number of symbols sent in a single `symbol in (...)` query
+BATCH_CHUNK_SIZE = 100
+# number of date windows of `Share.get_historical` fetched at once
+HISTORICAL_MAX_WORKERS = 4
+# times a date window of `Share.get_historical` failed by YQL is fetched again
+HISTORICAL_RETRIES = 2
+# stored days fetched again by `Share.extend_historical` to detect split or dividend revisions
+HISTORICAL_OVERLAP = 5
+
+# lazy objects not fetched yet, fetched together when one of them is first used
+_pending = weakref.WeakSet()
+_pending_lock = threading.Lock()
+
+
+class _Processed(object):
+    # results given to a constructor by `Base.from_data_set`, not processed again
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+# converted dates remembered by `edt_to_utc`, quotes of one refresh share a few of them
+EDT_TO_UTC_CACHE_SIZE = 4096
+
+_eastern = pytz.timezone('US/Eastern')
+_edt_to_utc_cache = {}
+
+
+def _edt_to_utc(date, mask):
+    # date string for yahoo can contains 0 rather than 12.
+    # This means that it cannot be parsed with %I see GH issue #15.
+    date_ = datetime.strptime(date.replace(" 0:", " 12:"), mask)
+    date_eastern = _eastern.localize(date_, is_dst=None)
+    date_utc = date_eastern.astimezone(pytz.utc)
+    return date_utc.strftime('%Y-%m-%d %H:%M:%S %Z%z')
 
 
 def edt_to_utc(date, mask='%m/%d/%Y %I:%M%p'):
     """
     Convert EDT (Eastern Daylight Time) to UTC
 
+    Results are memoized, as quotes fetched together mostly share their trade time.
+
     :param date: EDT date string e.g. '5/26/2014 4:00pm'
     :param mask: format of input date e.g '%m/%d/%Y %I:%M%'
     :return: UTC date string e.g '2014-03-05 12:23:00 UTC+0000'
     """
-    utc = pytz.utc
-    eastern = pytz.timezone('US/Eastern')
-    # date string for yahoo can contains 0 rather than 12.
-    # This means that it cannot be parsed with %I see GH issue #15.
-    date_ = datetime.strptime(date.replace(" 0:", " 12:"), mask)
-    date_eastern = eastern.localize(date_, is_dst=None)
-    date_utc = date_eastern.astimezone(utc)
-    return date_utc.strftime('%Y-%m-%d %H:%M:%S %Z%z')
+    key = (date, mask)
+    try:
+        return _edt_to_utc_cache[key]
+    except KeyError:
+        pass
+    result = _edt_to_utc(date, mask)
+    if len(_edt_to_utc_cache) >= EDT_TO_UTC_CACHE_SIZE:
+        _edt_to_utc_cache.clear()
+    _edt_to_utc_cache[key] = result
+    return result
+
+
+def edt_to_utc_many(dates, mask='%m/%d/%Y %I:%M%p'):
+    """
+    Convert many EDT date strings to UTC, each distinct string is converted once
+
+    :param dates: iterable of EDT date strings e.g. ['5/26/2014 4:00pm']
+    :param mask: format of input dates e.g '%m/%d/%Y %I:%M%'
+    :return: list of UTC date strings in the order of `dates`
+    """
+    converted = {}
+    results = []
+    for date in dates:
+        result = converted.get(date)
+        if result is None:
+            result = converted[date] = _edt_to_utc(date, mask)
+        results.append(result)
+    return results
+
+
+def _revised(old, new):
+    """Whether an `Adj_Close` value changed, ignoring how the number is written"""
+    if old == new:
+        return False
+    old, new = parse_number(old), parse_number(new)
+    return not abs(old - new) <= 1e-9 * max(abs(old), abs(new))
 
 
 def get_date_range(start_day, end_day, step_days=365, mask='%Y-%m-%d'):
@@ -41,18 +121,8 @@ def get_date_range(start_day, end_day, step_days=365, mask='%Y-%m-%d'):
     :param step_days: step days
     :param mask: format of input date e.g '%Y-%m-%d'
     """
-
-    start = datetime.strptime(start_day, mask)
-    end = datetime.strptime(end_day, mask)
-    if start > end:
-        raise ValueError('Start date "%s" is greater than "%s"' % (start_day, end_day))
-    step = timedelta(days=step_days)
-    while end - step > start:
-        current = end - step
-        yield current.strftime(mask), end.strftime(mask)
-        end = current - timedelta(days=1)
-    else:
-        yield start.strftime(mask), end.strftime(mask)
+    for window in date_windows(start_day, end_day, step_days + 1, mask):
+        yield window
 
 
 class YQLQueryError(Exception):
@@ -70,24 +140,168 @@ class YQLResponseMalformedError(Exception):
         return 'Response malformed.'
 
 
+class YQLNoResultsError(YQLResponseMalformedError):
+
+    def __str__(self):
+        return 'Query returned no results.'
+
+
+class YQLHistoricalWindowError(YQLQueryError):
+
+    def __init__(self, start_date, end_date, value):
+        super(YQLHistoricalWindowError, self).__init__(value)
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def __str__(self):
+        return 'Historical data from %s to %s failed with error: "%s".' % (
+            self.start_date, self.end_date, self.value)
+
+
 class Base(object):
 
-    def __init__(self, symbol):
+    _table = ''
+    _key = ''
+    # result keys holding the symbol, matching results of `in (...)` queries to symbols
+    _id_keys = ()
+    # result keys selected by every projected query
+    _required_fields = ()
+    # fields added by `_process` and the result keys they are computed from
+    _derived_fields = {}
+    # cache of query results used by all objects, e.g. `yahoo_finance.cache.ResponseCache`
+    cache = None
+    # transport of queries used by all objects, None uses `yql.YQLQuery.transport`
+    transport = None
+    # coalescing of concurrent identical queries used by all objects, None disables it
+    flight = SingleFlight()
+    # fetch data when first used rather than in the constructor
+    lazy = False
+    # seconds after which data is refreshed when used again, None keeps it until `refresh`
+    max_age = None
+    # timings and counters of all objects, e.g. `yahoo_finance.metrics.Metrics`, None disables them
+    metrics = None
+    # fields queried, None selects all of them
+    fields = None
+
+    def __init__(self, symbol, cache=None, lazy=None, max_age=None, transport=None, fields=None):
         self.symbol = symbol
-        self._table = ''
-        self._key = ''
+        if fields is not None:
+            self.fields = tuple(fields)
+        if cache is not None:
+            self.cache = cache
+        if transport is not None:
+            self.transport = transport
+        if lazy is not None:
+            self.lazy = lazy
+        if max_age is not None:
+            self.max_age = max_age
+        self._data_set = None
+        self.fetched_at = None
+
+    @classmethod
+    def from_data_set(cls, symbol, data_set=None, **kwargs):
+        """
+        Object holding results already processed, e.g. by a worker process, no query is made
+
+        Without `data_set` the object is only used to query, data is fetched when first used.
+
+        :param symbol: e.g. 'YHOO'
+        :param data_set: results processed by an object of the same class and fields
+        :param kwargs: other arguments of the constructor, e.g. transport
+        """
+        return cls(symbol, data_set=_Processed(data_set), **kwargs)
 
-    def _prepare_query(self, table='quotes', key='symbol', **kwargs):
+    def _set_data(self, data_set):
+        # results given to a constructor
+        if isinstance(data_set, _Processed):
+            if data_set.data is not None:
+                self.data_set = data_set.data
+        else:
+            self.data_set = self._post_process(data_set)
+
+    def _init_data(self, data_set):
+        # shared tail of the `Share` and `Currency` constructors
+        if data_set is not None:
+            self._set_data(data_set)
+        elif self.lazy:
+            with _pending_lock:
+                _pending.add(self)
+        else:
+            self.refresh()
+
+    @property
+    def data_set(self):
+        """
+        Results of the last query, fetched first if the object is lazy or data is older than `max_age`
+
+        """
+        if self._data_set is None:
+            self._load()
+        elif self.max_age is not None and time.time() - self.fetched_at > self.max_age:
+            self.refresh()
+        return self._data_set
+
+    @data_set.setter
+    def data_set(self, value):
+        self._data_set = value
+        self.fetched_at = time.time()
+
+    def _load(self):
+        """
+        Fetch data of a lazy object together with all other lazy objects of its kind not fetched yet
+
+        """
+        cls = type(self)
+        with _pending_lock:
+            group = [o for o in _pending if type(o) is cls and o.cache is self.cache and
+                     o.transport is self.transport and o.fields == self.fields]
+            for o in group:
+                _pending.discard(o)
+        if len(group) < 2:
+            self.refresh()
+            return
+        objects = {}
+        for o in group:
+            objects.setdefault(o.symbol, []).append(o)
+        symbols = sorted(objects)
+        error = None
+        try:
+            for i in range(0, len(symbols), BATCH_CHUNK_SIZE):
+                data, errors = self._fetch_chunk(symbols[i:i + BATCH_CHUNK_SIZE])
+                for symbol, results in data.items():
+                    for o in objects.pop(symbol):
+                        o.data_set = o._post_process(dict(results))
+                if self.symbol in errors:
+                    error = errors[self.symbol]
+        finally:
+            # objects left are fetched on their own when used
+            with _pending_lock:
+                for remaining in objects.values():
+                    for o in remaining:
+                        if o._data_set is None and o is not self:
+                            _pending.add(o)
+        if error is not None:
+            raise error
+        if self._data_set is None:
+            self.refresh()
+
+    def _prepare_query(self, table='quotes', key='symbol', symbols=None, columns=None, **kwargs):
         """
         Simple YQL query bulder
 
+        :param symbols: list of symbols queried with `in (...)` instead of `self.symbol`
+        :param columns: result keys selected instead of `*`
         """
-        query = 'select * from yahoo.finance.{table} where {key} = "{symbol}"'.format(
-            symbol=self.symbol, table=table, key=key)
-        if kwargs:
-            query += ''.join(' and {0}="{1}"'.format(k, v)
-                             for k, v in kwargs.items())
-        return query
+        if self.metrics is not None:
+            start = clock()
+            query = self._build_query(table, key, symbols, columns, kwargs)
+            self.metrics.observe(table, 'build', clock() - start)
+            return query
+        return self._build_query(table, key, symbols, columns, kwargs)
+
+    def _build_query(self, table, key, symbols, columns, kwargs):
+        return build_query(table, key, self.symbol if symbols is None else symbols, columns,
+                           kwargs.items())
 
     @staticmethod
     def _is_error_in_results(results):
@@ -114,25 +328,188 @@ class Base(object):
                     if 'N/A' in v:
                         results[k] = None
 
-    def _request(self, query):
-        response = yql.YQLQuery().execute(query)
+    @staticmethod
+    def _clean(results):
+        """
+        Find an `Error*` key and change N/A values to None in a single pass
+
+        Does what `_is_error_in_results` and `_change_incorrect_none` do.
+
+        :return: value of the first `Error*` key, False without one
+        """
+        # check if response is dictionary, skip if it is different e.g. list from `get_historical()`
+        if not isinstance(results, dict):
+            return None
+        error = False
+        checked = False
+        for k, v in results.items():
+            if not checked and 'Error' in k:
+                error = v
+                checked = True
+            if v and 'N/A' in v:
+                results[k] = None
+        return error
+
+    def _parse(self, response):
+        """
+        Get results from a decoded YQL response
+
+        :raises YQLQueryError: when the query or a symbol is not valid
+        :raises YQLNoResultsError: when the query matched nothing, e.g. dates without trading
+        :raises YQLResponseMalformedError: when the response has no results
+        """
         try:
             _, results = response['query']['results'].popitem()
         except (KeyError, StopIteration, AttributeError):
             try:
                 raise YQLQueryError(response['error']['description'])
             except KeyError:
+                if response.get('query', {}).get('count') == 0:
+                    raise YQLNoResultsError()
                 raise YQLResponseMalformedError()
         else:
-            if self._is_error_in_results(results):
-                raise YQLQueryError(self._is_error_in_results(results))
-            self._change_incorrect_none(results)
+            error = self._clean(results)
+            if error:
+                raise YQLQueryError(error)
             return results
 
+    def _request(self, query):
+        if self.metrics is not None:
+            return self.metrics.measure(query, self._cached_request, query)
+        return self._cached_request(query)
+
+    def _cached_request(self, query):
+        cache = self.cache if self.cache is not False else None
+        results = cache.get(query) if cache is not None else None
+        if cache is not None and self.metrics is not None:
+            current().count('cache_hits' if results is not None else 'cache_misses')
+        if results is None:
+            if self.flight is not None:
+                results = self.flight.do((query, self.transport), self._execute, query, cache)
+            else:
+                results = self._execute(query, cache)
+        return results
+
+    def _execute(self, query, cache):
+        response = yql.YQLQuery(self.transport).execute(query)
+        scope = current()
+        if scope is None:
+            results = self._parse(response)
+        else:
+            start = clock()
+            results = self._parse(response)
+            scope.time('validate', clock() - start)
+        if cache is not None:
+            cache.set(query, results)
+        return results
+
+    @staticmethod
+    def _historical_rows(result):
+        # a single day comes back as a dictionary rather than a list
+        if isinstance(result, dict):
+            return [result]
+        return result
+
+    def _fetch_window(self, query, start_date, end_date, retries):
+        """
+        Rows of a historicaldata query for one date window, fetched again when YQL fails
+
+        Transport errors were already retried by `yql.YQLQuery.retry`, they are
+        raised as they are, like `YQLCircuitOpenError`.
+
+        :param retries: times a query is fetched again after a YQL error
+        :raises YQLHistoricalWindowError: when all attempts failed
+        """
+        for attempt in range(retries + 1):
+            try:
+                return self._historical_rows(self._request(query))
+            except YQLNoResultsError:
+                return []
+            except (YQLQueryError, YQLResponseMalformedError) as e:
+                error = e
+        raise YQLHistoricalWindowError(start_date, end_date, error)
+
+    def _process(self, data):
+        """
+        Post-process results of a query before they are stored in `data_set`
+
+        """
+        return data
+
+    def _columns(self):
+        """
+        Result keys selected for `fields`
+
+        :return: list, None to select all of them
+        """
+        if self.fields is None:
+            return None
+        columns = []
+        for field in self._required_fields + self.fields:
+            for column in self._derived_fields.get(field, (field,)):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def _project(self, data):
+        """
+        Keep only the requested fields of results, e.g. when the server ignored the projection
+
+        """
+        if self.fields is None:
+            return data
+        return dict((k, v) for k, v in data.items() if k in self.fields or k in self._required_fields)
+
+    def _post_process(self, data):
+        # `_process` timed when metrics are enabled
+        if self.metrics is None:
+            return self._process(data)
+        start = clock()
+        data = self._process(data)
+        self.metrics.observe(self._table, 'process', clock() - start)
+        return data
+
     def _fetch(self):
-        query = self._prepare_query(table=self._table, key=self._key)
+        query = self._prepare_query(table=self._table, key=self._key, columns=self._columns())
         data = self._request(query)
-        return data
+        return self._post_process(data)
+
+    def _fetch_chunk(self, symbols):
+        """
+        Fetch results of many symbols with one `in (...)` query
+
+        :param symbols: list of symbols
+        :return: tuple of dicts ({symbol: results}, {symbol: YQLQueryError})
+        """
+        query = self._prepare_query(table=self._table, key=self._key, symbols=symbols,
+                                    columns=self._columns())
+        try:
+            results = self._request(query)
+        except YQLQueryError as e:
+            # a single quote is validated by `_request` itself
+            if len(symbols) > 1:
+                raise
+            return {}, {symbols[0]: e}
+        if isinstance(results, dict):
+            results = [results]
+        requested = dict((s.upper(), s) for s in symbols)
+        data, errors = {}, {}
+        for i, item in enumerate(results):
+            returned = next((item[k] for k in self._id_keys if item.get(k)), '')
+            symbol = requested.get(returned.upper())
+            if symbol is None:
+                if len(results) != len(symbols):
+                    continue
+                symbol = symbols[i]
+            error = self._clean(item)
+            if error:
+                errors[symbol] = YQLQueryError(error)
+            else:
+                data[symbol] = item
+        for symbol in symbols:
+            if symbol not in data and symbol not in errors:
+                errors[symbol] = YQLQueryError('No data returned for symbol "%s"' % symbol)
+        return data, errors
 
     def refresh(self):
         """
@@ -144,17 +521,22 @@ class Base(object):
 
 class Currency(Base):
 
-    def __init__(self, symbol):
-        super(Currency, self).__init__(symbol)
-        self._table = 'xchange'
-        self._key = 'pair'
-        self.refresh()
+    _table = 'xchange'
+    _key = 'pair'
+    _id_keys = ('id',)
+    _required_fields = ('id',)
+    _derived_fields = {'DateTimeUTC': ('Date', 'Time')}
 
-    def _fetch(self):
-        data = super(Currency, self)._fetch()
-        if data['Date'] and data['Time']:
+    def __init__(self, symbol, data_set=None, cache=None, lazy=None, max_age=None,
+                 transport=None):
+        super(Currency, self).__init__(symbol, cache=cache, lazy=lazy, max_age=max_age,
+                                       transport=transport)
+        self._init_data(data_set)
+
+    def _process(self, data):
+        if data.get('Date') and data.get('Time'):
             data[u'DateTimeUTC'] = edt_to_utc('{0} {1}'.format(data['Date'], data['Time']))
-        return data
+        return self._project(data)
 
     def get_bid(self):
         return self.data_set['Bid']
@@ -171,17 +553,55 @@ class Currency(Base):
 
 class Share(Base):
 
-    def __init__(self, symbol):
-        super(Share, self).__init__(symbol)
-        self._table = 'quotes'
-        self._key = 'symbol'
-        self.refresh()
+    _table = 'quotes'
+    _key = 'symbol'
+    _id_keys = ('symbol', 'Symbol')
+    _required_fields = ('symbol', 'ErrorIndicationreturnedforsymbolchangedinvalid')
+    _derived_fields = {'LastTradeDateTimeUTC': ('LastTradeDate', 'LastTradeTime')}
+    # historical prices store used by all shares, e.g. `yahoo_finance.store.HistoricalStore`
+    store = None
+    # rows kept by `extend_historical`, oldest day first
+    history = None
+    # latest stored day whose `Adj_Close` was revised by the last `extend_historical`
+    history_revised = None
+
+    def __init__(self, symbol, data_set=None, cache=None, lazy=None, max_age=None,
+                 transport=None, fields=None):
+        """
+        :param symbol: e.g. 'YHOO'
+        :param data_set: results of an earlier query, skips the initial refresh
+        :param cache: cache of query results replacing `Base.cache`, False disables caching
+        :param lazy: replaces `Base.lazy`, when True data is fetched when first used
+        :param max_age: replaces `Base.max_age`, seconds after which data is refreshed when used
+        :param transport: transport of queries replacing `Base.transport`, see `yql.Transport`
+        :param fields: quote fields queried e.g. ['LastTradePriceOnly', 'Volume'], None for all;
+                       others raise `YQLFieldNotRequestedError`
+        """
+        super(Share, self).__init__(symbol, cache=cache, lazy=lazy, max_age=max_age,
+                                    transport=transport, fields=fields)
+        self._init_data(data_set)
 
-    def _fetch(self):
-        data = super(Share, self)._fetch()
-        if data['LastTradeDate'] and data['LastTradeTime']:
+    @classmethod
+    def bulk(cls, symbols, chunk_size=BATCH_CHUNK_SIZE, cache=None, transport=None, fields=None):
+        """
+        Get quotes for many symbols using one query per `chunk_size` symbols
+
+        :param symbols: iterable of symbols e.g. ['YHOO', 'GOOG']
+        :param chunk_size: number of symbols sent in a single query
+        :param cache: cache of query results replacing `Base.cache`, False disables caching
+        :param transport: transport of queries replacing `Base.transport`
+        :param fields: quote fields queried, None for all
+        :return: ShareBatch
+        """
+        return ShareBatch(symbols, chunk_size=chunk_size, cache=cache, transport=transport,
+                          fields=fields)
+
+    def _process(self, data):
+        if data.get('LastTradeDate') and data.get('LastTradeTime'):
             data[u'LastTradeDateTimeUTC'] = edt_to_utc('{0} {1}'.format(data['LastTradeDate'], data['LastTradeTime']))
-        return data
+        if self.fields is None:
+            return Quote(data)
+        return Quote(self._project(data), projected=True)
 
     def get_price(self):
         return self.data_set['LastTradePriceOnly']
@@ -327,22 +747,286 @@ class Share(Base):
     def get_year_range(self):
         return self.data_set['YearRange']
 
-    def get_historical(self, start_date, end_date):
+    def _historical_query(self, start_date, end_date):
+        return self._prepare_query(table='historicaldata', startDate=start_date, endDate=end_date)
+
+    def _fetch_historical_window(self, start_date, end_date, retries=HISTORICAL_RETRIES):
+        """
+        Get historical prices for one date window
+
+        :raises YQLHistoricalWindowError: when all attempts failed
+        """
+        return self._fetch_window(self._historical_query(start_date, end_date), start_date,
+                                  end_date, retries)
+
+    def _fetch_historical(self, start_date, end_date, max_workers, retries):
+        windows = list(get_date_range(start_date, end_date))
+
+        def fetch(window):
+            try:
+                return self._fetch_historical_window(window[0], window[1], retries), None
+            except YQLHistoricalWindowError as e:
+                return None, e
+
+        workers = min(max_workers, len(windows))
+        if workers > 1:
+            pool = ThreadPool(workers)
+            try:
+                results = pool.map(fetch, windows)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [fetch(w) for w in windows]
+        hist = []
+        for rows, error in results:
+            if error is not None:
+                raise error
+            hist.extend(rows)
+        return hist
+
+    def iter_historical(self, start_date, end_date, prefetch=1, retries=HISTORICAL_RETRIES,
+                        blocks=False):
+        """
+        Iterate over Yahoo Finance Stock historical prices as date windows arrive
+
+        Rows come in the order of `get_historical`, newest day first. At most
+        `prefetch` windows are fetched in the background while the current one
+        is consumed, so memory stays bounded for any length of range.
+
+            >>> for row in yahoo.iter_historical('1996-04-12', '2016-04-12'):
+            ...     writer.writerow(row)
+
+        :param start_date: string date in format '2009-09-11'
+        :param end_date: string date in format '2009-09-11'
+        :param prefetch: number of windows fetched ahead, 0 fetches each window when it is needed
+        :param retries: times a date window failed by YQL is fetched again
+        :param blocks: yield the list of rows of each window rather than single rows
+        :raises YQLHistoricalWindowError: when reaching a window which could not be fetched
+        """
+        windows = self._iter_historical_windows(start_date, end_date, prefetch, retries)
+        if blocks:
+            return windows
+        return (row for rows in windows for row in rows)
+
+    def _iter_historical_windows(self, start_date, end_date, prefetch, retries):
+        windows = get_date_range(start_date, end_date)
+        if prefetch < 1:
+            for start, end in windows:
+                yield self._fetch_historical_window(start, end, retries)
+            return
+        pool = ThreadPool(prefetch)
+        try:
+            pending = deque()
+            for start, end in windows:
+                pending.append(pool.apply_async(self._fetch_historical_window, (start, end, retries)))
+                if len(pending) > prefetch:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_historical(self, start_date, end_date, max_workers=HISTORICAL_MAX_WORKERS,
+                       retries=HISTORICAL_RETRIES, store=None, as_arrays=False):
         """
         Get Yahoo Finance Stock historical prices
 
+        Date windows from `get_date_range` are fetched concurrently, the list
+        is ordered from the newest day as if they were fetched one by one.
+
         :param start_date: string date in format '2009-09-11'
         :param end_date: string date in format '2009-09-11'
-        :return: list
+        :param max_workers: number of date windows fetched at once
+        :param retries: times a date window failed by YQL is fetched again
+        :param store: `yahoo_finance.store.HistoricalStore` replacing `Share.store`,
+                      only dates missing from it are fetched; False disables it
+        :param as_arrays: return a `HistoricalFrame` of typed arrays, oldest day first
+        :return: list or HistoricalFrame
+        :raises YQLHistoricalWindowError: for the newest window which could not be fetched
         """
-        hist = []
-        for s, e in get_date_range(start_date, end_date):
-            try:
-                query = self._prepare_query(table='historicaldata', startDate=s, endDate=e)
-                result = self._request(query)
-                if isinstance(result, dict):
-                    result = [result]
-                hist.extend(result)
-            except AttributeError:
-                pass
+        if store is None:
+            store = self.store
+        if store is None or store is False:
+            hist = self._fetch_historical(start_date, end_date, max_workers, retries)
+        else:
+            if start_date > end_date:
+                raise ValueError('Start date "%s" is greater than "%s"' % (start_date, end_date))
+            for start, end in store.missing(self.symbol, start_date, end_date):
+                rows = self._fetch_historical(start, end, max_workers, retries)
+                store.write(self.symbol, start, end, rows)
+            hist = store.read(self.symbol, start_date, end_date)
+        if as_arrays:
+            return HistoricalFrame.from_rows(hist, self.symbol)
         return hist
+
+    def extend_historical(self, start_date=None, end_date=None, overlap=HISTORICAL_OVERLAP,
+                          max_workers=HISTORICAL_MAX_WORKERS, retries=HISTORICAL_RETRIES):
+        """
+        Keep historical prices in `history` up to date with only the days missing from it
+
+        The first call fetches `start_date` to `end_date`. Later calls fetch the
+        days after the last stored one together with the last `overlap` stored
+        days, and append the new rows to `history` in place. A split or dividend
+        rescales `Adj_Close` of every day before it, so when an overlap day
+        differs the stored days before the overlap are fetched again and
+        replaced, and `history_revised` is set to the latest revised day.
+
+            >>> yahoo.extend_historical('2014-01-01', '2014-04-25')
+            >>> new_rows = yahoo.extend_historical(end_date='2014-04-29')
+
+        :param start_date: string date in format '2009-09-11', needed by the first call only
+        :param end_date: string date in format '2009-09-11', today by default
+        :param overlap: number of stored days fetched again to detect revisions, 0 fetches
+                        only the new days and never detects them
+        :param max_workers: number of date windows fetched at once
+        :param retries: times a date window failed by YQL is fetched again
+        :return: list of days added after the last stored one, oldest day first
+        :raises YQLHistoricalWindowError: when a date window could not be fetched,
+                                          `history` and `history_revised` are left unchanged
+        """
+        if overlap < 0:
+            raise ValueError('Overlap must not be negative, got %r' % overlap)
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        history = self.history
+        if not history:
+            if start_date is None:
+                raise ValueError('start_date is needed before any historical prices are stored')
+            rows = self._fetch_historical(start_date, end_date, max_workers, retries)
+            rows.reverse()
+            self.history = rows
+            self.history_revised = None
+            return rows[:]
+        last = history[-1]['Date']
+        if end_date <= last:
+            self.history_revised = None
+            return []
+        if not overlap:
+            after = (datetime.strptime(last, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            added = self._fetch_historical(after, end_date, max_workers, retries)
+            added.reverse()
+            history.extend(added)
+            self.history_revised = None
+            return added
+        first = max(len(history) - overlap, 0)
+        rows = self._fetch_historical(history[first]['Date'], end_date, max_workers, retries)
+        rows.reverse()
+        added = [row for row in rows if row['Date'] > last]
+        fetched = dict((row['Date'], row['Adj_Close']) for row in rows if row['Date'] <= last)
+        revised = None
+        for row in reversed(history[first:]):
+            date = row['Date']
+            if date in fetched and _revised(row['Adj_Close'], fetched[date]):
+                revised = date
+                break
+        if revised is not None:
+            if first:
+                older = self._fetch_historical(
+                    history[0]['Date'], history[first - 1]['Date'], max_workers, retries)
+                older.reverse()
+                history[:first] = older
+                first = len(older)
+            history[first:] = rows
+        else:
+            history.extend(added)
+        self.history_revised = revised
+        return added
+
+
+class _Fetcher(Base):
+    """
+    Queries of many symbols at once on behalf of another object, it has no data set of its own
+
+    :param kind: class whose table and result keys are queried e.g. `Share`, None keeps the
+                 ones of the subclass
+    """
+
+    def __init__(self, kind=None, cache=None, transport=None, fields=None):
+        super(_Fetcher, self).__init__(None, cache=cache, transport=transport, fields=fields)
+        if kind is not None:
+            self._table = kind._table
+            self._key = kind._key
+            self._id_keys = kind._id_keys
+            self._required_fields = kind._required_fields
+            self._derived_fields = kind._derived_fields
+
+    @property
+    def data_set(self):
+        raise AttributeError('%s has no data set, it queries many symbols' % type(self).__name__)
+
+    def refresh(self):
+        raise TypeError('%s has nothing to refresh, it queries many symbols' % type(self).__name__)
+
+
+class ShareBatch(Base):
+    """
+    Quotes for many symbols fetched with one `symbol in (...)` query per chunk
+
+    Symbols reported by Yahoo as unknown (`ErrorIndication...` keys) do not fail
+    the whole batch, they are collected in `errors` instead.
+    """
+
+    _table = 'quotes'
+    _key = 'symbol'
+    _id_keys = ('symbol', 'Symbol')
+    _required_fields = Share._required_fields
+    _derived_fields = Share._derived_fields
+
+    def __init__(self, symbols, chunk_size=BATCH_CHUNK_SIZE, cache=None, transport=None,
+                 fields=None):
+        super(ShareBatch, self).__init__(None, cache=cache, transport=transport, fields=fields)
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be positive, got %r' % chunk_size)
+        self.symbols, seen = [], set()
+        for symbol in symbols:
+            if symbol not in seen:
+                seen.add(symbol)
+                self.symbols.append(symbol)
+        self.chunk_size = chunk_size
+        self.shares = {}
+        self.errors = {}
+        self.refresh()
+
+    def __getitem__(self, symbol):
+        return self.shares[symbol]
+
+    def __contains__(self, symbol):
+        return symbol in self.shares
+
+    def __iter__(self):
+        return (self.shares[s] for s in self.symbols if s in self.shares)
+
+    def __len__(self):
+        return len(self.shares)
+
+    def _chunks(self):
+        for i in range(0, len(self.symbols), self.chunk_size):
+            yield self.symbols[i:i + self.chunk_size]
+
+    def _fetch(self):
+        data, errors = {}, {}
+        for chunk in self._chunks():
+            chunk_data, chunk_errors = self._fetch_chunk(chunk)
+            data.update(chunk_data)
+            errors.update(chunk_errors)
+        return data, errors
+
+    def refresh(self):
+        """
+        Refresh data of all shares in the batch
+
+        Existing `Share` objects are updated in place.
+        """
+        data, self.errors = self._fetch()
+        shares = {}
+        for symbol, results in data.items():
+            share = self.shares.get(symbol)
+            if share is None:
+                share = Share(symbol, data_set=results, cache=self.cache, transport=self.transport,
+                              fields=self.fields)
+            else:
+                share.data_set = share._post_process(results)
+            shares[symbol] = share
+        self.shares = shares
@@ -0,0 +1,234 @@
+"""
+asyncio versions of `Share`, `Currency` and `YQLQuery`
+
+Requests run the blocking request path of `Base` (cache, single-flight and
+metrics included) in a thread pool, so the event loop is never stalled. All
+async queries share one `RequestLimiter` that bounds how many requests are in
+flight at once, and one `yql.ConnectionPool` allowing as many connections per
+host; the shared `yql.YQLQuery.transport` allows only 4, which would cap them.
+Requires Python 3.5+.
+
+    >>> share = await AsyncShare.create('YHOO')
+    >>> await share.refresh()
+    >>> history = await share.get_historical('2014-04-25', '2014-04-29')
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import weakref
+
+from yahoo_finance import (Base, Currency, HISTORICAL_MAX_WORKERS, HISTORICAL_OVERLAP,
+                           HISTORICAL_RETRIES, HistoricalFrame, Share, get_date_range, yql)
+
+__all__ = ['AsyncCurrency', 'AsyncShare', 'AsyncYQLQuery', 'RequestLimiter']
+
+# requests in flight at once for all async queries sharing the default limiter
+DEFAULT_CONCURRENCY = 20
+
+
+class RequestLimiter(object):
+    """
+    Bound the number of requests in flight
+
+    Usable from any number of event loops, each loop gets its own semaphore.
+    Blocking requests run in an executor with `limit` threads.
+
+    :param limit: maximum number of concurrent requests
+    """
+
+    def __init__(self, limit=DEFAULT_CONCURRENCY):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.limit)
+            return self._executor
+
+    def _semaphore(self):
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+            return semaphore
+
+    async def run(self, func, *args):
+        """
+        Call blocking `func(*args)` in the executor once a slot is free
+
+        """
+        async with self._semaphore():
+            return await asyncio.get_event_loop().run_in_executor(self.executor, func, *args)
+
+
+class AsyncYQLQuery(object):
+
+    # shared by all async queries
+    limiter = RequestLimiter()
+    # transport of all async queries and objects, one connection per host for each request
+    # in flight; a transport with fewer connections per host caps concurrency to them
+    transport = yql.ConnectionPool(maxsize=DEFAULT_CONCURRENCY,
+                                   maxsize_per_host=DEFAULT_CONCURRENCY)
+
+    def __init__(self, transport=None, limiter=None, metrics=None):
+        self._query = yql.YQLQuery(transport if transport is not None else self.transport)
+        if limiter is not None:
+            self.limiter = limiter
+        self.metrics = metrics
+
+    async def execute(self, yql, token=None):
+        if self.metrics is not None:
+            # timed in the executor thread, where the request runs
+            return await self.limiter.run(self.metrics.measure, yql, self._query.execute, yql, token)
+        return await self.limiter.run(self._query.execute, yql, token)
+
+
+class AsyncBase(Base):
+    """
+    Coroutine versions of the `Base` request methods
+
+    Meant to be mixed in before `Share` or `Currency`. The blocking `_request`
+    runs in the executor of `AsyncYQLQuery.limiter`, so caching, coalescing,
+    metrics, parsing and post-processing are inherited unchanged.
+    """
+
+    # data is refreshed only by awaiting `refresh`
+    max_age = None
+    _transport = None
+
+    @property
+    def transport(self):
+        """Transport given to the constructor, `AsyncYQLQuery.transport` by default"""
+        return self._transport if self._transport is not None else AsyncYQLQuery.transport
+
+    @transport.setter
+    def transport(self, transport):
+        self._transport = transport
+
+    def __init__(self, symbol, data_set=None, cache=None, transport=None):
+        Base.__init__(self, symbol, cache=cache, transport=transport)
+        if data_set is not None:
+            self._set_data(data_set)
+
+    @classmethod
+    async def create(cls, symbol, cache=None, transport=None):
+        """
+        Create an object and fetch its data
+
+        """
+        self = cls(symbol, cache=cache, transport=transport)
+        await self.refresh()
+        return self
+
+    def _load(self):
+        # a blocking fetch would stall the event loop
+        raise AttributeError('data_set is not fetched yet, use `await refresh()` or `create()`')
+
+    async def _run(self, func, *args):
+        # a blocking method in the executor of the shared limiter
+        return await AsyncYQLQuery.limiter.run(func, *args)
+
+    async def _fetch(self):
+        query = self._prepare_query(table=self._table, key=self._key)
+        data = await self._run(self._request, query)
+        return self._post_process(data)
+
+    async def refresh(self):
+        """
+        Refresh data
+
+        """
+        self.data_set = await self._fetch()
+
+
+class _HistoricalWindows(object):
+    """
+    Async iterator over the rows, or the blocks of rows, of `AsyncShare.iter_historical`
+
+    """
+
+    def __init__(self, share, start_date, end_date, prefetch, retries, blocks):
+        self.share = share
+        self.windows = deque(get_date_range(start_date, end_date))
+        self.prefetch = prefetch
+        self.retries = retries
+        self.blocks = blocks
+        self.pending = deque()
+        self.rows = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.rows:
+            while self.windows and len(self.pending) <= self.prefetch:
+                start, end = self.windows.popleft()
+                self.pending.append(asyncio.ensure_future(self.share._run(
+                    self.share._fetch_historical_window, start, end, self.retries)))
+            if not self.pending:
+                raise StopAsyncIteration
+            rows = await self.pending.popleft()
+            if self.blocks:
+                return rows
+            self.rows.extend(rows)
+        return self.rows.popleft()
+
+
+class AsyncCurrency(AsyncBase, Currency):
+    pass
+
+
+class AsyncShare(AsyncBase, Share):
+
+    async def get_historical(self, start_date, end_date, as_arrays=False):
+        """
+        Get Yahoo Finance Stock historical prices, all date windows are fetched concurrently
+
+        Failed date windows are retried like in `Share.get_historical`.
+
+        :param start_date: string date in format '2009-09-11'
+        :param end_date: string date in format '2009-09-11'
+        :param as_arrays: return a `HistoricalFrame` of typed arrays, oldest day first
+        :return: list or HistoricalFrame
+        """
+        results = await asyncio.gather(*[
+            self._run(self._fetch_historical_window, s, e, HISTORICAL_RETRIES)
+            for s, e in get_date_range(start_date, end_date)])
+        hist = []
+        for rows in results:
+            hist.extend(rows)
+        if as_arrays:
+            return HistoricalFrame.from_rows(hist, self.symbol)
+        return hist
+
+    def iter_historical(self, start_date, end_date, prefetch=1, retries=HISTORICAL_RETRIES,
+                        blocks=False):
+        """
+        Iterate with `async for` over historical prices as date windows arrive
+
+            >>> async for row in share.iter_historical('1996-04-12', '2016-04-12'):
+            ...     writer.writerow(row)
+
+        Same arguments and order as `Share.iter_historical`.
+
+        :raises YQLHistoricalWindowError: when reaching a window which could not be fetched
+        """
+        return _HistoricalWindows(self, start_date, end_date, prefetch, retries, blocks)
+
+    async def extend_historical(self, start_date=None, end_date=None, overlap=HISTORICAL_OVERLAP,
+                                max_workers=HISTORICAL_MAX_WORKERS, retries=HISTORICAL_RETRIES):
+        """
+        Keep historical prices in `history` up to date, see `Share.extend_historical`
+
+        Runs in the executor of the limiter, calls of one share must not overlap.
+
+        :return: list of days added after the last stored one, oldest day first
+        """
+        return await self._run(super(AsyncShare, self).extend_historical, start_date, end_date,
+                               overlap, max_workers, retries)
@@ -0,0 +1,151 @@
+"""
+Cache of YQL query results
+
+    >>> from yahoo_finance import Base, Share
+    >>> from yahoo_finance.cache import ResponseCache
+    >>> Base.cache = ResponseCache()  # used by all objects
+    >>> yahoo = Share('YHOO', cache=ResponseCache(maxsize=100))  # or by one of them
+    >>> yahoo = Share('YHOO', cache=False)  # bypass any cache
+"""
+from collections import OrderedDict
+from datetime import date
+import re
+import threading
+import time
+
+from yahoo_finance.singleflight import _copy
+
+__all__ = ['ResponseCache']
+
+# seconds results of each table stay valid, None keeps them until evicted
+DEFAULT_TTL = {
+    'quotes': 5,
+    'xchange': 5,
+    # ranges ending today or later, ranges ending in the past never change
+    'historicaldata': 60,
+}
+
+_TABLE_RE = re.compile(r'yahoo\.finance\.(\w+)')
+_END_DATE_RE = re.compile(r'endDate\s*=\s*"(\d{4}-\d{2}-\d{2})"')
+
+
+def normalize_query(query):
+    """
+    Normalize a YQL query to be used as a cache key
+
+    Whitespace is collapsed and `and` conditions are sorted, as their order
+    depends on keyword arguments of `Base._prepare_query`.
+    """
+    parts = ' '.join(query.split()).split(' and ')
+    return ' and '.join(parts[:1] + sorted(parts[1:]))
+
+
+def _sizeof(results):
+    """
+    Approximate size of results in bytes, the length of all keys and values
+
+    """
+    if isinstance(results, dict):
+        results = [results]
+    return sum(len(k) + len(v or '') for r in results for k, v in r.items())
+
+
+class ResponseCache(object):
+    """
+    Thread-safe TTL and LRU cache of query results
+
+    Results are copied in and out, so callers are free to modify them.
+
+    :param maxsize: maximum number of entries
+    :param maxbytes: maximum approximate size of all entries, unbounded when None
+    :param ttl: dict of seconds results of a table stay valid, updates `DEFAULT_TTL`
+    :param clock: function returning the current time in seconds
+    """
+
+    def __init__(self, maxsize=1024, maxbytes=None, ttl=None, clock=time.time):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _ttl(self, query):
+        match = _TABLE_RE.search(query)
+        table = match.group(1) if match else None
+        if table == 'historicaldata':
+            end = _END_DATE_RE.search(query)
+            if end and end.group(1) < date.today().strftime('%Y-%m-%d'):
+                return None
+        return self.ttl.get(table)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.maxsize or
+                                 self.maxbytes is not None and self.bytes > self.maxbytes):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def get(self, query):
+        """
+        Get results of `query` if cached and not expired
+
+        :return: copy of the results or None
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, size, results = entry
+                if expires is None or expires > self.clock():
+                    self.hits += 1
+                    del self._entries[key]
+                    self._entries[key] = entry
+                    return _copy(results)
+                del self._entries[key]
+                self.bytes -= size
+            self.misses += 1
+        return None
+
+    def set(self, query, results):
+        """
+        Store results of `query`
+
+        """
+        key = normalize_query(query)
+        ttl = self._ttl(key)
+        expires = None if ttl is None else self.clock() + ttl
+        size = _sizeof(results)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (expires, size, _copy(results))
+            self.bytes += size
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all entries, counters are kept
+
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Snapshot of cache counters
+
+        :return: dict
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
@@ -0,0 +1,537 @@
+"""
+Command line export of quotes, exchange rates and historical prices
+
+    $ yahoo-finance quotes symbols.txt -o quotes.csv
+    $ yahoo-finance currency pairs.txt -o rates.jsonl --format jsonl
+    $ yahoo-finance historical symbols.txt --start 2000-01-01 -o history --format parquet
+
+Symbols are read from a file with one symbol per line, `-` reads standard
+input. Chunks of symbols (one symbol for historical prices) are fetched by a
+pool of threads, and rows are written as each chunk arrives, in the order of
+the file. At most two chunks per worker are held in memory.
+
+Written symbols are recorded in a checkpoint next to the output together with
+the size of the output at that point. When an export is interrupted, running
+the same command again truncates whatever was written after the last record
+and continues with the symbols not written yet. Symbols which failed are
+retried by the next run too; the checkpoint is removed once all symbols are
+written. Parquet output is a directory of files of at most `--file-rows` rows,
+a file is recorded once it is complete.
+
+Parquet requires PyArrow.
+"""
+from __future__ import print_function
+
+import argparse
+import csv
+from collections import deque
+from datetime import datetime
+import json
+import os
+import re
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from yahoo_finance import (BATCH_CHUNK_SIZE, HISTORICAL_RETRIES, Currency, Share,
+                           YQLHistoricalWindowError, YQLQueryError, YQLResponseMalformedError)
+from yahoo_finance.store import FIELDS as HISTORICAL_FIELDS
+
+__all__ = ['export', 'main']
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+# number of chunks fetched at once
+EXPORT_WORKERS = 4
+# rows of a Parquet row group, and of a Parquet file
+PARQUET_GROUP_ROWS = 65536
+PARQUET_FILE_ROWS = 1000000
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError('Parquet output requires PyArrow, install it with `pip install pyarrow`')
+
+
+def read_symbols(path):
+    """
+    Read symbols from a file with one symbol per line, skipping blank lines and `#` comments
+
+    :param path: path of the file, '-' for standard input
+    :return: list of unique symbols in the order of the file
+    """
+    stream = sys.stdin if path == '-' else open(path)
+    try:
+        symbols = []
+        seen = set()
+        for line in stream:
+            symbol = line.split('#', 1)[0].strip()
+            if symbol and symbol not in seen:
+                seen.add(symbol)
+                symbols.append(symbol)
+        return symbols
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+class _FileWriter(object):
+    """
+    Rows appended to a file, or written to standard output when `path` is None
+
+    :param path: output path or None
+    :param position: size the file is truncated to before appending, None starts a new file
+    """
+
+    def __init__(self, path, position=None):
+        self.path = path
+        if path is None:
+            self.stream = sys.stdout
+            return
+        if position is None:
+            open(path, 'wb').close()
+        else:
+            with open(path, 'r+b') as f:
+                f.truncate(position)
+        if sys.version_info[0] < 3:
+            self.stream = open(path, 'ab')
+        else:
+            self.stream = open(path, 'a', newline='', encoding='utf-8')
+
+    def sync(self):
+        """
+        Make rows written so far durable
+
+        :return: size of the output, None when it is not a file
+        """
+        self.stream.flush()
+        if self.path is None:
+            return None
+        os.fsync(self.stream.fileno())
+        return os.fstat(self.stream.fileno()).st_size
+
+    def close(self):
+        position = self.sync()
+        if self.path is not None:
+            self.stream.close()
+        return position
+
+
+def _columns_of(row, extra_columns):
+    # keys of the first row, then columns which other rows may add
+    columns = list(row)
+    return columns + [c for c in extra_columns if c not in row]
+
+
+class CsvWriter(_FileWriter):
+    """
+    Rows as CSV, columns are the keys of the first row and `extra_columns` unless `columns` are given
+
+    A row with a key which is not a column raises ValueError rather than losing it.
+    """
+
+    def __init__(self, path, position=None, columns=None, extra_columns=()):
+        super(CsvWriter, self).__init__(path, position)
+        self.columns = columns
+        self.extra_columns = extra_columns
+        self.writer = None
+        if position and columns is None:
+            # columns of the header written by the interrupted run
+            with open(path) as f:
+                self.columns = next(csv.reader(f))
+        if self.columns is not None:
+            self._start(bool(position))
+
+    def _start(self, resumed):
+        self.writer = csv.DictWriter(self.stream, self.columns)
+        if not resumed:
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.writer is None:
+            self.columns = _columns_of(row, self.extra_columns)
+            self._start(False)
+        self.writer.writerow(row)
+
+
+class JsonWriter(_FileWriter):
+    """
+    Rows as newline-delimited JSON objects
+    """
+
+    def __init__(self, path, position=None, columns=None, extra_columns=()):
+        super(JsonWriter, self).__init__(path, position)
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, sort_keys=True))
+        self.stream.write('\n')
+
+
+class ParquetWriter(object):
+    """
+    Rows as string columns in a directory of Parquet files `part-00000.parquet`, ...
+
+    Rows are buffered up to `group_rows`, written as a row group, and a new
+    file is started after `file_rows` rows.
+
+    :param path: output directory
+    :param position: number of complete files to keep, None starts a new directory
+    :param columns: column names, the keys of the first row and `extra_columns` by default;
+                    a row with another key raises ValueError
+    :param extra_columns: columns some rows may have although the first one does not
+    """
+
+    def __init__(self, path, position=None, columns=None, extra_columns=(),
+                 group_rows=PARQUET_GROUP_ROWS, file_rows=PARQUET_FILE_ROWS):
+        _require_pyarrow()
+        if path is None:
+            raise ValueError('Parquet output needs an output directory')
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.path = path
+        self.part = position or 0
+        # files after the complete ones were left by an interrupted run
+        for name in os.listdir(path):
+            match = re.match(r'part-(\d+)\.parquet$', name)
+            if match and int(match.group(1)) >= self.part:
+                os.remove(os.path.join(path, name))
+        self.columns = columns
+        self.extra_columns = extra_columns
+        self.group_rows = group_rows
+        self.file_rows = file_rows
+        self.rows = []
+        self.written = 0
+        self.writer = None
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.group_rows:
+            self._write_group()
+
+    def _write_group(self):
+        if not self.rows:
+            return
+        if self.columns is None:
+            self.columns = _columns_of(self.rows[0], self.extra_columns)
+        known = set(self.columns)
+        for row in self.rows:
+            unknown = [k for k in row if k not in known]
+            if unknown:
+                raise ValueError('Row has keys missing from the columns: %s' % ', '.join(unknown))
+        arrays = []
+        for column in self.columns:
+            values = [row.get(column) for row in self.rows]
+            arrays.append(pyarrow.array([None if v is None else u'%s' % v for v in values],
+                                        type=pyarrow.string()))
+        table = pyarrow.Table.from_arrays(arrays, names=self.columns)
+        if self.writer is None:
+            name = os.path.join(self.path, 'part-%05d.parquet' % self.part)
+            self.writer = pyarrow.parquet.ParquetWriter(name, table.schema)
+        self.writer.write_table(table)
+        self.written += len(self.rows)
+        self.rows = []
+
+    def _close_file(self):
+        self._write_group()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.part += 1
+            self.written = 0
+
+    def sync(self):
+        """
+        Complete the current file once it has `file_rows` rows
+
+        :return: number of complete files, None while rows are not in a complete file
+        """
+        if self.written + len(self.rows) < self.file_rows:
+            return None
+        self._close_file()
+        return self.part
+
+    def close(self):
+        self._close_file()
+        return self.part
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonWriter, 'parquet': ParquetWriter}
+
+
+class Checkpoint(object):
+    """
+    Symbols already written and the output position after them, one JSON line per record
+
+    The first line describes the export, a checkpoint of another export is refused.
+    Values of the job left to a default, e.g. an end date of today, are taken
+    from the checkpoint so that a run resumed on another day is the same export.
+
+    :param path: path of the checkpoint file
+    :param job: dict describing the export
+    :param defaults: dict of values of `job` used where it has None, unless the checkpoint has some
+    :ivar job: `job` with its defaults resolved
+    :ivar done: set of symbols written by earlier runs
+    :ivar position: output position after them, None when nothing was written
+    """
+
+    def __init__(self, path, job, defaults=None):
+        self.path = path
+        self.job = job = dict(job)
+        self.done = set()
+        self.position = None
+        defaults = dict((key, value) for key, value in (defaults or {}).items()
+                        if job[key] is None)
+        if os.path.exists(path):
+            with open(path) as f:
+                lines = f.read().splitlines()
+            if lines:
+                stored = json.loads(lines[0])
+                for key in defaults:
+                    job[key] = stored.get(key)
+                if stored != job:
+                    raise ValueError('Checkpoint %s belongs to another export, delete it to start '
+                                     'again' % path)
+            for line in lines[1:]:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a record cut by the interruption
+                    break
+                self.done.update(record['symbols'])
+                self.position = record['position']
+            self.stream = open(path, 'a')
+        else:
+            job.update(defaults)
+            self.stream = open(path, 'w')
+            self._append(job)
+
+    def _append(self, record):
+        self.stream.write(json.dumps(record, sort_keys=True) + '\n')
+        self.stream.flush()
+        os.fsync(self.stream.fileno())
+
+    def record(self, symbols, position):
+        self.done.update(symbols)
+        self.position = position
+        self._append({'symbols': symbols, 'position': position})
+
+    def close(self):
+        self.stream.close()
+
+
+def _fetch_quotes(cls, chunk, transport, fields):
+    # quotes of a chunk of symbols as plain rows, in the order of the chunk
+    if fields is None:
+        fetcher = cls.from_data_set(None, transport=transport)
+    else:
+        fetcher = cls.from_data_set(None, transport=transport, fields=fields)
+    try:
+        data, errors = fetcher._fetch_chunk(chunk)
+    except (YQLQueryError, YQLResponseMalformedError, EnvironmentError) as e:
+        return chunk, [], dict((symbol, e) for symbol in chunk)
+    rows = [dict(fetcher._post_process(data[s])) for s in chunk if s in data]
+    return chunk, rows, errors
+
+
+def _fetch_history(chunk, transport, start_date, end_date, retries):
+    share = Share.from_data_set(chunk[0], transport=transport)
+    try:
+        rows = share.get_historical(start_date, end_date, max_workers=1, retries=retries,
+                                    store=False)
+    except (YQLHistoricalWindowError, EnvironmentError) as e:
+        return chunk, [], {chunk[0]: e}
+    return chunk, rows, {}
+
+
+def export(kind, symbols, path=None, format='csv', workers=EXPORT_WORKERS,
+           chunk_size=BATCH_CHUNK_SIZE, fields=None, start_date=None, end_date=None,
+           retries=HISTORICAL_RETRIES, checkpoint=None, file_rows=PARQUET_FILE_ROWS,
+           transport=None, errors=None):
+    """
+    Fetch quotes, exchange rates or historical prices and stream them to a file
+
+    :param kind: 'quotes', 'currency' or 'historical'
+    :param symbols: list of symbols, or currency pairs e.g. 'EURPLN'
+    :param path: output file (directory for Parquet), None for standard output
+    :param format: 'csv', 'jsonl' or 'parquet'
+    :param workers: number of chunks fetched at once
+    :param chunk_size: number of symbols sent in a single quotes or currency query
+    :param fields: quote fields queried e.g. ['LastTradePriceOnly', 'Volume'], None for all
+    :param start_date: first day of historical prices in format '2009-09-11'
+    :param end_date: last day of historical prices, today by default
+    :param retries: times a date window failed by YQL is fetched again
+    :param checkpoint: checkpoint path, `path` + '.checkpoint' by default, False disables it
+    :param file_rows: rows of each Parquet file
+    :param transport: transport of queries replacing `Base.transport`
+    :param errors: called with (symbol, error) for each symbol which failed
+    :return: dict of counts 'symbols', 'skipped', 'rows', 'errors' and 'seconds'
+    """
+    if format not in WRITERS:
+        raise ValueError('Format must be one of %s, got %r' % (', '.join(FORMATS), format))
+    if workers < 1 or chunk_size < 1:
+        raise ValueError('Workers and chunk size must be positive, got %r and %r' % (
+            workers, chunk_size))
+    columns = None
+    extra_columns = ()
+    defaults = {}
+    if kind == 'historical':
+        if start_date is None:
+            raise ValueError('Historical prices need a start date')
+        # the end date of a resumed export is the one of its first run
+        defaults['end_date'] = datetime.now().strftime('%Y-%m-%d')
+        columns = list(HISTORICAL_FIELDS)
+        chunk_size = 1
+
+        def fetch(chunk):
+            return _fetch_history(chunk, transport, start_date, job['end_date'], retries)
+    elif kind in ('quotes', 'currency'):
+        cls = Share if kind == 'quotes' else Currency
+        fields = tuple(fields) if fields and kind == 'quotes' else None
+        if fields is None:
+            # e.g. `LastTradeDateTimeUTC` of quotes with a trade date only
+            extra_columns = list(cls._derived_fields)
+        else:
+            columns = []
+            for field in cls._required_fields + fields:
+                if field not in columns:
+                    columns.append(field)
+
+        def fetch(chunk):
+            return _fetch_quotes(cls, chunk, transport, fields)
+    else:
+        raise ValueError('Kind must be "quotes", "currency" or "historical", got %r' % kind)
+
+    def open_writer(position):
+        if format == 'parquet':
+            return ParquetWriter(path, position, columns, extra_columns, file_rows=file_rows)
+        return WRITERS[format](path, position, columns, extra_columns)
+
+    job = {'kind': kind, 'format': format, 'fields': fields and list(fields),
+           'start_date': start_date, 'end_date': end_date}
+    if checkpoint is None and path is not None:
+        checkpoint = path.rstrip(os.sep) + '.checkpoint'
+    if checkpoint:
+        checkpoint = Checkpoint(checkpoint, job, defaults)
+        job = checkpoint.job
+        todo = [s for s in symbols if s not in checkpoint.done]
+        writer = open_writer(checkpoint.position)
+    else:
+        job.update((key, value) for key, value in defaults.items() if job[key] is None)
+        todo = list(symbols)
+        writer = open_writer(None)
+
+    started = time.time()
+    summary = {'symbols': 0, 'skipped': len(symbols) - len(todo), 'rows': 0, 'errors': 0}
+    written = []
+
+    def write(result):
+        chunk, rows, chunk_errors = result
+        for row in rows:
+            writer.write(row)
+        summary['rows'] += len(rows)
+        for symbol in chunk:
+            if symbol in chunk_errors:
+                summary['errors'] += 1
+                if errors is not None:
+                    errors(symbol, chunk_errors[symbol])
+            else:
+                summary['symbols'] += 1
+                written.append(symbol)
+        position = writer.sync()
+        if checkpoint and position is not None:
+            checkpoint.record(written[:], position)
+            del written[:]
+
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    pool = ThreadPool(min(workers, len(chunks)) or 1)
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(fetch, (chunk,)))
+            if len(pending) >= 2 * workers:
+                write(pending.popleft().get())
+        while pending:
+            write(pending.popleft().get())
+        position = writer.close()
+        if checkpoint and written:
+            checkpoint.record(written, position)
+    finally:
+        pool.terminate()
+        pool.join()
+        if checkpoint:
+            checkpoint.close()
+    # symbols which failed are tried again by the next run
+    if checkpoint and not summary['errors']:
+        os.remove(checkpoint.path)
+    summary['seconds'] = time.time() - started
+    return summary
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='yahoo-finance', description='Export quotes, exchange rates or historical prices')
+    parser.add_argument('kind', choices=('quotes', 'currency', 'historical'))
+    parser.add_argument('symbols', help='file with one symbol (or currency pair) per line, '
+                                        '- for standard input')
+    parser.add_argument('-o', '--output', help='output file, directory for Parquet; '
+                                               'standard output by default')
+    parser.add_argument('-f', '--format', choices=FORMATS, default=None,
+                        help='output format, from the output extension by default')
+    parser.add_argument('-w', '--workers', type=int, default=EXPORT_WORKERS)
+    parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE,
+                        help='symbols sent in a single quotes or currency query')
+    parser.add_argument('--fields', help='comma separated quote fields, all by default')
+    parser.add_argument('--start', help='first day of historical prices, e.g. 2009-09-11')
+    parser.add_argument('--end', help='last day of historical prices, today by default')
+    parser.add_argument('--retries', type=int, default=HISTORICAL_RETRIES)
+    parser.add_argument('--checkpoint', help='checkpoint file, OUTPUT.checkpoint by default')
+    parser.add_argument('--no-checkpoint', action='store_true')
+    parser.add_argument('--file-rows', type=int, default=PARQUET_FILE_ROWS,
+                        help='rows of each Parquet file')
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the `yahoo-finance` command
+
+    :param argv: arguments, `sys.argv[1:]` by default
+    :return: exit status, 1 when some symbols failed
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    format = args.format
+    if format is None:
+        extension = os.path.splitext(args.output or '')[1].lstrip('.')
+        format = extension if extension in FORMATS else 'csv'
+    if args.kind == 'historical' and not args.start:
+        parser.error('historical prices need --start')
+    checkpoint = False if args.no_checkpoint else args.checkpoint
+
+    def report(symbol, error):
+        print('%s: %s' % (symbol, error), file=sys.stderr)
+
+    try:
+        summary = export(args.kind, read_symbols(args.symbols), args.output, format,
+                         args.workers, args.chunk_size,
+                         args.fields.split(',') if args.fields else None,
+                         args.start, args.end, args.retries, checkpoint, args.file_rows,
+                         errors=report)
+    except (ValueError, ImportError, EnvironmentError) as e:
+        parser.exit(2, '%s: error: %s\n' % (parser.prog, e))
+    seconds = max(summary['seconds'], 1e-9)
+    print('%d symbols, %d rows, %d errors, %d skipped from checkpoint in %.2fs '
+          '(%.1f symbols/s, %.1f rows/s)' % (
+              summary['symbols'], summary['rows'], summary['errors'], summary['skipped'],
+              summary['seconds'], summary['symbols'] / seconds, summary['rows'] / seconds),
+          file=sys.stderr)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Historical prices as typed NumPy arrays
+
+    >>> frame = Share('YHOO').get_historical('2004-01-01', '2014-01-01', as_arrays=True)
+    >>> returns = numpy.diff(numpy.log(frame.adj_close))
+
+Requires NumPy.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ['HistoricalFrame']
+
+# Yahoo marks missing values with these, they become NaN (0 for volume)
+_MISSING = ('', 'N/A', 'null', None)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('HistoricalFrame requires NumPy, install it with `pip install numpy`')
+
+
+def _parse(values, dtype, missing):
+    """
+    Parse a column of strings with a single NumPy conversion
+
+    Missing values are looked for only when the conversion fails.
+    """
+    column = numpy.array(values, dtype=object)
+    try:
+        return column.astype(dtype)
+    except (TypeError, ValueError):
+        mask = numpy.zeros(len(column), dtype=bool)
+        for value in _MISSING:
+            mask |= numpy.equal(column, value)
+        column[mask] = missing
+        return column.astype(dtype)
+
+
+class HistoricalFrame(object):
+    """
+    Historical prices of one symbol in contiguous typed arrays, oldest day first
+
+    :ivar date: `datetime64[D]` array
+    :ivar open, high, low, close, adj_close: `float64` arrays, NaN where Yahoo had no value
+    :ivar volume: `int64` array, 0 where Yahoo had no value
+    """
+
+    FLOAT_FIELDS = (('open', 'Open'), ('high', 'High'), ('low', 'Low'), ('close', 'Close'),
+                    ('adj_close', 'Adj_Close'))
+
+    def __init__(self, symbol, date, open, high, low, close, adj_close, volume):
+        _require_numpy()
+        self.symbol = symbol
+        self.date = date
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.adj_close = adj_close
+        self.volume = volume
+
+    @classmethod
+    def from_rows(cls, rows, symbol=None):
+        """
+        Build from rows returned by `Share.get_historical`
+
+        :param rows: list of dicts, newest first
+        :param symbol: defaults to the symbol of the first row
+        """
+        _require_numpy()
+        if symbol is None and rows:
+            symbol = rows[0].get('Symbol')
+        rows = rows[::-1]
+        columns = dict((name, _parse([r.get(field) for r in rows], numpy.float64, 'nan'))
+                       for name, field in cls.FLOAT_FIELDS)
+        columns['volume'] = _parse([r.get('Volume') for r in rows], numpy.int64, '0')
+        columns['date'] = numpy.array([r['Date'] for r in rows], dtype='datetime64[D]')
+        return cls(symbol, **columns)
+
+    def __len__(self):
+        return len(self.date)
+
+    def __repr__(self):
+        if not len(self):
+            return '<HistoricalFrame %s: empty>' % self.symbol
+        return '<HistoricalFrame %s: %d days from %s to %s>' % (
+            self.symbol, len(self), self.date[0], self.date[-1])
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by all arrays in bytes
+
+        """
+        return sum(getattr(self, name).nbytes for name in
+                   ('date', 'open', 'high', 'low', 'close', 'adj_close', 'volume'))
@@ -0,0 +1,468 @@
+"""
+Technical indicators over historical prices
+
+    >>> from yahoo_finance.indicators import atr, max_drawdown, sma
+    >>> frame = Share('YHOO').get_historical('2004-01-01', '2014-01-01', as_arrays=True)
+    >>> sma(frame.adj_close, 50)
+    >>> atr(frame.high, frame.low, frame.close, 14)
+    >>> max_drawdown(frame.adj_close)
+
+Series are NumPy arrays with the oldest day first, as in `HistoricalFrame`. Two
+dimensional arrays hold one symbol per column and are computed at once.
+Rolling windows take O(n) time whatever their length; their first `window - 1`
+values are NaN, and so is every window containing a NaN.
+
+Series growing one bar at a time are better served by the incremental classes,
+e.g. `RollingMean`, which keep their state rather than recompute the history:
+
+    >>> mean = RollingMean(50)
+    >>> mean.extend(frame.adj_close)
+    >>> mean.update(36.84)  # mean of the last 50 days
+
+Requires NumPy.
+"""
+import math
+
+from yahoo_finance.frame import _require_numpy, numpy
+
+__all__ = ['AverageTrueRange', 'Drawdown', 'ExponentialMean', 'RollingMean', 'RollingStd',
+           'adjust', 'atr', 'drawdown', 'ema', 'log_returns', 'max_drawdown', 'rebase',
+           'rolling_std', 'sma', 'true_range']
+
+
+def _array(values):
+    _require_numpy()
+    return numpy.asarray(values, dtype=numpy.float64)
+
+
+def _check_window(window):
+    if window < 1:
+        raise ValueError('Window must be positive, got %r' % window)
+
+
+def _window_sums(values, window):
+    """
+    Sums of the values in each window and numbers of values which are not NaN
+
+    Windows not complete yet, the first `window - 1`, have a count of -1.
+    """
+    valid = ~numpy.isnan(values)
+    cumulative = numpy.cumsum(numpy.where(valid, values, 0.0), axis=0)
+    cumulative_counts = numpy.cumsum(valid, axis=0)
+    sums = cumulative.copy()
+    sums[window:] -= cumulative[:-window]
+    counts = cumulative_counts.copy()
+    counts[window:] -= cumulative_counts[:-window]
+    counts[:window - 1] = -1
+    return sums, counts
+
+
+def _shift(values):
+    # mean of the values which are not NaN, subtracted before summing squares to keep precision
+    valid = ~numpy.isnan(values)
+    count = valid.sum(axis=0)
+    total = numpy.where(valid, values, 0.0).sum(axis=0)
+    return numpy.where(count > 0, total / numpy.maximum(count, 1), 0.0)
+
+
+def sma(values, window):
+    """
+    Simple moving average
+
+    :param values: array of prices, one column per symbol if two dimensional
+    :param window: number of days
+    :return: array of the shape of `values`
+    """
+    values = _array(values)
+    _check_window(window)
+    sums, counts = _window_sums(values, window)
+    means = sums / window
+    means[counts != window] = numpy.nan
+    return means
+
+
+def rolling_std(values, window, ddof=1):
+    """
+    Rolling standard deviation
+
+    :param values: array of values, e.g. `log_returns`
+    :param window: number of days
+    :param ddof: delta degrees of freedom, 1 gives the sample standard deviation
+    :return: array of the shape of `values`
+    """
+    values = _array(values)
+    _check_window(window)
+    if window <= ddof:
+        raise ValueError('Window must be greater than ddof, got %r' % window)
+    values = values - _shift(values)
+    sums, counts = _window_sums(values, window)
+    squares, _ = _window_sums(values * values, window)
+    variance = numpy.maximum(squares - sums * sums / window, 0.0) / (window - ddof)
+    deviations = numpy.sqrt(variance)
+    deviations[counts != window] = numpy.nan
+    return deviations
+
+
+# log of the smallest product of decays within a block of `_ema`
+_MIN_LOG_DECAY = math.log(1e-100)
+
+
+def _alpha(window, alpha):
+    if alpha is None:
+        _check_window(window)
+        return 2.0 / (window + 1)
+    if not 0 < alpha <= 1:
+        raise ValueError('Alpha must be in (0, 1], got %r' % alpha)
+    return float(alpha)
+
+
+def _ema_step(state, value, alpha):
+    # NaN values leave the average unchanged, the first value starts it
+    return numpy.where(numpy.isnan(state), value,
+                       numpy.where(numpy.isnan(value), state, state + alpha * (value - state)))
+
+
+def _ema_block(values, alpha, state):
+    """
+    Exponential moving average of a block of days continuing from `state`
+
+    With `P[t]` the product of the decays up to day `t` of the block, 1 for a
+    NaN, the average is `P[t] * (state + sum of alpha * x[k] / P[k] for k <= t)`.
+    """
+    steps = numpy.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    valid = ~numpy.isnan(values)
+    first = valid.argmax(axis=0)
+    # columns starting in this block start at their first value
+    starting = numpy.isnan(state) & valid.any(axis=0)
+    state = numpy.where(starting, numpy.take_along_axis(values, first[None], axis=0)[0], state)
+    valid &= ~(starting & (steps == first))
+    decays = numpy.cumprod(numpy.where(valid, 1.0 - alpha, 1.0), axis=0)
+    averages = decays * (state + numpy.cumsum(
+        numpy.where(valid, alpha * values, 0.0) / decays, axis=0))
+    averages[starting & (steps < first)] = numpy.nan
+    return averages
+
+
+def _ema(values, alpha, state):
+    # `_ema_block` over blocks in which the product of the decays stays far from underflow
+    if alpha == 1.0:
+        steps = numpy.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+        last = numpy.maximum.accumulate(numpy.where(~numpy.isnan(values), steps, -1), axis=0)
+        return numpy.where(last >= 0, numpy.take_along_axis(values, numpy.maximum(last, 0),
+                                                            axis=0), state)
+    block = max(1, int(_MIN_LOG_DECAY / math.log(1.0 - alpha)))
+    averages = numpy.empty_like(values)
+    for start in range(0, len(values), block):
+        end = min(start + block, len(values))
+        averages[start:end] = _ema_block(values[start:end], alpha, state)
+        state = averages[end - 1]
+    return averages
+
+
+def ema(values, window=None, alpha=None):
+    """
+    Exponential moving average, starting at the first value
+
+    :param values: array of prices, one column per symbol if two dimensional
+    :param window: number of days, gives `alpha = 2 / (window + 1)`
+    :param alpha: smoothing factor replacing `window`
+    :return: array of the shape of `values`
+    """
+    values = _array(values)
+    alpha = _alpha(window, alpha)
+    return _ema(values, alpha, numpy.full(values.shape[1:], numpy.nan))
+
+
+def log_returns(prices):
+    """
+    Logarithmic returns between consecutive days, the first one is NaN
+
+    """
+    prices = _array(prices)
+    returns = numpy.full(prices.shape, numpy.nan)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = numpy.diff(numpy.log(prices), axis=0)
+    return returns
+
+
+def true_range(high, low, close):
+    """
+    Greatest of the day's range and the gaps from the previous close
+
+    """
+    high, low, close = _array(high), _array(low), _array(close)
+    previous = numpy.full(close.shape, numpy.nan)
+    previous[1:] = close[:-1]
+    return numpy.fmax(high - low, numpy.fmax(numpy.abs(high - previous), numpy.abs(low - previous)))
+
+
+def atr(high, low, close, window=14):
+    """
+    Average true range with Wilder's smoothing, `alpha = 1 / window`
+
+    """
+    _check_window(window)
+    return ema(true_range(high, low, close), alpha=1.0 / window)
+
+
+def drawdown(prices):
+    """
+    Relative distance from the highest price so far, 0 at a new high
+
+    """
+    prices = _array(prices)
+    peaks = numpy.fmax.accumulate(prices, axis=0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return prices / peaks - 1
+
+
+def max_drawdown(prices):
+    """
+    Largest drawdown, e.g. -0.5 when the price halved from a previous high
+
+    :return: float, or array with one value per column
+    """
+    drawdowns = drawdown(prices)
+    valid = ~numpy.isnan(drawdowns)
+    return numpy.where(valid.any(axis=0),
+                       numpy.where(valid, drawdowns, 0.0).min(axis=0), numpy.nan)[()]
+
+
+def adjust(open, high, low, close, adj_close):
+    """
+    Scale open, high, low and close by the ratio of adjusted close to close
+
+    Removes the jumps of splits and dividends from all prices, as Yahoo does for the close.
+
+    :return: tuple of arrays (open, high, low, close)
+    """
+    close, adj_close = _array(close), _array(adj_close)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        ratio = adj_close / close
+    return _array(open) * ratio, _array(high) * ratio, _array(low) * ratio, adj_close
+
+
+def rebase(prices, base=1.0):
+    """
+    Scale each series to start at `base`, e.g. to compare symbols
+
+    """
+    prices = _array(prices)
+    # index of the first value which is not NaN, of a NaN when there is none
+    first = (~numpy.isnan(prices)).argmax(axis=0)
+    if prices.ndim == 1:
+        first = prices[first]
+    else:
+        first = prices[first, numpy.arange(prices.shape[1])]
+    return prices / first * base
+
+
+class _Rolling(object):
+    """
+    Last `window` values of a series kept in a ring buffer
+
+    """
+
+    def __init__(self, window):
+        _require_numpy()
+        _check_window(window)
+        self.window = window
+        self._buffer = None
+        self._position = 0
+        self._seen = 0
+
+    def _push(self, value):
+        value = _array(value)
+        if self._buffer is None:
+            self._buffer = numpy.full((self.window,) + value.shape, numpy.nan)
+        oldest = self._buffer[self._position].copy()
+        self._buffer[self._position] = value
+        self._position = (self._position + 1) % self.window
+        self._seen += 1
+        return value, oldest
+
+    def _load(self, values):
+        # buffer from the tail of a history, oldest values first
+        tail = values[-self.window:]
+        self._buffer = numpy.full((self.window,) + values.shape[1:], numpy.nan)
+        self._buffer[:len(tail)] = tail
+        self._position = len(tail) % self.window
+        self._seen = len(values)
+
+    @property
+    def complete(self):
+        return self._seen >= self.window
+
+
+class RollingMean(_Rolling):
+    """
+    Simple moving average updated one bar at a time, equal to `sma`
+
+    :param window: number of days
+    """
+
+    def __init__(self, window):
+        super(RollingMean, self).__init__(window)
+        self._sum = 0.0
+        self._valid = 0
+
+    def update(self, value):
+        """
+        Add the newest value, a float or one value per symbol
+
+        :return: moving average including `value`
+        """
+        value, oldest = self._push(value)
+        self._sum = self._sum + numpy.nan_to_num(value) - numpy.nan_to_num(oldest)
+        self._valid = (self._valid + (~numpy.isnan(value)).astype(int) -
+                       (~numpy.isnan(oldest)).astype(int))
+        if not self.complete:
+            return numpy.full(value.shape, numpy.nan)[()]
+        return numpy.where(self._valid == self.window, self._sum / self.window, numpy.nan)[()]
+
+    def extend(self, values):
+        """
+        Add many values at once, oldest first
+
+        :return: moving averages of `values` as `sma` computes them
+        """
+        values = _array(values)
+        if not len(values):
+            return values
+        if self._seen:
+            return numpy.array([self.update(v) for v in values])
+        means = sma(values, self.window)
+        self._load(values)
+        self._sum = numpy.nansum(self._buffer, axis=0)
+        self._valid = (~numpy.isnan(self._buffer)).sum(axis=0)
+        return means
+
+
+class RollingStd(_Rolling):
+    """
+    Rolling standard deviation updated one bar at a time, equal to `rolling_std`
+
+    Recomputed from the `window` values kept, history before them is not touched.
+
+    :param window: number of days
+    :param ddof: delta degrees of freedom
+    """
+
+    def __init__(self, window, ddof=1):
+        super(RollingStd, self).__init__(window)
+        if window <= ddof:
+            raise ValueError('Window must be greater than ddof, got %r' % window)
+        self.ddof = ddof
+
+    def update(self, value):
+        value, _ = self._push(value)
+        if not self.complete:
+            return numpy.full(value.shape, numpy.nan)[()]
+        return numpy.std(self._buffer, axis=0, ddof=self.ddof)[()]
+
+    def extend(self, values):
+        values = _array(values)
+        if not len(values):
+            return values
+        if self._seen:
+            return numpy.array([self.update(v) for v in values])
+        deviations = rolling_std(values, self.window, self.ddof)
+        self._load(values)
+        return deviations
+
+
+class ExponentialMean(object):
+    """
+    Exponential moving average updated one bar at a time, equal to `ema`
+
+    :param window: number of days, gives `alpha = 2 / (window + 1)`
+    :param alpha: smoothing factor replacing `window`
+    """
+
+    def __init__(self, window=None, alpha=None):
+        _require_numpy()
+        self.alpha = _alpha(window, alpha)
+        self.value = None
+
+    def update(self, value):
+        value = _array(value)
+        state = self.value if self.value is not None else numpy.full(value.shape, numpy.nan)
+        self.value = _ema_step(state, value, self.alpha)
+        return self.value[()]
+
+    def extend(self, values):
+        values = _array(values)
+        if not len(values):
+            return values
+        state = self.value if self.value is not None else numpy.full(values.shape[1:], numpy.nan)
+        averages = _ema(values, self.alpha, state)
+        self.value = averages[-1]
+        return averages
+
+
+class AverageTrueRange(object):
+    """
+    Average true range updated one bar at a time, equal to `atr`
+
+    :param window: number of days
+    """
+
+    def __init__(self, window=14):
+        _check_window(window)
+        self._mean = ExponentialMean(alpha=1.0 / window)
+        self._close = None
+
+    def update(self, high, low, close):
+        high, low, close = _array(high), _array(low), _array(close)
+        previous = self._close if self._close is not None else numpy.full(close.shape, numpy.nan)
+        value = numpy.fmax(high - low, numpy.fmax(numpy.abs(high - previous),
+                                                  numpy.abs(low - previous)))
+        self._close = close
+        return self._mean.update(value)
+
+    def extend(self, high, low, close):
+        close = _array(close)
+        if not len(close):
+            return close
+        high, low = _array(high), _array(low)
+        previous = numpy.empty_like(close)
+        previous[0] = self._close if self._close is not None else numpy.nan
+        previous[1:] = close[:-1]
+        self._close = close[-1]
+        ranges = numpy.fmax(high - low, numpy.fmax(numpy.abs(high - previous),
+                                                   numpy.abs(low - previous)))
+        return self._mean.extend(ranges)
+
+
+class Drawdown(object):
+    """
+    Drawdown updated one bar at a time, equal to `drawdown` and `max_drawdown`
+
+    :ivar peak: highest price so far
+    :ivar max_drawdown: largest drawdown so far
+    """
+
+    def __init__(self):
+        _require_numpy()
+        self.peak = None
+        self.max_drawdown = None
+
+    def update(self, price):
+        price = _array(price)
+        self.peak = price if self.peak is None else numpy.fmax(self.peak, price)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            current = price / self.peak - 1
+        self.max_drawdown = current if self.max_drawdown is None else \
+            numpy.fmin(self.max_drawdown, current)
+        return current[()]
+
+    def extend(self, prices):
+        prices = _array(prices)
+        if not len(prices):
+            return prices
+        if self.peak is not None:
+            return numpy.array([self.update(p) for p in prices])
+        drawdowns = drawdown(prices)
+        self.peak = numpy.fmax.reduce(prices, axis=0)
+        self.max_drawdown = numpy.fmin.reduce(drawdowns, axis=0)
+        return drawdowns
@@ -0,0 +1,132 @@
+"""
+Exchange rates between many currencies derived from a minimal set of pairs
+
+    >>> from yahoo_finance.matrix import CurrencyMatrix
+    >>> matrix = CurrencyMatrix(['USD', 'EUR', 'PLN', 'GBP', 'JPY'])
+    >>> matrix.rate('EUR', 'PLN')
+    4.2049
+    >>> matrix.rates  # rates[i, j] is the price of 1 `currencies[i]` in `currencies[j]`
+
+Only the pairs of the base currency with every other currency are fetched,
+in one `pair in (...)` query; cross and inverse rates are derived locally.
+Requires NumPy.
+"""
+import calendar
+from datetime import datetime
+import time
+
+from yahoo_finance import BATCH_CHUNK_SIZE, Currency, _Fetcher
+from yahoo_finance.frame import _require_numpy, numpy
+from yahoo_finance.quote import parse_number
+
+__all__ = ['CurrencyMatrix']
+
+
+def _timestamp(value):
+    # `DateTimeUTC` e.g. '2014-05-26 20:00:00 UTC+0000' as seconds since the epoch
+    if not value:
+        return float('nan')
+    return float(calendar.timegm(datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S').timetuple()))
+
+
+class CurrencyMatrix(object):
+    """
+    N x N matrices of exchange rates, bids, asks and spreads
+
+    Rates from `i` to `j` are derived from the fetched pairs `base` to `i` and
+    `base` to `j`. Bids and asks of a cross take the unfavourable side of each
+    pair, a derived rate is as old as the older of its pairs.
+
+    :param currencies: iterable of currency codes e.g. ['USD', 'EUR', 'PLN']
+    :param base: currency every fetched pair starts from, added to `currencies` if missing
+    :param cache: cache of query results replacing `Base.cache`, False disables caching
+    :param transport: transport of queries replacing `Base.transport`
+    :ivar rates, bids, asks, spreads: `float64` arrays, `[i, j]` is the price of one
+                                      `currencies[i]` in `currencies[j]`, NaN when unknown
+    :ivar updated: `float64` array of the time each rate was set in seconds since the epoch
+    :ivar errors: dict of YQLQueryError by pair which could not be fetched
+    """
+
+    def __init__(self, currencies, base='USD', cache=None, transport=None):
+        _require_numpy()
+        self._fetcher = _Fetcher(Currency, cache=cache, transport=transport)
+        self.cache = cache
+        self.transport = transport
+        self.base = base
+        self.currencies = [base]
+        for currency in currencies:
+            if currency not in self.currencies:
+                self.currencies.append(currency)
+        self.index = dict((c, i) for i, c in enumerate(self.currencies))
+        # fetched pairs and the index of their quote currency
+        self.pairs = [base + c for c in self.currencies[1:]]
+        self._positions = dict((pair, i + 1) for i, pair in enumerate(self.pairs))
+        self.data = {}
+        self.errors = {}
+        self.refresh()
+
+    def _fetch(self):
+        data, errors = {}, {}
+        for i in range(0, len(self.pairs), BATCH_CHUNK_SIZE):
+            chunk_data, chunk_errors = self._fetcher._fetch_chunk(
+                self.pairs[i:i + BATCH_CHUNK_SIZE])
+            data.update(chunk_data)
+            errors.update(chunk_errors)
+        return data, errors
+
+    def refresh(self):
+        """
+        Fetch the pairs again and rebuild all matrices
+
+        """
+        data, self.errors = self._fetch()
+        self.data = dict((pair, Currency(pair, data_set=results, cache=self.cache,
+                                         transport=self.transport).data_set)
+                         for pair, results in data.items())
+        size = len(self.currencies)
+        # price of one base currency in each currency
+        rate, bid, ask = numpy.ones(size), numpy.ones(size), numpy.ones(size)
+        updated = numpy.full(size, numpy.inf)
+        for pair, position in self._positions.items():
+            results = self.data.get(pair)
+            if results is None:
+                rate[position] = bid[position] = ask[position] = updated[position] = numpy.nan
+                continue
+            rate[position] = parse_number(results.get('Rate'))
+            bid[position] = parse_number(results.get('Bid'))
+            ask[position] = parse_number(results.get('Ask'))
+            updated[position] = _timestamp(results.get('DateTimeUTC'))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            self.rates = numpy.divide.outer(1.0 / rate, 1.0 / rate)
+            # selling `i` for the base currency at its ask, buying `j` at its bid
+            self.bids = numpy.divide.outer(1.0 / ask, 1.0 / bid)
+            self.asks = numpy.divide.outer(1.0 / bid, 1.0 / ask)
+        for matrix in (self.rates, self.bids, self.asks):
+            numpy.fill_diagonal(matrix, 1.0)
+        self.spreads = self.asks - self.bids
+        self.updated = numpy.minimum.outer(updated, updated)
+        numpy.fill_diagonal(self.updated, numpy.inf)
+
+    def rate(self, from_currency, to_currency):
+        """
+        Price of one `from_currency` in `to_currency`
+
+        :return: float, NaN when a pair could not be fetched
+        """
+        return float(self.rates[self.index[from_currency], self.index[to_currency]])
+
+    def age(self, now=None):
+        """
+        Seconds since each rate was set
+
+        :param now: seconds since the epoch, defaults to the current time
+        :return: `float64` array, 0 for a currency with itself, NaN when unknown
+        """
+        if now is None:
+            now = time.time()
+        with numpy.errstate(invalid='ignore'):
+            return numpy.maximum(now - self.updated, 0)
+
+    def __repr__(self):
+        return '<CurrencyMatrix %s: %d currencies, %d pairs fetched>' % (
+            self.base, len(self.currencies), len(self.data))
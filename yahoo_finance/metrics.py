@@ -0,0 +1,209 @@
+"""
+Timings and counters of the request pipeline, per YQL table
+
+    >>> from yahoo_finance import Base
+    >>> from yahoo_finance.metrics import Metrics
+    >>> Base.metrics = Metrics()  # for all objects, None (the default) disables it
+    >>> Share('YHOO').refresh()
+    >>> Base.metrics.stats()['quotes']['decode']
+    {'count': 2, 'total': 0.0011, 'p50': 0.0005, 'p99': 0.0006, 'max': 0.0006}
+    >>> Base.metrics.subscribe(lambda table, name, value: statsd.timing(...))
+
+Stages, in seconds:
+
+ * ``build``: building the YQL query
+ * ``connect``: opening a connection, only with `yql.ConnectionPool`
+ * ``transfer``: sending the request and reading the response, less ``connect``
+ * ``decode``: decoding JSON
+ * ``validate``: finding errors and N/A values in results
+ * ``process``: post-processing, e.g. `edt_to_utc` and `Quote` for quotes
+ * ``request``: all of a query, from the cache lookup to validated results
+
+Counters: ``requests``, ``errors``, ``cache_hits``, ``cache_misses``,
+``retries``, ``bytes`` (response bodies) and ``wire_bytes`` (bytes read by
+`yql.ConnectionPool`, before decompression).
+
+Disabled metrics cost one attribute lookup per stage.
+"""
+from collections import deque
+import math
+import threading
+import time
+
+__all__ = ['Metrics']
+
+STAGES = ('build', 'connect', 'transfer', 'decode', 'validate', 'process', 'request')
+COUNTERS = ('requests', 'errors', 'cache_hits', 'cache_misses', 'retries', 'bytes', 'wire_bytes')
+
+
+class _Local(threading.local):
+    # a class default, a missing attribute of a thread local is slow to look up
+    scope = None
+
+
+_local = _Local()
+clock = getattr(time, 'perf_counter', time.time)
+
+
+def table_of(query):
+    """
+    Table of a YQL query e.g. 'quotes' for `select * from yahoo.finance.quotes where ...`
+
+    """
+    start = query.find('yahoo.finance.')
+    if start < 0:
+        return 'other'
+    start += len('yahoo.finance.')
+    end = query.find(' ', start)
+    return query[start:end] if end > 0 else query[start:]
+
+
+def current():
+    """
+    Scope of the instrumented request in progress in this thread
+
+    :return: _Scope, None when metrics are disabled
+    """
+    return _local.scope
+
+
+class _Scope(object):
+    """
+    Metrics of one table, active while a request of that table is in progress
+
+    """
+
+    __slots__ = ('metrics', 'table', 'connect')
+
+    def __init__(self, metrics, table):
+        self.metrics = metrics
+        self.table = table
+        # seconds spent connecting during this request, left out of `transfer`
+        self.connect = 0.0
+
+    def time(self, stage, seconds):
+        if stage == 'connect':
+            self.connect += seconds
+        self.metrics.observe(self.table, stage, seconds)
+
+    def count(self, name, value=1):
+        self.metrics.count(self.table, name, value)
+
+
+class Metrics(object):
+    """
+    Thread-safe collector of stage timings and counters
+
+    :param samples: number of latest timings kept per table and stage for percentiles
+    """
+
+    def __init__(self, samples=1024):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._timings = {}
+        self._counters = {}
+        self._hooks = []
+
+    def subscribe(self, hook):
+        """
+        Call `hook(table, name, value)` for every timing and counter, e.g. to export them
+
+        Hooks run in the thread of the request, exceptions they raise are ignored.
+        """
+        with self._lock:
+            self._hooks = self._hooks + [hook]
+
+    def unsubscribe(self, hook):
+        with self._lock:
+            hooks = list(self._hooks)
+            hooks.remove(hook)
+            self._hooks = hooks
+
+    def _notify(self, table, name, value):
+        for hook in self._hooks:
+            try:
+                hook(table, name, value)
+            except Exception:
+                pass
+
+    def observe(self, table, stage, seconds):
+        """
+        Add a timing of `stage` in seconds
+
+        """
+        key = (table, stage)
+        with self._lock:
+            timings = self._timings.get(key)
+            if timings is None:
+                # count, total, max and the latest samples
+                timings = self._timings[key] = [0, 0.0, 0.0, deque(maxlen=self.samples)]
+            timings[0] += 1
+            timings[1] += seconds
+            if seconds > timings[2]:
+                timings[2] = seconds
+            timings[3].append(seconds)
+        if self._hooks:
+            self._notify(table, stage, seconds)
+
+    def count(self, table, name, value=1):
+        """
+        Add `value` to a counter
+
+        """
+        key = (table, name)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self._hooks:
+            self._notify(table, name, value)
+
+    def measure(self, query, func, *args):
+        """
+        Call `func(*args)` as the request of `query`, making its stages visible to `current`
+
+        """
+        scope = _Scope(self, table_of(query))
+        previous = _local.scope
+        _local.scope = scope
+        start = clock()
+        try:
+            return func(*args)
+        except Exception:
+            scope.count('errors')
+            raise
+        finally:
+            _local.scope = previous
+            scope.count('requests')
+            scope.time('request', clock() - start)
+
+    def stats(self):
+        """
+        Snapshot of counters and timings per table
+
+        Percentiles are of the latest `samples` timings, counts and totals of all of them.
+
+        :return: dict {table: {counter: value, stage: {'count', 'total', 'p50', 'p99', 'max'}}}
+        """
+        with self._lock:
+            timings = dict((key, (t[0], t[1], t[2], sorted(t[3])))
+                           for key, t in self._timings.items())
+            counters = dict(self._counters)
+        stats = {}
+        for (table, name), value in counters.items():
+            stats.setdefault(table, dict((c, 0) for c in COUNTERS))[name] = value
+        for (table, stage), (count, total, longest, samples) in timings.items():
+            stats.setdefault(table, dict((c, 0) for c in COUNTERS))[stage] = {
+                'count': count, 'total': total, 'max': longest,
+                'p50': _percentile(samples, 0.5), 'p99': _percentile(samples, 0.99)}
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._timings = {}
+            self._counters = {}
+
+
+def _percentile(samples, fraction):
+    # nearest rank of sorted samples
+    if not samples:
+        return None
+    return samples[max(0, int(math.ceil(fraction * len(samples))) - 1)]
@@ -0,0 +1,222 @@
+"""
+Historical prices of many symbols aligned on one date index
+
+    >>> from yahoo_finance.panel import get_historical_panel
+    >>> panel = get_historical_panel(['YHOO', 'GOOG', 'MSFT'], '2014-01-01', '2014-12-31')
+    >>> panel.values.shape  # dates x symbols x fields
+    (252, 3, 6)
+    >>> panel['adj_close']  # dates x symbols
+    >>> panel.mask  # True where a symbol has no row for a date
+
+No quotes are fetched. Short ranges put several symbols in one
+`symbol in (...)` historicaldata query, and queries run concurrently. Rows are
+parsed column by column straight into the panel.
+Requires NumPy.
+"""
+from multiprocessing.pool import ThreadPool
+
+from yahoo_finance import (BATCH_CHUNK_SIZE, HISTORICAL_MAX_WORKERS, HISTORICAL_RETRIES,
+                           HistoricalFrame, YQLHistoricalWindowError, _Fetcher)
+from yahoo_finance.frame import _parse, _require_numpy, numpy
+from yahoo_finance.planner import HISTORICAL_ROW_LIMIT, plan_historical
+
+__all__ = ['HistoricalPanel', 'get_historical_panel']
+
+
+class HistoricalPanel(object):
+    """
+    Dense array of historical prices, dates x symbols x fields, oldest day first
+
+    :ivar symbols: list of symbols, in the order of the second axis
+    :ivar dates: `datetime64[D]` array of every day any symbol traded
+    :ivar values: `float64` array, fields in the order of `FIELDS`; NaN where missing
+    :ivar mask: bool array dates x symbols, True where a symbol has no row for a date
+    :ivar errors: dict of YQLHistoricalWindowError, or transport error, by symbol not fetched
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'adj_close', 'volume')
+    # Yahoo names of `FIELDS`
+    COLUMNS = ('Open', 'High', 'Low', 'Close', 'Adj_Close', 'Volume')
+
+    def __init__(self, symbols, dates, values, mask, errors=None):
+        _require_numpy()
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.values = values
+        self.mask = mask
+        self.errors = errors or {}
+        self.index = dict((s, i) for i, s in enumerate(self.symbols))
+
+    def __getitem__(self, field):
+        """
+        Values of one field, dates x symbols
+
+        :param field: one of `FIELDS` e.g. 'adj_close'
+        """
+        try:
+            return self.values[:, :, self.FIELDS.index(field)]
+        except ValueError:
+            raise KeyError(field)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        if not len(self):
+            return '<HistoricalPanel: %d symbols, empty>' % len(self.symbols)
+        return '<HistoricalPanel: %d symbols, %d days from %s to %s>' % (
+            len(self.symbols), len(self), self.dates[0], self.dates[-1])
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + self.values.nbytes + self.mask.nbytes
+
+    def frame(self, symbol):
+        """
+        Days one symbol traded as a `HistoricalFrame`
+
+        """
+        column = self.index[symbol]
+        traded = ~self.mask[:, column]
+        values = self.values[traded, column]
+        columns = dict((name, numpy.ascontiguousarray(values[:, i]))
+                       for i, name in enumerate(self.FIELDS))
+        columns['volume'] = numpy.nan_to_num(columns['volume']).astype(numpy.int64)
+        return HistoricalFrame(symbol, self.dates[traded], **columns)
+
+
+class _PanelFetcher(_Fetcher):
+    """
+    Queries of historical prices for many symbols, rows parsed into columns
+
+    """
+
+    _table = 'historicaldata'
+    _key = 'symbol'
+
+    def __init__(self, symbols, retries, cache=None, transport=None):
+        super(_PanelFetcher, self).__init__(cache=cache, transport=transport)
+        self.symbols = symbols
+        self.index = dict((s, i) for i, s in enumerate(symbols))
+        self.requested = dict((s.upper(), i) for i, s in enumerate(symbols))
+        self.retries = retries
+
+    def _query(self, symbols, start_date, end_date):
+        return self._prepare_query(table=self._table, key=self._key, symbols=symbols,
+                                   startDate=start_date, endDate=end_date)
+
+    def fetch_window(self, symbols, start_date, end_date):
+        """
+        Rows of some symbols for one date window
+
+        :return: list of rows
+        :raises YQLHistoricalWindowError: when all attempts failed
+        """
+        return self._fetch_window(self._query(symbols, start_date, end_date), start_date,
+                                  end_date, self.retries)
+
+    def fetch(self, task):
+        """
+        Fetch a task, a query of many symbols failed by YQL is fetched again per symbol
+
+        A transport error fails all symbols of the task, they would fail the same way.
+
+        :return: tuple (list of column arrays, dict of errors by symbol)
+        """
+        symbols, start_date, end_date = task
+        try:
+            return [self.columns(symbols, self.fetch_window(symbols, start_date, end_date))], {}
+        except YQLHistoricalWindowError as e:
+            if len(symbols) == 1:
+                return [], {symbols[0]: e}
+        except EnvironmentError as e:
+            return [], dict((symbol, e) for symbol in symbols)
+        parsed, errors = [], {}
+        for symbol in symbols:
+            columns, error = self.fetch(([symbol], start_date, end_date))
+            parsed.extend(columns)
+            errors.update(error)
+        return parsed, errors
+
+    def columns(self, symbols, rows):
+        """
+        Parse rows into arrays of symbol positions, dates and values
+
+        """
+        if len(symbols) == 1:
+            positions = numpy.full(len(rows), self.index[symbols[0]], dtype=numpy.intp)
+        else:
+            requested = self.requested
+            positions = numpy.array([requested.get((r.get('Symbol') or '').upper(), -1)
+                                     for r in rows], dtype=numpy.intp)
+        values = numpy.empty((len(rows), len(HistoricalPanel.COLUMNS)))
+        for i, field in enumerate(HistoricalPanel.COLUMNS):
+            values[:, i] = _parse([r.get(field) for r in rows], numpy.float64, 'nan')
+        dates = numpy.array([r['Date'] for r in rows], dtype='datetime64[D]')
+        known = positions >= 0
+        if not known.all():
+            return positions[known], dates[known], values[known]
+        return positions, dates, values
+
+
+def get_historical_panel(symbols, start_date, end_date, max_workers=HISTORICAL_MAX_WORKERS,
+                         retries=HISTORICAL_RETRIES, chunk_size=BATCH_CHUNK_SIZE, cache=None,
+                         transport=None):
+    """
+    Get historical prices of many symbols aligned on the days any of them traded
+
+    Queries are planned by `planner.plan_historical`: ranges of up to
+    `HISTORICAL_ROW_LIMIT / n` days are fetched `n` symbols per query, longer
+    ones one symbol and one date window per query. A query of
+    many symbols which fails is fetched again per symbol, so an unknown symbol
+    does not fail the others.
+
+    :param symbols: iterable of symbols e.g. ['YHOO', 'GOOG']
+    :param start_date: string date in format '2009-09-11'
+    :param end_date: string date in format '2009-09-11'
+    :param max_workers: number of queries fetched at once
+    :param retries: times a query failed by YQL is fetched again
+    :param chunk_size: most symbols sent in a single query
+    :param cache: cache of query results replacing `Base.cache`, False disables caching
+    :param transport: transport of queries replacing `Base.transport`
+    :return: HistoricalPanel, symbols which could not be fetched are in `errors`
+    """
+    _require_numpy()
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be positive, got %r' % chunk_size)
+    unique, seen = [], set()
+    for symbol in symbols:
+        if symbol not in seen:
+            seen.add(symbol)
+            unique.append(symbol)
+    fetcher = _PanelFetcher(unique, retries, cache=cache, transport=transport)
+    tasks = plan_historical([(s, start_date, end_date) for s in unique], HISTORICAL_ROW_LIMIT,
+                            chunk_size).queries
+    workers = min(max_workers, len(tasks))
+    if workers > 1:
+        pool = ThreadPool(workers)
+        try:
+            results = pool.map(fetcher.fetch, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [fetcher.fetch(t) for t in tasks]
+    chunks, errors = [], {}
+    for columns, chunk_errors in results:
+        chunks.extend(columns)
+        for symbol, error in chunk_errors.items():
+            errors.setdefault(symbol, error)
+    fields = len(HistoricalPanel.FIELDS)
+    if chunks:
+        positions = numpy.concatenate([c[0] for c in chunks])
+        dates, rows = numpy.unique(numpy.concatenate([c[1] for c in chunks]), return_inverse=True)
+        values = numpy.full((len(dates), len(unique), fields), numpy.nan)
+        values[rows, positions] = numpy.concatenate([c[2] for c in chunks])
+        mask = numpy.ones((len(dates), len(unique)), dtype=bool)
+        mask[rows, positions] = False
+    else:
+        dates = numpy.array([], dtype='datetime64[D]')
+        values = numpy.full((0, len(unique), fields), numpy.nan)
+        mask = numpy.ones((0, len(unique)), dtype=bool)
+    return HistoricalPanel(unique, dates, values, mask, errors)
@@ -0,0 +1,257 @@
+"""
+YQL query templates and date window planning of historical prices
+
+    >>> from yahoo_finance.planner import plan_historical
+    >>> plan = plan_historical([('YHOO', '2014-01-01', '2014-01-31'),
+    ...                         ('GOOG', '2014-01-10', '2014-02-15'),
+    ...                         ('MSFT', '2000-01-01', '2014-12-31')])
+    >>> len(plan)  # requests, before any is made
+    16
+    >>> plan.queries[-1]
+    HistoricalQuery(symbols=('YHOO', 'GOOG'), start_date='2014-01-01', end_date='2014-02-15')
+
+Queries are built from templates compiled once per table, key, columns and
+conditions, with values escaped inside their quotes.
+
+Yahoo answers at most `HISTORICAL_ROW_LIMIT` rows per query. Rows are counted
+as calendar days, an upper bound of trading days: a range longer than the
+limit is split into windows of that many days, newest first, and short ranges
+of several symbols share one `symbol in (...)` query as long as symbols times
+days stay within the limit.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, datetime
+
+__all__ = ['HistoricalPlan', 'HistoricalQuery', 'build_query', 'date_windows', 'plan_historical']
+
+# most rows of a historicaldata query, 366 days make the windows of `get_date_range`
+HISTORICAL_ROW_LIMIT = 366
+# most symbols in a single `symbol in (...)` query
+PLAN_CHUNK_SIZE = 100
+# distinct query templates remembered, a table uses a handful of them
+_MAX_TEMPLATES = 256
+_templates = {}
+
+try:
+    _string_types = (str, unicode)
+except NameError:
+    _string_types = (str,)
+
+
+def quote_value(value):
+    """
+    Escape a value for a double quoted YQL string, e.g. a symbol
+
+    """
+    value = u'%s' % value if not isinstance(value, _string_types) else value
+    if '\\' in value or '"' in value:
+        value = value.replace('\\', '\\\\').replace('"', '\\"')
+    return value
+
+
+def _compile(table, key, columns, many, names):
+    # `%` of user supplied columns must not be taken for a placeholder
+    template = 'select %s from yahoo.finance.%s where %s %s' % (
+        ', '.join(columns).replace('%', '%%') if columns else '*', table, key,
+        'in (%s)' if many else '= "%s"')
+    return template + ''.join(' and %s="%%s"' % name for name in names)
+
+
+def build_query(table, key, value, columns=None, conditions=()):
+    """
+    Build a YQL select from the template of its shape
+
+        >>> build_query('quotes', 'symbol', ['YHOO', 'GOOG'], ['Volume'])
+        'select Volume from yahoo.finance.quotes where symbol in ("YHOO", "GOOG")'
+
+    :param table: table of `yahoo.finance`, e.g. 'quotes'
+    :param key: column compared with `value`, e.g. 'symbol'
+    :param value: one symbol, or a list of symbols queried with `in (...)`
+    :param columns: sequence of selected columns, None for `*`
+    :param conditions: sequence of (column, value) pairs added with `and column="value"`
+    """
+    many = not isinstance(value, _string_types)
+    columns = tuple(columns) if columns else None
+    names = tuple(name for name, _ in conditions)
+    shape = (table, key, columns, many, names)
+    template = _templates.get(shape)
+    if template is None:
+        if len(_templates) >= _MAX_TEMPLATES:
+            _templates.clear()
+        template = _templates[shape] = _compile(table, key, columns, many, names)
+    if many:
+        value = '"%s"' % '", "'.join([quote_value(v) for v in value])
+    else:
+        value = quote_value(value)
+    if not names:
+        return template % value
+    return template % ((value,) + tuple(quote_value(v) for _, v in conditions))
+
+
+def _ordinal(day, mask='%Y-%m-%d'):
+    return datetime.strptime(day, mask).toordinal()
+
+
+def _format(ordinal, mask='%Y-%m-%d'):
+    if mask == '%Y-%m-%d':
+        return date.fromordinal(ordinal).isoformat()
+    return date.fromordinal(ordinal).strftime(mask)
+
+
+def date_windows(start_date, end_date, days=HISTORICAL_ROW_LIMIT, mask='%Y-%m-%d'):
+    """
+    Split a date range in windows of at most `days` days, newest first
+
+    Dates are parsed once and windows computed on day numbers.
+
+    :param start_date: start date string
+    :param end_date: end date string
+    :param days: most days of a window
+    :param mask: format of dates e.g '%Y-%m-%d'
+    :return: list of tuples (start date, end date)
+    """
+    start, end = _ordinal(start_date, mask), _ordinal(end_date, mask)
+    if start > end:
+        raise ValueError('Start date "%s" is greater than "%s"' % (start_date, end_date))
+    if days < 1:
+        raise ValueError('Windows must have at least one day, got %r' % days)
+    windows = []
+    while end - start >= days:
+        windows.append((_format(end - days + 1, mask), _format(end, mask)))
+        end -= days
+    windows.append((_format(start, mask), _format(end, mask)))
+    return windows
+
+
+class HistoricalQuery(namedtuple('HistoricalQuery', 'symbols start_date end_date')):
+    """
+    One historicaldata query of a plan
+
+    :ivar symbols: tuple of symbols, queried with `in (...)` when there are many
+    :ivar start_date, end_date: date strings
+    """
+
+    __slots__ = ()
+
+    @property
+    def rows(self):
+        """Most rows the query can return"""
+        return len(self.symbols) * (_ordinal(self.end_date) - _ordinal(self.start_date) + 1)
+
+
+class HistoricalPlan(object):
+    """
+    Queries fetching requested date ranges of many symbols
+
+    A query of several symbols covers the union of their ranges, rows outside
+    the range requested for a symbol are dropped by `clip`.
+
+    :ivar queries: list of HistoricalQuery
+    :ivar ranges: dict of merged requested ranges by symbol, lists of (start, end) date strings
+    """
+
+    def __init__(self, queries, ranges):
+        self.queries = queries
+        self.ranges = ranges
+        self._starts = dict((s, [r[0] for r in rs]) for s, rs in ranges.items())
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    @property
+    def rows(self):
+        """Most rows all queries can return"""
+        return sum(q.rows for q in self.queries)
+
+    def wanted(self, symbol, day):
+        """
+        Whether `day` of `symbol` is in a requested range
+
+        """
+        starts = self._starts.get(symbol)
+        if not starts:
+            return False
+        i = bisect_right(starts, day) - 1
+        return i >= 0 and day <= self.ranges[symbol][i][1]
+
+    def clip(self, rows):
+        """
+        Rows of a query within the ranges requested for their symbol
+
+        """
+        return [r for r in rows if self.wanted(r.get('Symbol'), r.get('Date'))]
+
+
+def _merge(ranges):
+    # sorted (start, end) ordinals with overlapping and adjacent ones joined
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def plan_historical(requests, row_limit=HISTORICAL_ROW_LIMIT, chunk_size=PLAN_CHUNK_SIZE):
+    """
+    Plan the queries of historical prices of many symbols and date ranges
+
+    Ranges of a symbol which overlap or touch are merged first. Ranges longer
+    than `row_limit` days take one query per window of `row_limit` days, newest
+    first. Shorter ones, ordered by start, share queries of up to `chunk_size`
+    symbols while symbols times the days of their union stay within `row_limit`.
+
+    :param requests: iterable of tuples (symbol, start date, end date) in format '2009-09-11'
+    :param row_limit: most rows of a query, counted as days of each symbol
+    :param chunk_size: most symbols in a single query
+    :return: HistoricalPlan
+    """
+    if row_limit < 1 or chunk_size < 1:
+        raise ValueError('Row limit and chunk size must be positive, got %r and %r' % (
+            row_limit, chunk_size))
+    requested = {}
+    order = []
+    for symbol, start_date, end_date in requests:
+        start, end = _ordinal(start_date), _ordinal(end_date)
+        if start > end:
+            raise ValueError('Start date "%s" is greater than "%s"' % (start_date, end_date))
+        if symbol not in requested:
+            requested[symbol] = []
+            order.append(symbol)
+        requested[symbol].append((start, end))
+
+    queries, short = [], []
+    ranges = {}
+    for symbol in order:
+        merged = _merge(requested[symbol])
+        ranges[symbol] = [(_format(s), _format(e)) for s, e in merged]
+        for start, end in merged:
+            if end - start + 1 > row_limit:
+                queries.extend(HistoricalQuery((symbol,), s, e) for s, e in
+                               date_windows(_format(start), _format(end), row_limit))
+            else:
+                short.append((start, end, symbol))
+
+    # short ranges by start, the union of a query only grows to the right
+    short.sort(key=lambda item: (item[0], item[1]))
+    symbols, first, last = [], None, None
+    for start, end, symbol in short:
+        count = len(symbols) + (symbol not in symbols)
+        if symbols and (count > chunk_size or
+                        count * (max(end, last) - first + 1) > row_limit):
+            queries.append(HistoricalQuery(tuple(symbols), _format(first), _format(last)))
+            symbols = []
+        if not symbols:
+            first, last = start, end
+        if symbol not in symbols:
+            symbols.append(symbol)
+        last = max(last, end)
+    if symbols:
+        queries.append(HistoricalQuery(tuple(symbols), _format(first), _format(last)))
+    return HistoricalPlan(queries, ranges)
@@ -0,0 +1,270 @@
+"""
+Compact record of a `yahoo.finance.quotes` result
+
+`Share.data_set` is a `Quote`: it behaves like the dictionary Yahoo returned,
+but takes about a third of its memory and has numeric fields already parsed
+to floats. It is not a `dict` subclass, `to_dict()` gives one e.g. for `json.dumps`.
+
+    >>> yahoo = Share('YHOO')
+    >>> yahoo.data_set['LastTradePriceOnly']
+    '36.84'
+    >>> yahoo.data_set.numeric('LastTradePriceOnly')
+    36.84
+"""
+from array import array
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+__all__ = ['Quote', 'YQLFieldNotRequestedError']
+
+NUMERIC_FIELDS = (
+    'Ask', 'AverageDailyVolume', 'Bid', 'AskRealtime', 'BidRealtime', 'BookValue', 'Change',
+    'ChangeRealtime', 'DividendShare', 'EarningsShare', 'EPSEstimateCurrentYear',
+    'EPSEstimateNextYear', 'EPSEstimateNextQuarter', 'DaysLow', 'DaysHigh', 'YearLow', 'YearHigh',
+    'MarketCapitalization', 'MarketCapRealtime', 'EBITDA', 'ChangeFromYearLow',
+    'PercentChangeFromYearLow', 'ChangeFromYearHigh', 'PercebtChangeFromYearHigh',
+    'LastTradePriceOnly', 'HighLimit', 'LowLimit', 'FiftydayMovingAverage',
+    'TwoHundreddayMovingAverage', 'ChangeFromTwoHundreddayMovingAverage',
+    'PercentChangeFromTwoHundreddayMovingAverage', 'ChangeFromFiftydayMovingAverage',
+    'PercentChangeFromFiftydayMovingAverage', 'Open', 'PreviousClose', 'ChangeinPercent',
+    'PriceSales', 'PriceBook', 'PERatio', 'PEGRatio', 'PriceEPSEstimateCurrentYear',
+    'PriceEPSEstimateNextYear', 'ShortRatio', 'OneyrTargetPrice', 'Volume', 'DividendYield',
+    'PercentChange',
+)
+
+_NUMERIC_INDEX = dict((field, i) for i, field in enumerate(NUMERIC_FIELDS))
+_MULTIPLIERS = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12, '%': 1.0}
+_NAN = float('nan')
+# distinct field layouts remembered, responses of one table share a handful of them
+_MAX_LAYOUTS = 256
+_layouts = {}
+
+try:
+    _string_types = (str, unicode)
+except NameError:
+    _string_types = (str,)
+
+
+def parse_number(value):
+    """
+    Parse a Yahoo number such as '+0.30', '0.85%', '35.20B' or '1,234'
+
+    :return: float, NaN when the value is missing or not a number
+    """
+    if not value:
+        return _NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        multiplier = _MULTIPLIERS.get(value[-1])
+        if multiplier is not None:
+            return float(value[:-1].replace(',', '')) * multiplier
+        return float(value.replace(',', ''))
+    except (TypeError, ValueError):
+        return _NAN
+
+
+class YQLFieldNotRequestedError(KeyError):
+
+    def __init__(self, field):
+        super(YQLFieldNotRequestedError, self).__init__(field)
+        self.field = field
+
+    def __str__(self):
+        return 'Field "%s" was not requested, add it to `fields`' % self.field
+
+
+class _Layout(object):
+    """
+    Precompiled map of an ordered set of fields, shared by all quotes with these fields
+
+    A projected layout holds only the fields requested with `fields`, any other is an error.
+    """
+
+    __slots__ = ('fields', 'index', 'numeric', 'projected')
+
+    def __init__(self, fields, projected=False):
+        self.fields = fields
+        self.index = dict((field, i) for i, field in enumerate(fields))
+        self.numeric = tuple((_NUMERIC_INDEX[f], i) for i, f in enumerate(fields)
+                             if f in _NUMERIC_INDEX)
+        self.projected = projected
+
+    @classmethod
+    def get(cls, fields, projected=False):
+        key = (fields, projected)
+        layout = _layouts.get(key)
+        if layout is None:
+            if len(_layouts) >= _MAX_LAYOUTS:
+                _layouts.clear()
+            layout = _layouts[key] = cls(fields, projected)
+        return layout
+
+
+def _unpickle(fields, text, offsets, nones, numbers, extra, projected=False):
+    # packed values as they were, numeric fields are not parsed again
+    quote = Quote.__new__(Quote)
+    quote._layout = _Layout.get(fields, projected)
+    quote._text = text
+    quote._offsets = offsets
+    quote._nones = nones
+    quote._numbers = numbers
+    quote._extra = extra
+    return quote
+
+
+class Quote(MutableMapping):
+    """
+    Compact mapping of quote fields with numeric fields parsed once
+
+    All string values are packed into one string sliced by an offsets array,
+    which avoids a dict and a string object per field.
+
+    :param data: dict of results as returned by Yahoo
+    :param projected: `data` holds only the requested fields, others raise
+                      `YQLFieldNotRequestedError` rather than `KeyError`
+    """
+
+    __slots__ = ('_layout', '_text', '_offsets', '_nones', '_numbers', '_extra')
+
+    def __init__(self, data, projected=False):
+        fields, values, extra = [], [], None
+        for field, value in data.items():
+            if value is None or isinstance(value, _string_types):
+                fields.append(field)
+                values.append(value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[field] = value
+        self._extra = extra
+        self._pack(_Layout.get(tuple(fields), projected), values)
+
+    def _pack(self, layout, values):
+        nones = 0
+        position = 0
+        offsets = [0]
+        for i, value in enumerate(values):
+            if value is None:
+                nones |= 1 << i
+            else:
+                position += len(value)
+            offsets.append(position)
+        self._layout = layout
+        self._text = ''.join([v for v in values if v is not None])
+        self._offsets = array('H' if position < 0xffff else 'I', offsets)
+        self._nones = nones
+        numbers = array('d', [_NAN]) * len(NUMERIC_FIELDS)
+        for n, i in layout.numeric:
+            if values[i] is not None:
+                numbers[n] = parse_number(values[i])
+        self._numbers = numbers
+
+    def _value(self, i):
+        if self._nones >> i & 1:
+            return None
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+    def __getitem__(self, field):
+        if self._extra is not None and field in self._extra:
+            return self._extra[field]
+        i = self._layout.index.get(field)
+        if i is None:
+            if self._layout.projected:
+                raise YQLFieldNotRequestedError(field)
+            raise KeyError(field)
+        return self._value(i)
+
+    def __setitem__(self, field, value):
+        layout = self._layout
+        if field not in layout.index or not (value is None or isinstance(value, _string_types)):
+            if self._extra is None:
+                self._extra = {}
+            self._extra[field] = value
+            return
+        values = [self._value(i) for i in range(len(layout.fields))]
+        values[layout.index[field]] = value
+        self._pack(layout, values)
+
+    def __delitem__(self, field):
+        found = self._extra is not None and field in self._extra
+        if found:
+            del self._extra[field]
+        layout = self._layout
+        if field in layout.index:
+            kept = [i for i, f in enumerate(layout.fields) if f != field]
+            self._pack(_Layout.get(tuple(layout.fields[i] for i in kept), layout.projected),
+                       [self._value(i) for i in kept])
+        elif not found:
+            raise KeyError(field)
+
+    def __contains__(self, field):
+        return field in self._layout.index or self._extra is not None and field in self._extra
+
+    def __iter__(self):
+        for field in self._layout.fields:
+            if self._extra is None or field not in self._extra:
+                yield field
+        if self._extra is not None:
+            for field in self._extra:
+                yield field
+
+    def __len__(self):
+        if self._extra is None:
+            return len(self._layout.fields)
+        return len(set(self._layout.fields).union(self._extra))
+
+    def __eq__(self, other):
+        if isinstance(other, Quote) and self._extra is None and other._extra is None:
+            if self._layout is other._layout:
+                return (self._nones == other._nones and self._text == other._text and
+                        self._offsets == other._offsets)
+        return MutableMapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # the fields of a layout are one tuple object, pickled once for all its quotes
+        return _unpickle, (self._layout.fields, self._text, self._offsets, self._nones,
+                           self._numbers, self._extra, self._layout.projected)
+
+    def __repr__(self):
+        return 'Quote(%r)' % self.to_dict()
+
+    def numeric(self, field):
+        """
+        Value of a numeric field as float, parsed when the quote was built
+
+        :param field: one of `NUMERIC_FIELDS` e.g. 'LastTradePriceOnly'
+        :return: float, NaN when the value is missing
+        """
+        if self._extra is not None and field in self._extra:
+            return parse_number(self._extra[field])
+        if self._layout.projected and field not in self._layout.index:
+            raise YQLFieldNotRequestedError(field)
+        try:
+            return self._numbers[_NUMERIC_INDEX[field]]
+        except KeyError:
+            raise KeyError('%s is not a numeric field' % field)
+
+    def to_dict(self):
+        """
+        Copy as a plain dictionary
+
+        """
+        return dict(self.items())
+
+    def copy(self):
+        """
+        Copy as a plain dictionary, like `copy` of the `dict` data sets of earlier versions
+
+        """
+        return self.to_dict()
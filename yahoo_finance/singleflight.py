@@ -0,0 +1,92 @@
+"""
+Coalescing of concurrent identical queries
+
+While a query is in flight, other threads sending the same query wait for it
+and share its results instead of sending their own request.
+
+    >>> from yahoo_finance import Base
+    >>> from yahoo_finance.singleflight import SingleFlight
+    >>> Base.flight = SingleFlight()  # the default
+    >>> Base.flight = None  # send every query
+"""
+import threading
+
+__all__ = ['SingleFlight']
+
+
+def _copy(results):
+    # results of a query, copied for each caller; also used by `cache`, which needs
+    # `OrderedDict` and so must not be imported with `yahoo_finance` on Python 2.6
+    if isinstance(results, dict):
+        return dict(results)
+    return [dict(r) for r in results]
+
+
+class _Call(object):
+
+    __slots__ = ('done', 'results', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+    Run a function once for all threads calling it with the same key at the same time
+
+    Threads which joined a call get their own copy of its results, or the
+    exception it raised.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """
+        Call `func(*args)` unless a call for `key` is in flight, then wait for its results
+
+        :param key: e.g. a YQL query
+        :return: results of `func`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _copy(call.results)
+        try:
+            call.results = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            call.done.set()
+        # results handed to waiting threads must stay untouched
+        return _copy(call.results) if waiters else call.results
+
+    def stats(self):
+        """
+        Snapshot of counters
+
+        :return: dict
+        """
+        with self._lock:
+            return {'in_flight': len(self._calls), 'calls': self.calls, 'shared': self.shared}
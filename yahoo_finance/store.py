@@ -0,0 +1,163 @@
+"""
+Persistent store of historical prices
+
+    >>> from yahoo_finance import Share
+    >>> from yahoo_finance.store import HistoricalStore
+    >>> store = HistoricalStore('~/.yahoo_finance.db')
+    >>> yahoo = Share('YHOO')
+    >>> history = yahoo.get_historical('2000-01-01', '2016-04-12', store=store)
+
+Only date ranges missing from the store are fetched, the store remembers
+which ranges were fetched so days without trading are not asked for again.
+"""
+from datetime import date, datetime, timedelta
+import os
+import sqlite3
+import threading
+
+__all__ = ['HistoricalStore']
+
+FIELDS = ('Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Adj_Close')
+_MASK = '%Y-%m-%d'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open TEXT,
+    high TEXT,
+    low TEXT,
+    close TEXT,
+    volume TEXT,
+    adj_close TEXT,
+    PRIMARY KEY (symbol, date)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    PRIMARY KEY (symbol, start_date)
+);
+'''
+
+
+def _day(value, days=0):
+    return (datetime.strptime(value, _MASK) + timedelta(days=days)).strftime(_MASK)
+
+
+class HistoricalStore(object):
+    """
+    SQLite store of daily bars, safe to share between threads and processes
+
+    Values are kept as the strings Yahoo returned, rows read back are equal
+    to the rows `Share.get_historical` returns from the network.
+
+    :param path: database file, created if it does not exist
+    :param timeout: seconds to wait for a lock held by another writer
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = os.path.expanduser(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+        return conn
+
+    def coverage(self, symbol):
+        """
+        Date ranges already fetched for `symbol`
+
+        :return: list of tuples (start date, end date), oldest first
+        """
+        return self._connection().execute(
+            'SELECT start_date, end_date FROM coverage WHERE symbol = ? ORDER BY start_date',
+            (symbol,)).fetchall()
+
+    def missing(self, symbol, start_date, end_date):
+        """
+        Date ranges between `start_date` and `end_date` not fetched yet
+
+        Days after today have no bars yet and are never missing.
+
+        :return: list of tuples (start date, end date), newest first
+        """
+        end_date = min(end_date, date.today().strftime(_MASK))
+        gaps = []
+        current = start_date
+        for start, end in self.coverage(symbol):
+            if end < current:
+                continue
+            if start > end_date:
+                break
+            if start > current:
+                gaps.append((current, _day(start, -1)))
+            current = _day(end, 1)
+            if current > end_date:
+                break
+        if current <= end_date:
+            gaps.append((current, end_date))
+        return gaps[::-1]
+
+    def read(self, symbol, start_date, end_date):
+        """
+        Stored bars of `symbol` between `start_date` and `end_date`
+
+        :return: list of dicts, newest first
+        """
+        rows = self._connection().execute(
+            'SELECT symbol, date, open, high, low, close, volume, adj_close FROM bars '
+            'WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date DESC',
+            (symbol, start_date, end_date))
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def write(self, symbol, start_date, end_date, rows):
+        """
+        Store bars fetched for a date range and mark the range as fetched
+
+        Today and later days are stored but not marked, as their bars may still change.
+
+        :param rows: list of dicts as returned by `Share.get_historical`
+        """
+        end = min(end_date, _day(date.today().strftime(_MASK), -1))
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(symbol,) + tuple(row.get(f) for f in FIELDS[1:]) for row in rows])
+            if start_date <= end:
+                self._cover(conn, symbol, start_date, end)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _cover(conn, symbol, start_date, end_date):
+        # merge with overlapping and adjacent ranges
+        overlapping = conn.execute(
+            'SELECT start_date, end_date FROM coverage '
+            'WHERE symbol = ? AND start_date <= ? AND end_date >= ?',
+            (symbol, _day(end_date, 1), _day(start_date, -1))).fetchall()
+        for start, end in overlapping:
+            start_date, end_date = min(start, start_date), max(end, end_date)
+            conn.execute('DELETE FROM coverage WHERE symbol = ? AND start_date = ?', (symbol, start))
+        conn.execute('INSERT INTO coverage VALUES (?, ?, ?)', (symbol, start_date, end_date))
+
+    def close(self):
+        """
+        Close the connection of the current thread
+
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,281 @@
+"""
+Polling of live quotes with callbacks for changed quotes only
+
+    >>> from yahoo_finance.stream import QuoteStream
+    >>> stream = QuoteStream(['YHOO', 'GOOG'], interval=5)
+    >>> stream.subscribe(on_change)  # called with a `QuoteEvent`
+    >>> stream.start()  # polls in a background thread
+    >>> stream.add('MSFT')
+    >>> stream.stop()
+
+Iterating over a stream polls in the current thread instead:
+
+    >>> for event in QuoteStream(['YHOO'], interval=5):
+    ...     on_change(event)
+"""
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+from yahoo_finance import (BATCH_CHUNK_SIZE, Share, YQLQueryError, YQLResponseMalformedError,
+                           _Fetcher)
+
+__all__ = ['QuoteEvent', 'QuoteStream']
+
+# number of chunks of a poll fetched at once
+STREAM_MAX_WORKERS = 4
+
+# `changes` maps each changed field to a tuple (old value, new value),
+# old values are None on the first poll of a symbol
+QuoteEvent = namedtuple('QuoteEvent', 'symbol share changes')
+
+
+def diff(previous, current):
+    """
+    Fields which differ between two quotes
+
+    :param previous: Quote, or None when there is no previous quote
+    :param current: Quote
+    :return: dict {field: (old value, new value)}
+    """
+    if previous is None:
+        return dict((field, (None, value)) for field, value in current.items())
+    if previous == current:
+        return {}
+    changes = {}
+    for field, value in current.items():
+        old = previous.get(field)
+        if old != value:
+            changes[field] = (old, value)
+    for field in previous:
+        if field not in current:
+            changes[field] = (previous[field], None)
+    return changes
+
+
+class QuoteStream(object):
+    """
+    Poll quotes of a set of symbols and report the ones which changed
+
+    Each poll fetches all symbols with one `symbol in (...)` query per chunk.
+    Subscribers are called, and iteration yields, a `QuoteEvent` for every
+    symbol whose quote differs from the previous poll.
+
+    :param symbols: iterable of symbols e.g. ['YHOO', 'GOOG']
+    :param interval: seconds between the start of two polls
+    :param chunk_size: number of symbols sent in a single query
+    :param max_workers: number of chunks fetched at once
+    :param cache: cache of query results, disabled by default so every poll sees fresh quotes
+    :param transport: transport of queries replacing `Base.transport`
+    :param fields: quote fields polled e.g. ['LastTradePriceOnly', 'Volume'], None for all
+    """
+
+    def __init__(self, symbols=(), interval=5, chunk_size=BATCH_CHUNK_SIZE,
+                 max_workers=STREAM_MAX_WORKERS, cache=False, transport=None, fields=None):
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be positive, got %r' % chunk_size)
+        self._fetcher = _Fetcher(Share, cache=cache, transport=transport, fields=fields)
+        self.cache = cache
+        self.transport = transport
+        self.fields = self._fetcher.fields
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.symbols = []
+        # members of `symbols`, checked for every quote of a poll
+        self._symbols = set()
+        self.shares = {}
+        self.errors = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._metrics = {'polls': 0, 'events': 0, 'failed_chunks': 0, 'callback_errors': 0,
+                         'skipped_polls': 0, 'last_latency': None, 'max_latency': 0.0,
+                         'total_latency': 0.0, 'last_lag': None, 'max_lag': 0.0}
+        self.add(*symbols)
+
+    def add(self, *symbols):
+        """
+        Add symbols, they are fetched from the next poll
+
+        """
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in self._symbols:
+                    self._symbols.add(symbol)
+                    self.symbols.append(symbol)
+
+    def remove(self, *symbols):
+        """
+        Remove symbols, with their last quotes and errors
+
+        """
+        with self._lock:
+            for symbol in symbols:
+                if symbol in self._symbols:
+                    self._symbols.discard(symbol)
+                    self.symbols.remove(symbol)
+                self.shares.pop(symbol, None)
+                self.errors.pop(symbol, None)
+
+    def subscribe(self, callback):
+        """
+        Call `callback(event)` for every `QuoteEvent`, from the polling thread
+
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def _fetch_all(self, symbols):
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+
+        def fetch(chunk):
+            try:
+                return self._fetcher._fetch_chunk(chunk)
+            except (YQLQueryError, YQLResponseMalformedError, EnvironmentError):
+                # the chunk is polled again next time
+                return None
+
+        workers = min(self.max_workers, len(chunks))
+        if workers > 1:
+            pool = ThreadPool(workers)
+            try:
+                return pool.map(fetch, chunks)
+            finally:
+                pool.close()
+                pool.join()
+        return [fetch(c) for c in chunks]
+
+    def poll(self):
+        """
+        Fetch all symbols once and notify subscribers of changed quotes
+
+        :return: list of `QuoteEvent`
+        """
+        start = time.time()
+        with self._lock:
+            symbols = list(self.symbols)
+        results = self._fetch_all(symbols)
+        events = []
+        failed = 0
+        with self._lock:
+            for chunk_results in results:
+                if chunk_results is None:
+                    failed += 1
+                    continue
+                data, errors = chunk_results
+                for symbol, error in errors.items():
+                    if symbol in self._symbols:
+                        self.errors[symbol] = error
+                for symbol, quote in data.items():
+                    if symbol not in self._symbols:
+                        # removed while the poll was in flight
+                        continue
+                    self.errors.pop(symbol, None)
+                    share = self.shares.get(symbol)
+                    if share is None:
+                        share = self.shares[symbol] = Share(symbol, data_set=quote, cache=self.cache,
+                                                            transport=self.transport,
+                                                            fields=self.fields)
+                        previous = None
+                    else:
+                        previous = share.data_set
+                        share.data_set = share._post_process(quote)
+                    changes = diff(previous, share.data_set)
+                    if changes:
+                        events.append(QuoteEvent(symbol, share, changes))
+            subscribers = list(self._subscribers)
+            latency = time.time() - start
+            metrics = self._metrics
+            metrics['polls'] += 1
+            metrics['events'] += len(events)
+            metrics['failed_chunks'] += failed
+            metrics['last_latency'] = latency
+            metrics['max_latency'] = max(metrics['max_latency'], latency)
+            metrics['total_latency'] += latency
+        for event in events:
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception:
+                    with self._lock:
+                        self._metrics['callback_errors'] += 1
+        return events
+
+    def _schedule(self):
+        """
+        Wait for each poll, polls start every `interval` seconds until `stop`
+
+        Polls which could not start in time are skipped rather than run back to back.
+        """
+        scheduled = time.time()
+        while not self._stopped.is_set():
+            delay = scheduled - time.time()
+            if delay > 0 and self._stopped.wait(delay):
+                return
+            lag = max(0.0, time.time() - scheduled)
+            with self._lock:
+                self._metrics['last_lag'] = lag
+                self._metrics['max_lag'] = max(self._metrics['max_lag'], lag)
+            yield
+            scheduled += self.interval
+            behind = time.time() - scheduled
+            if behind > self.interval:
+                skipped = int(behind // self.interval)
+                scheduled += skipped * self.interval
+                with self._lock:
+                    self._metrics['skipped_polls'] += skipped
+
+    def __iter__(self):
+        self._stopped.clear()
+        for _ in self._schedule():
+            for event in self.poll():
+                yield event
+
+    def _run(self):
+        for _ in self._schedule():
+            self.poll()
+
+    def start(self):
+        """
+        Poll in a background thread
+
+        """
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError('QuoteStream is already running')
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='QuoteStream')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop polling, waits for a poll in progress to finish
+
+        """
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        """
+        Snapshot of polling metrics
+
+        Latency is the time a poll took, lag how late it started after its scheduled time.
+
+        :return: dict
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['symbols'] = len(self.symbols)
+        total = metrics.pop('total_latency')
+        metrics['avg_latency'] = total / metrics['polls'] if metrics['polls'] else None
+        return metrics
@@ -0,0 +1,118 @@
+"""
+Transports recording responses to a file and replaying them without the network
+
+    >>> from yahoo_finance import Share, yql
+    >>> from yahoo_finance.transport import RecordingTransport, ReplayTransport
+    >>> yql.YQLQuery.transport = RecordingTransport('yhoo.jsonl')
+    >>> yahoo = Share('YHOO')  # fetched and recorded
+    >>> yql.YQLQuery.transport = ReplayTransport('yhoo.jsonl', latency=0.05)
+    >>> yahoo = Share('YHOO')  # answered from the file
+
+A transport can also be given to a single object, `Share('YHOO', transport=...)`.
+"""
+from io import BytesIO
+import json
+import os
+import threading
+import time
+
+try:
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import HTTPError
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from urlparse import parse_qs, urlsplit
+
+from yahoo_finance import yql
+from yahoo_finance.cache import normalize_query
+
+__all__ = ['RecordingTransport', 'ReplayTransport']
+
+
+def _query(url):
+    # normalized YQL query of a request url, the key of recorded responses
+    values = parse_qs(urlsplit(url).query).get('q')
+    return normalize_query(values[0]) if values else url
+
+
+class RecordingTransport(yql.Transport):
+    """
+    Send requests with another transport and append every response to a file
+
+    Each line of the file is a JSON object with the query, the HTTP status and the body.
+
+    :param path: file the responses are appended to
+    :param transport: transport sending the requests, `yql.YQLQuery.transport` by default
+    """
+
+    def __init__(self, path, transport=None):
+        self.path = os.path.expanduser(path)
+        self.transport = transport if transport is not None else yql.YQLQuery.transport
+        self._lock = threading.Lock()
+
+    def _record(self, url, status, body):
+        line = json.dumps({'query': _query(url), 'status': status,
+                           'body': body.decode('utf-8')}, sort_keys=True)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+    def request(self, url):
+        try:
+            body = self.transport.request(url)
+        except HTTPError as e:
+            self._record(url, e.code, e.read())
+            raise
+        self._record(url, 200, body)
+        return body
+
+
+class ReplayTransport(yql.Transport):
+    """
+    Answer requests with responses recorded by `RecordingTransport`
+
+    Responses recorded for the same query are replayed in order, the last
+    one is repeated once all were replayed.
+
+    :param path: file written by `RecordingTransport`
+    :param latency: seconds every request takes, simulating the network
+    :ivar requests: number of requests answered
+    """
+
+    def __init__(self, path, latency=0):
+        self.path = os.path.expanduser(path)
+        self.latency = latency
+        self.requests = 0
+        self._responses = {}
+        self._replayed = {}
+        self._lock = threading.Lock()
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._responses.setdefault(record['query'], []).append(
+                        (record['status'], record['body'].encode('utf-8')))
+
+    def __len__(self):
+        return len(self._responses)
+
+    def request(self, url):
+        """
+        :raises KeyError: when no response was recorded for the query
+        """
+        query = _query(url)
+        with self._lock:
+            responses = self._responses.get(query)
+            if responses is None:
+                raise KeyError('No response recorded for query: %s' % query)
+            i = self._replayed.get(query, 0)
+            self._replayed[query] = i + 1
+            self.requests += 1
+        status, body = responses[min(i, len(responses) - 1)]
+        if self.latency:
+            time.sleep(self.latency)
+        if not 200 <= status < 300:
+            raise HTTPError(url, status, 'Recorded error', {}, BytesIO(body))
+        return body
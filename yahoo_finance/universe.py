@@ -0,0 +1,145 @@
+"""
+Quotes of very large sets of symbols fetched by a pool of processes
+
+    >>> from yahoo_finance.universe import fetch_universe
+    >>> shares, errors = fetch_universe(symbols, workers=8, progress=print)
+
+Symbols are split in shards of `shard_size`, each worker fetches a shard with
+one `symbol in (...)` query per `chunk_size` symbols and parses the quotes, so
+decoding and date conversion run on all cores. Workers keep their own
+connections, and send parsed quotes back packed (see `Quote`), which the
+parent loads without parsing them again. A shard failing only fails its own
+symbols.
+"""
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+
+from yahoo_finance import (BATCH_CHUNK_SIZE, Base, Share, YQLQueryError,
+                           YQLResponseMalformedError, _Fetcher)
+from yahoo_finance.singleflight import SingleFlight
+
+__all__ = ['fetch_universe', 'iter_universe']
+
+# number of symbols fetched by a worker at a time
+UNIVERSE_SHARD_SIZE = 500
+
+
+def _init_worker(transport):
+    # locks of the parent's single-flight may have been held by another thread when it forked
+    if Base.flight is not None:
+        Base.flight = SingleFlight()
+    if transport is not None:
+        Base.transport = transport
+
+
+def _fetch_shard(task):
+    """
+    Fetch and parse the quotes of a shard, in a worker
+
+    :param task: tuple (list of symbols, chunk size, transport or None, fields or None)
+    :return: tuple (list of symbols, {symbol: Quote}, {symbol: error message})
+    """
+    shard, chunk_size, transport, fields = task
+    fetcher = _Fetcher(Share, transport=transport, fields=fields)
+    quotes, errors = {}, {}
+    for i in range(0, len(shard), chunk_size):
+        chunk = shard[i:i + chunk_size]
+        try:
+            data, chunk_errors = fetcher._fetch_chunk(chunk)
+            for symbol, results in data.items():
+                quotes[symbol] = Share(symbol, data_set=results, fields=fields).data_set
+        except (YQLQueryError, YQLResponseMalformedError, EnvironmentError) as e:
+            errors.update((symbol, str(e)) for symbol in chunk)
+            continue
+        except Exception as e:
+            # anything else is reported rather than lost with the whole pool
+            errors.update((symbol, '%s: %s' % (type(e).__name__, e)) for symbol in chunk)
+            continue
+        errors.update((symbol, str(error)) for symbol, error in chunk_errors.items())
+    return shard, quotes, errors
+
+
+def _share(symbol, quote, transport, fields):
+    # a `Share` holding a quote already processed by a worker
+    return Share.from_data_set(symbol, quote, transport=transport, fields=fields)
+
+
+def _pool(mode, workers, transport):
+    if mode == 'process':
+        return Pool(workers, initializer=_init_worker, initargs=(transport,))
+    if mode == 'thread':
+        return ThreadPool(workers)
+    raise ValueError('Mode must be "process" or "thread", got %r' % mode)
+
+
+def iter_universe(symbols, workers=None, mode='process', shard_size=UNIVERSE_SHARD_SIZE,
+                  chunk_size=BATCH_CHUNK_SIZE, transport=None, fields=None):
+    """
+    Fetch quotes of many symbols, yielding the results of each shard as it completes
+
+    Shards come in the order they complete, not the order of `symbols`.
+
+    :param symbols: iterable of symbols e.g. ['YHOO', 'GOOG']
+    :param workers: number of processes or threads, defaults to the number of CPUs
+    :param mode: 'process' for a process pool, 'thread' for a thread pool
+    :param shard_size: number of symbols fetched by a worker at a time
+    :param chunk_size: number of symbols sent in a single query
+    :param transport: transport of queries replacing `Base.transport`; with processes
+                      it must be picklable unless they are forked
+    :param fields: quote fields queried e.g. ['LastTradePriceOnly', 'Volume'], None for all
+    :return: generator of tuples (list of symbols, {symbol: Share}, {symbol: YQLQueryError})
+    """
+    if shard_size < 1 or chunk_size < 1:
+        raise ValueError('Shard and chunk sizes must be positive, got %r and %r' % (
+            shard_size, chunk_size))
+    unique = []
+    seen = set()
+    for symbol in symbols:
+        if symbol not in seen:
+            seen.add(symbol)
+            unique.append(symbol)
+    shards = [unique[i:i + shard_size] for i in range(0, len(unique), shard_size)]
+    if not shards:
+        return
+    workers = min(workers or cpu_count(), len(shards))
+    pool = _pool(mode, workers, transport)
+    # processes got the transport once, when they started
+    task_transport = transport if mode == 'thread' else None
+    try:
+        fields = tuple(fields) if fields is not None else None
+        tasks = [(shard, chunk_size, task_transport, fields) for shard in shards]
+        for shard, quotes, errors in pool.imap_unordered(_fetch_shard, tasks):
+            yield (shard, dict((s, _share(s, q, transport, fields)) for s, q in quotes.items()),
+                   dict((s, YQLQueryError(message)) for s, message in errors.items()))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def fetch_universe(symbols, workers=None, mode='process', shard_size=UNIVERSE_SHARD_SIZE,
+                   chunk_size=BATCH_CHUNK_SIZE, transport=None, fields=None, progress=None):
+    """
+    Fetch quotes of many symbols with a pool of processes
+
+    :param symbols: iterable of symbols e.g. ['YHOO', 'GOOG']
+    :param workers: number of processes or threads, defaults to the number of CPUs
+    :param mode: 'process' for a process pool, 'thread' for a thread pool
+    :param shard_size: number of symbols fetched by a worker at a time
+    :param chunk_size: number of symbols sent in a single query
+    :param transport: transport of queries replacing `Base.transport`
+    :param fields: quote fields queried, None for all
+    :param progress: called with (symbols done, symbols in total) after each shard
+    :return: tuple of dicts ({symbol: Share}, {symbol: YQLQueryError})
+    """
+    symbols = list(symbols)
+    total = len(set(symbols))
+    shares, errors = {}, {}
+    done = 0
+    for shard, shard_shares, shard_errors in iter_universe(
+            symbols, workers, mode, shard_size, chunk_size, transport, fields):
+        shares.update(shard_shares)
+        errors.update(shard_errors)
+        done += len(shard)
+        if progress is not None:
+            progress(done, total)
+    return shares, errors
@@ -32,16 +32,42 @@ under the following terms:
   THE SOFTWARE.
 """
 
+from io import BytesIO
+import os
+import random
+import socket
+import threading
+import time
+import zlib
+
+from yahoo_finance.metrics import clock, current
+
 try:
-    from urllib.request import urlopen
+    from http.client import HTTPConnection, HTTPSConnection, HTTPException
 except ImportError:
-    from urllib2 import urlopen
+    from httplib import HTTPConnection, HTTPSConnection, HTTPException
 try:
-    from urllib.parse import urlencode
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import HTTPError
+try:
+    from urllib.error import URLError
+except ImportError:
+    from urllib2 import URLError
+try:
+    from urllib.parse import urlencode, urlsplit
 except ImportError:
     from urllib import urlencode
+    from urlparse import urlsplit
 
-from simplejson import loads
+# fastest JSON decoder available, all of them take bytes
+try:
+    from orjson import loads
+except ImportError:
+    try:
+        from ujson import loads
+    except ImportError:
+        from simplejson import loads
 
 __author__ = 'Dustin Whittle <dustin@yahoo-inc.com>'
 __version__ = '0.1'
@@ -52,12 +78,425 @@ OAUTH_API_URL = 'https://query.yahooapis.com/v1/yql'
 DATATABLES_URL = 'store://datatables.org/alltableswithkeys'
 
 
+class Transport(object):
+    """
+    Base of the objects sending requests of `YQLQuery`
+
+    Anything with a `request(url)` method behaves as a transport, e.g.
+    `ConnectionPool` or the record and replay transports of `yahoo_finance.transport`.
+    `request(url)` GETs `url` and returns the response body as bytes, it raises
+    `HTTPError` on a non 2xx response and `EnvironmentError` on a network error.
+    """
+
+
+class ConnectionPool(Transport):
+    """
+    Thread-safe pool of keep-alive HTTP(S) connections
+
+    A forked process starts with an empty pool of its own, connections of the
+    parent are never shared.
+
+    :param maxsize: number of idle connections kept open for reuse, across all hosts;
+                    0 closes every connection after its response
+    :param maxsize_per_host: number of connections open at once to a single host,
+                             further requests wait for a free connection
+    :param timeout: socket timeout in seconds
+    :param gzip: ask for gzip compressed responses
+    :param ssl_context: `ssl.SSLContext` for https connections
+    """
+
+    def __init__(self, maxsize=10, maxsize_per_host=4, timeout=30, gzip=True, ssl_context=None):
+        self.maxsize = maxsize
+        self.maxsize_per_host = maxsize_per_host
+        self.timeout = timeout
+        self.gzip = gzip
+        self.ssl_context = ssl_context
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+
+    def _check_fork(self):
+        # sockets, locks and semaphores copied from the parent are dropped, not closed
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _connect(self, scheme, host, port):
+        if scheme == 'https':
+            return HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        return HTTPConnection(host, port, timeout=self.timeout)
+
+    def _slot(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.maxsize_per_host)
+            return slot
+
+    def _get(self, key):
+        """
+        Get an idle connection for `key` or open a new one
+
+        :return: tuple (connection, reused)
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(*key), False
+
+    def _put(self, key, conn):
+        with self._lock:
+            if sum(len(i) for i in self._idle.values()) < self.maxsize:
+                self._idle.setdefault(key, []).append(conn)
+                return
+        conn.close()
+
+    def request(self, url):
+        """
+        GET `url` reusing an idle connection to its host when possible
+
+        :param url: absolute http or https url
+        :return: response body as bytes, already decompressed
+        :raises HTTPError: on a non 2xx response
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        headers = {'Connection': 'keep-alive'}
+        if self.gzip:
+            headers['Accept-Encoding'] = 'gzip'
+        self._check_fork()
+        slot = self._slot(key)
+        slot.acquire()
+        try:
+            scope = current()
+            while True:
+                conn, reused = self._get(key)
+                try:
+                    if scope is not None and not reused:
+                        start = clock()
+                        conn.connect()
+                        scope.time('connect', clock() - start)
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                except (HTTPException, socket.error):
+                    conn.close()
+                    # the server may have dropped a connection that sat idle, retry on a fresh one
+                    if reused:
+                        continue
+                    raise
+                break
+            if response.will_close:
+                conn.close()
+            else:
+                self._put(key, conn)
+        finally:
+            slot.release()
+        if scope is not None:
+            scope.count('wire_bytes', len(body))
+        if (response.getheader('Content-Encoding') or '').lower() == 'gzip':
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        if not 200 <= response.status < 300:
+            raise HTTPError(url, response.status, response.reason, response.msg, BytesIO(body))
+        return body
+
+    def clear(self):
+        """
+        Close all idle connections
+
+        """
+        self._check_fork()
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+class YQLCircuitOpenError(EnvironmentError):
+
+    def __init__(self, retry_in):
+        super(YQLCircuitOpenError, self).__init__('Circuit open, retry in %.1f seconds' % retry_in)
+        self.retry_in = retry_in
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket limiting the rate of requests
+
+    :param rate: tokens added per second
+    :param burst: maximum number of tokens, i.e. requests sent at once after being idle
+    :param clock: function returning the current time in seconds
+    :param sleep: function waiting a number of seconds
+    """
+
+    def __init__(self, rate, burst=1, clock=time.time, sleep=time.sleep):
+        if rate <= 0 or burst < 1:
+            raise ValueError('Rate must be positive and burst at least 1, got %r, %r' % (rate, burst))
+        self.rate = float(rate)
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # take a token, possibly not added yet; return seconds to wait for it
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate, self._paused_until - now)
+            return wait
+
+    def acquire(self):
+        """
+        Wait until a request may be sent
+
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Hold all requests for `seconds`, e.g. when the server asked to slow down
+
+        """
+        with self._lock:
+            now = self.clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0)
+
+
+class Retry(object):
+    """
+    Retry policy for failed requests with exponential backoff and jitter
+
+    :param retries: times a failed request is sent again
+    :param backoff: seconds to wait before the first retry, doubled for every following one
+    :param max_backoff: longest wait between attempts in seconds
+    :param jitter: wait a random time up to the backoff, so clients do not retry in step
+    :param statuses: HTTP statuses retried, network errors are always retried
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30, jitter=True,
+                 statuses=(429, 500, 502, 503, 504)):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+
+    def retryable(self, error):
+        if isinstance(error, HTTPError):
+            return error.code in self.statuses
+        return _network_error(error)
+
+    def delay(self, attempt, error):
+        """
+        Seconds to wait before retrying after `error`
+
+        :param attempt: number of attempts which failed before this one
+        :return: seconds, None when the request should not be retried
+        """
+        if attempt >= self.retries or not self.retryable(error):
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return max(delay, retry_after(error))
+
+
+def _network_error(error):
+    return not isinstance(error, HTTPError) and isinstance(
+        error, (URLError, HTTPException, socket.error))
+
+
+def _server_failure(error):
+    if isinstance(error, HTTPError):
+        return error.code == 429 or error.code >= 500
+    return _network_error(error)
+
+
+def retry_after(error):
+    """
+    Seconds asked to wait by the `Retry-After` header of an HTTP error, 0 without one
+
+    """
+    headers = getattr(error, 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CircuitBreaker(object):
+    """
+    Fail fast while the server keeps failing
+
+    After `failures` consecutive failed requests the circuit opens and requests
+    raise `YQLCircuitOpenError` at once. After `reset_timeout` seconds a single
+    request is let through, its success closes the circuit again.
+
+    :param failures: consecutive failed requests opening the circuit
+    :param reset_timeout: seconds the circuit stays open
+    :param clock: function returning the current time in seconds
+    """
+
+    def __init__(self, failures=5, reset_timeout=30, clock=time.time):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.consecutive_failures = 0
+        self.opened_at = None
+        # token of the request let through while half-open, None without one
+        self._trial = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if self.clock() - self.opened_at < self.reset_timeout or self._trial is not None:
+                return 'open'
+            return 'half-open'
+
+    def before(self):
+        """
+        Check that a request may be sent
+
+        :return: token of the trial request while half-open, to `release` when it ends; None
+        :raises YQLCircuitOpenError: while the circuit is open
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return None
+            retry_in = self.opened_at + self.reset_timeout - self.clock()
+            if retry_in > 0 or self._trial is not None:
+                raise YQLCircuitOpenError(max(retry_in, 0))
+            self._trial = object()
+            return self._trial
+
+    def success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial = None
+
+    def failure(self):
+        with self._lock:
+            self._fail()
+
+    def _fail(self):
+        self.consecutive_failures += 1
+        if self._trial is not None or self.consecutive_failures >= self.failures:
+            self.opened_at = self.clock()
+        self._trial = None
+
+    def release(self, trial):
+        """
+        End a trial request, counted as a failure unless `success` or `failure` ended it
+
+        """
+        with self._lock:
+            if self._trial is trial:
+                self._fail()
+
+
 class YQLQuery(object):
 
+    # shared by all queries, so every `Share` and `Currency` reuses the same connections
+    transport = ConnectionPool()
+    # `TokenBucket` shared by all queries, None sends requests without limit
+    limiter = None
+    # `Retry` policy of failed requests, None sends every request once
+    retry = Retry()
+    # `CircuitBreaker` shared by all queries, None never fails fast
+    breaker = CircuitBreaker()
+
+    def __init__(self, transport=None):
+        if transport is not None:
+            self.transport = transport
+
     def execute(self, yql, token=None):
-        req = urlopen(PUBLIC_API_URL + '?' + urlencode({
+        body = self._request(PUBLIC_API_URL + '?' + urlencode({
             'q': yql,
             'format': 'json',
             'env': DATATABLES_URL
         }))
-        return loads(req.read())
+        scope = current()
+        if scope is None:
+            return loads(body)
+        start = clock()
+        response = loads(body)
+        scope.time('decode', clock() - start)
+        return response
+
+    def _request(self, url):
+        """
+        Send a request through the limiter, retry policy and circuit breaker
+
+        :raises YQLCircuitOpenError: when the circuit breaker is open
+        """
+        trial = self.breaker.before() if self.breaker is not None else None
+        try:
+            return self._send(url)
+        finally:
+            if trial is not None:
+                # a trial ended by e.g. KeyboardInterrupt, with no success or failure
+                self.breaker.release(trial)
+
+    def _send(self, url):
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                body = self._transfer(url)
+            except Exception as e:
+                delay = self.retry.delay(attempt, e) if self.retry is not None else None
+                if delay is None:
+                    if self.breaker is not None:
+                        if _server_failure(e):
+                            self.breaker.failure()
+                        else:
+                            # the server is up, e.g. it answered 404
+                            self.breaker.success()
+                    raise
+                if self.limiter is not None and getattr(e, 'code', None) == 429:
+                    self.limiter.pause(delay)
+                    delay = 0
+                time.sleep(delay)
+                attempt += 1
+                scope = current()
+                if scope is not None:
+                    scope.count('retries')
+            else:
+                if self.breaker is not None:
+                    self.breaker.success()
+                return body
+
+    def _transfer(self, url):
+        scope = current()
+        if scope is None:
+            return self.transport.request(url)
+        connect = scope.connect
+        start = clock()
+        try:
+            body = self.transport.request(url)
+        finally:
+            # failed attempts are timed too
+            scope.time('transfer', clock() - start - (scope.connect - connect))
+        scope.count('bytes', len(body))
+        return body